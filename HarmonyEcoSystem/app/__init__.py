@@ -30,6 +30,7 @@ def create_app(config_path: str | None = None) -> Flask:
 
     init_extensions(app)
     _register_blueprints(app, config_data)
+    _register_cli_commands(app)
 
     app.config["APP_CONFIG"] = config_data
 
@@ -37,6 +38,12 @@ def create_app(config_path: str | None = None) -> Flask:
     def load_user(user_id: str):
         return UserAccount.query.get(int(user_id))
 
+    # Opsiyonel tablo/kolonları bir kez tespit et
+    _probe_schema_capabilities(app)
+
+    # Asenkron audit yazıcısı
+    _setup_audit_sink(app, config_data.get("audit", {}))
+
     # Database monitoring başlat
     _setup_database_monitoring(app)
 
@@ -64,6 +71,9 @@ def _apply_core_config(app: Flask, config: Dict[str, Any]) -> None:
         "max_overflow": 20,  # Pool doluyken ek bağlantı sayısı
         "echo_pool": False
     }
+    if "pyodbc" in str(db_config.get("dialect", "")):
+        # executemany (bulk insert) çağrıları tek round-trip'te parametre dizisi gönderir
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"]["fast_executemany"] = True
 
 
 def _configure_logging(app: Flask, logging_cfg: Dict[str, Any]) -> None:
@@ -121,6 +131,85 @@ def _build_database_uri(db_config: Dict[str, Any]) -> str:
     return f"{dialect}://{username}:{password}@{host}:{port}/{database}{query}"
 
 
+def _register_cli_commands(app: Flask) -> None:
+    import click
+    from flask.cli import AppGroup
+
+    lifecycle_cli = AppGroup("lifecycle", help="DollyLifecycle / DollyCurrentStatus bakım komutları")
+
+    @lifecycle_cli.command("rebuild-status")
+    def rebuild_status() -> None:
+        """DollyCurrentStatus projeksiyonunu DollyLifecycle geçmişinden yeniden kur."""
+        from .services.lifecycle_service import LifecycleService
+
+        changed = LifecycleService().rebuild_current_status()
+        click.echo(f"✅ DollyCurrentStatus yeniden kuruldu: {changed} satır değişti")
+
+    @lifecycle_cli.command("check-status")
+    @click.option("--repair", is_flag=True, help="Tutarsızlık varsa projeksiyonu yeniden kur.")
+    @click.option("--samples", default=20, show_default=True, help="Gösterilecek örnek tutarsızlık sayısı.")
+    def check_status(repair: bool, samples: int) -> None:
+        """Projeksiyonu geçmişle karşılaştır."""
+        from .services.lifecycle_service import LifecycleService
+
+        service = LifecycleService()
+        report = service.check_current_status(sample_limit=samples)
+        click.echo(
+            f"missing={report['missing']} stale={report['stale']} orphaned={report['orphaned']}"
+        )
+        for row in report["samples"]:
+            click.echo(f"  {row['DollyNo']}: history={row['HistoryStatus']} projected={row['ProjectedStatus']}")
+        if report["consistent"]:
+            click.echo("✅ DollyCurrentStatus tutarlı")
+            return
+        if repair:
+            changed = service.rebuild_current_status()
+            click.echo(f"🔧 Onarıldı: {changed} satır değişti")
+        else:
+            raise SystemExit(1)
+
+    app.cli.add_command(lifecycle_cli)
+
+
+def _probe_schema_capabilities(app: Flask) -> None:
+    """Schema capability registry'yi doldur (hata olursa ilk kullanımda tekrar denenir)"""
+    try:
+        from .services.schema_registry import schema_registry
+
+        with app.app_context():
+            snapshot = schema_registry.probe()
+        missing = [name for name, enabled in snapshot["features"].items() if not enabled]
+        app.logger.info(f"🗂️ Schema capabilities probed ({len(missing)} feature eksik: {', '.join(missing) or '-'})")
+    except Exception as e:
+        app.logger.error(f"Failed to probe schema capabilities: {e}")
+
+
+def _setup_audit_sink(app: Flask, audit_config: Dict[str, Any]) -> None:
+    """AuditLog yazımlarını arka plan kuyruğuna al (kapalıysa senkron yazılır)"""
+    if not audit_config.get("async", True):
+        return
+    try:
+        from .services.audit_sink import audit_sink
+
+        audit_sink.max_queue = int(audit_config.get("queue_size", audit_sink.max_queue))
+        audit_sink.batch_size = int(audit_config.get("batch_size", audit_sink.batch_size))
+        audit_sink.start(app, spill_path=audit_config.get("spill_file", "logs/audit_spill.jsonl"))
+
+        # Worker çıkışında kuyruktakileri yaz (monitoring başlamasa da).
+        # atexit ters sırada çalışır: monitoring'den önce kaydedildiği için
+        # monitoring durdurulduktan sonra, son audit kayıtlarıyla birlikte flush edilir.
+        import atexit
+
+        def flush_audit_sink():
+            if audit_sink.is_running:
+                audit_sink.stop()
+                app.logger.info(f"🛑 Audit sink flushed ({audit_sink.get_stats()['written']} rows written)")
+
+        atexit.register(flush_audit_sink)
+    except Exception as e:
+        app.logger.error(f"Failed to setup audit sink: {e}")
+
+
 def _setup_database_monitoring(app: Flask) -> None:
     """Database monitoring servisini kur ve başlat"""
     try:
@@ -131,6 +220,7 @@ def _setup_database_monitoring(app: Flask) -> None:
         
         # Graceful shutdown için atexit handler
         import atexit
+
         def shutdown_monitoring():
             if db_monitor.is_running:
                 db_monitor.stop_monitoring()
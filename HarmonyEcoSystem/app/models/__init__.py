@@ -4,7 +4,7 @@ from .dolly_hold import DollySubmissionHold
 from .dolly_queue_removed import DollyQueueRemoved
 from .forklift_session import ForkliftLoginSession
 from .group import DollyGroup, DollyGroupEOL
-from .lifecycle import DollyLifecycle
+from .lifecycle import DollyCurrentStatus, DollyLifecycle
 from .pworkstation import PWorkStation
 from .sefer import SeferDollyEOL
 from .user import (
@@ -25,6 +25,7 @@ __all__ = [
     "DollyGroup",
     "DollyGroupEOL",
     "DollyLifecycle",
+    "DollyCurrentStatus",
     "PWorkStation",
     "SeferDollyEOL",
     "UserRole",
@@ -19,3 +19,20 @@ class DollyLifecycle(db.Model):
 
     def __repr__(self) -> str:
         return f"<DollyLifecycle Dolly={self.DollyNo} Status={self.Status}>"
+
+
+class DollyCurrentStatus(db.Model):
+    """Projection of the latest DollyLifecycle row per dolly."""
+
+    __tablename__ = "DollyCurrentStatus"
+    __table_args__ = {"extend_existing": True}
+
+    DollyNo = db.Column(db.String(20), primary_key=True)
+    VinNo = db.Column(db.String(50), nullable=False)
+    Status = db.Column(db.String(40), nullable=False)
+    Source = db.Column(db.String(30), nullable=True)
+    LifecycleId = db.Column(db.Integer, nullable=False)
+    UpdatedAt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<DollyCurrentStatus Dolly={self.DollyNo} Status={self.Status}>"
@@ -15,6 +15,8 @@ from flask import current_app
 from ..extensions import db
 from ..models import DollyEOLInfo, DollySubmissionHold, WebOperatorTask
 from ..services.audit_service import AuditService
+from ..services.queue_snapshot import queue_snapshot
+from ..services.shipment_summary import shipment_summaries
 
 
 def _audit():
@@ -157,6 +159,8 @@ def remove_last_dolly_in_eol(part_number: str, dolly_no: str, eol_name: str, act
         task.UpdatedAt = datetime.utcnow()
 
     db.session.commit()
+    queue_snapshot.discard(dolly_no)
+    shipment_summaries.invalidate()
 
     audit = _audit()
     if audit:
@@ -7,7 +7,14 @@ from flask_login import login_required, current_user
 
 from ..extensions import db
 from ..services import DollyService
-from ..services.realtime_service import RealtimeService
+from ..services.barcode_resolver import barcode_resolver
+from ..services.group_resolver import group_resolver
+from ..services.idempotency import scan_idempotency
+from ..services.queue_snapshot import queue_snapshot
+from ..services.realtime_service import ROLE_ADMIN, ROLE_OPERATOR, RealtimeService
+from ..services.scan_sequencer import scan_sequencer
+from ..utils.auth import role_required
+from ..utils.pagination import encode_cursor, page_response, parse_fields, parse_page_args
 from ..utils.forklift_auth import (
     require_forklift_auth,
     get_current_forklift_user,
@@ -258,8 +265,16 @@ def validate_session():
 
 @api_bp.get("/groups")
 def list_groups():
-    groups = _service().list_groups()
-    return jsonify([asdict(group) for group in groups])
+    """Kuyruk listesi. Opsiyonel: ?limit=&cursor= (keyset sayfalama), ?fields=dolly_no,vin_no"""
+    try:
+        limit, cursor = parse_page_args(request.args)
+        fields = parse_fields(request.args)
+        if limit is None:
+            return jsonify(page_response(_service().list_groups(), fields, None, None))
+        groups, next_cursor = _service().list_groups_page(limit, cursor)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(page_response(groups, fields, limit, encode_cursor(next_cursor) if next_cursor else None))
 
 
 @api_bp.get("/group-sequences")
@@ -296,9 +311,17 @@ def acknowledge_group(dolly_no: str):
 
 @api_bp.get("/holds")
 def list_hold_entries():
+    """Hold listesi. Opsiyonel: ?status=, ?limit=&cursor= (keyset sayfalama), ?fields="""
     status = request.args.get("status")
-    entries = _service().list_hold_entries(status=status)
-    return jsonify([asdict(entry) for entry in entries])
+    try:
+        limit, cursor = parse_page_args(request.args)
+        fields = parse_fields(request.args)
+        if limit is None:
+            return jsonify(page_response(_service().list_hold_entries(status=status), fields, None, None))
+        entries, next_cursor = _service().list_hold_entries_page(limit, cursor, status=status)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(page_response(entries, fields, limit, encode_cursor(next_cursor) if next_cursor else None))
 
 
 # ==================== FORKLIFT OPERATIONS ====================
@@ -329,20 +352,25 @@ def forklift_scan_dolly():
     loading_session_id = payload.get("loadingSessionId")  # Group multiple scans
     barcode = payload.get("barcode")
     
-    try:
-        entry = _service().forklift_scan_dolly(
-            dolly_no=dolly_no,
-            forklift_user=forklift_user,
-            loading_session_id=loading_session_id,
-            barcode=barcode
-        )
-        return jsonify(asdict(entry)), 201
-    except ValueError as exc:
-        return jsonify({"error": str(exc), "retryable": True}), 400
-    except RuntimeError as exc:
-        return jsonify({"error": str(exc), "retryable": False}), 500
-    except Exception as exc:
-        return jsonify({"error": "Beklenmeyen hata", "message": str(exc), "retryable": False}), 500
+    def scan():
+        try:
+            entry = _service().forklift_scan_dolly(
+                dolly_no=dolly_no,
+                forklift_user=forklift_user,
+                loading_session_id=loading_session_id,
+                barcode=barcode
+            )
+            return jsonify(asdict(entry)), 201
+        except ValueError as exc:
+            return jsonify({"error": str(exc), "retryable": True}), 400
+        except RuntimeError as exc:
+            return jsonify({"error": str(exc), "retryable": False}), 500
+        except Exception as exc:
+            return jsonify({"error": "Beklenmeyen hata", "message": str(exc), "retryable": False}), 500
+    
+    # Eşzamanlı retry'lar (aynı session + dolly) ilk isteğin yanıtını alır; sıralı retry mevcut hold'u alır
+    key, ttl = scan_idempotency.key_for("forklift.scan", forklift_user, loading_session_id, dolly_no, barcode)
+    return scan_idempotency.run(key, ttl, scan)
 
 
 @api_bp.post("/forklift/remove-last")
@@ -626,9 +654,21 @@ def _parse_eol_selections(payload: dict) -> Optional[List[dict]]:
 # Web Operator API Endpoints
 @api_bp.get("/operator/tasks")
 def list_operator_tasks():
+    """Görev listesi. Opsiyonel: ?status=, ?limit=&cursor= (keyset sayfalama), ?fields="""
     status = request.args.get("status")
-    tasks = _service().list_web_operator_tasks(status=status)
-    return jsonify([asdict(task) for task in tasks])
+    try:
+        limit, cursor = parse_page_args(request.args)
+        fields = parse_fields(request.args)
+        if limit is None:
+            return jsonify(page_response(_service().list_web_operator_tasks(status=status), fields, None, None))
+        # hold_entries istenmiyorsa hiç yükleme
+        include_holds = fields is None or "hold_entries" in fields
+        tasks, next_cursor = _service().list_web_operator_tasks_page(
+            limit, cursor, status=status, include_holds=include_holds
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(page_response(tasks, fields, limit, encode_cursor(next_cursor) if next_cursor else None))
 
 
 @api_bp.get("/operator/tasks/<part_number>")
@@ -697,7 +737,8 @@ def submit_operator_task(part_number: str, tag_type: str):
     try:
         RealtimeService.emit_notification(
             message=f"✅ Görev {part_number} el terminalinden submit edildi ({tag_type.upper()})",
-            notification_type="success"
+            notification_type="success",
+            roles=(ROLE_OPERATOR, ROLE_ADMIN)
         )
     except Exception as e:
         current_app.logger.warning(f"Realtime notification failed for API submit: {e}")
@@ -882,6 +923,14 @@ def search_dolly(dolly_no: str):
         # Convert to queue entries with VIN breakdown
         queue_entries = []
         group_info = None
+        statuses = service.lifecycle.latest_statuses(dolly.DollyNo for dolly in dollys)
+        submitted_by_vin = {
+            hold.VinNo: hold
+            for hold in db.session.query(DollySubmissionHold).filter(
+                DollySubmissionHold.DollyNo == dolly_no,
+                DollySubmissionHold.Status.in_(['submitted', 'completed'])
+            ).all()
+        }
         
         for dolly in dollys:
             # Find which group this dolly belongs to
@@ -889,20 +938,14 @@ def search_dolly(dolly_no: str):
                 # Try to find group by EOLID
                 try:
                     if dolly.EOLID and dolly.EOLID.isdigit():
-                        group_eol = db.session.query(DollyGroupEOL).filter(
-                            DollyGroupEOL.PWorkStationId == int(dolly.EOLID)
-                        ).first()
-                        
-                        if group_eol:
-                            group = db.session.query(DollyGroup).filter(
-                                DollyGroup.Id == group_eol.GroupId
-                            ).first()
-                            if group:
-                                group_info = {
-                                    "id": group.Id,
-                                    "name": group.Name,
-                                    "description": group.Description
-                                }
+                        links = group_resolver.links_for_workstation(dolly.EOLID)
+                        group = group_resolver.get_group(links[0].group_id) if links else None
+                        if group:
+                            group_info = {
+                                "id": group.group_id,
+                                "name": group.name,
+                                "description": group.description
+                            }
                 except (ValueError, AttributeError):
                     pass
             
@@ -911,13 +954,9 @@ def search_dolly(dolly_no: str):
                 vin_list = [dolly.VinNo or dolly.DollyNo]
             
             for vin in vin_list:
-                submitted_dolly = db.session.query(DollySubmissionHold).filter(
-                    DollySubmissionHold.DollyNo == dolly.DollyNo,
-                    DollySubmissionHold.VinNo == vin,
-                    DollySubmissionHold.Status.in_(['submitted', 'completed'])
-                ).first()
+                submitted_dolly = submitted_by_vin.get(vin)
                 
-                entry = service._to_queue_entry(dolly)
+                entry = service._to_queue_entry(dolly, statuses)
                 entry.vin_no = vin
                 if submitted_dolly:
                     entry.status = "submitted"
@@ -1001,12 +1040,18 @@ def manual_collection_submission():
 def get_monitoring_status():
     """Database monitoring durumunu getir"""
     try:
+        from ..services.audit_sink import audit_sink
         from ..services.database_monitor import db_monitor
+        from ..services.production_date_cache import production_date_cache
         stats = db_monitor.get_monitoring_stats()
         
         return jsonify({
             'success': True,
             'monitoring': stats,
+            'audit_sink': audit_sink.get_stats(),
+            'production_date_cache': production_date_cache.get_stats(),
+            'scan_idempotency': scan_idempotency.get_stats(),
+            'barcode_resolver': barcode_resolver.get_stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -1014,6 +1059,31 @@ def get_monitoring_status():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.get("/admin/schema-capabilities")
+@login_required
+@role_required("admin")
+def get_schema_capabilities():
+    """Opsiyonel tablo / kolon / özellik durumunu getir"""
+    from ..services.schema_registry import schema_registry
+    return jsonify({'success': True, 'schema': schema_registry.snapshot()})
+
+
+@api_bp.post("/admin/schema-capabilities/refresh")
+@login_required
+@role_required("admin")
+def refresh_schema_capabilities():
+    """Migration sonrası şema yeteneklerini yeniden tespit et"""
+    from ..services.schema_registry import schema_registry
+    try:
+        snapshot = schema_registry.probe()
+        group_resolver.invalidate()
+        current_app.logger.info(f"🗂️ Schema capabilities refreshed by {current_user.Username}")
+        return jsonify({'success': True, 'schema': snapshot})
+    except Exception as e:
+        current_app.logger.error(f"Schema capability probe error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @api_bp.get("/manual-collection/check-updates")
 def check_manual_collection_updates():
     """Check if there are new AVAILABLE dollys
@@ -1054,7 +1124,8 @@ def check_manual_collection_updates():
                     'new_count': new_count,
                     'total_count': current_count,
                     'message': f'{new_count} yeni dolly eklendi'
-                }
+                },
+                roles=(ROLE_OPERATOR,)
             )
         
         return jsonify({
@@ -1191,23 +1262,8 @@ def submit_manual_collection():
         display_customer_referans = eol_clean  # Varsayılan
         
         if unique_eol_names:
-            # EOL'ler için PWorkStation bul
-            eol_stations = db.session.query(PWorkStation).filter(
-                PWorkStation.PWorkStationName.in_(unique_eol_names)
-            ).all()
-            
-            # Bu EOL'ler için grup isimleri bul
-            group_names_set = set()
-            for eol in eol_stations:
-                group_eols = db.session.query(DollyGroupEOL).filter(
-                    DollyGroupEOL.PWorkStationId == eol.Id
-                ).all()
-                
-                for ge in group_eols:
-                    if ge.GroupId:
-                        group = db.session.query(DollyGroup).filter_by(Id=ge.GroupId).first()
-                        if group and group.GroupName:
-                            group_names_set.add(group.GroupName)
+            # Bu EOL'ler için grup isimleri bul (grup eşlemesi bellekte)
+            group_names_set = set(group_resolver.group_names_for_eols(unique_eol_names))
             
             # Eğer grup isimleri bulunduysa, join et
             if group_names_set:
@@ -1281,6 +1337,9 @@ def submit_manual_collection():
         
         # Commit transaction
         db.session.commit()
+        queue_snapshot.discard_many(
+            (dolly_data['dollyNo'], vin) for dolly_data in dollys for vin in dolly_data['vins']
+        )
         
         current_app.logger.info(f"✅ Manuel toplama tamamlandı: {total_dollys_processed} dolly, {total_vins_processed} VIN")
         
@@ -1919,9 +1978,20 @@ def manual_collection_scan():
     NOT: Bir grupta birden fazla EOL olabilir (710grup içinde V710-LLS-EOL, V710-FR-EOL vs.)
 
     """
+    payload = request.get_json(force=True, silent=True) or {}
+    # Eşzamanlı retry'lar (aynı kullanıcı + grup + barkod) barkod arama / doğrulama / insert yapmadan ilk isteğin yanıtını alır
+    key, ttl = scan_idempotency.key_for(
+        "manual_collection.scan",
+        get_current_forklift_user(),
+        payload.get("group_name"),
+        payload.get("eol_name"),
+        payload.get("barcode"),
+    )
+    return scan_idempotency.run(key, ttl, _manual_collection_scan)
+
+
+def _manual_collection_scan():
     try:
-        from ..models.group import DollyGroup, DollyGroupEOL
-        
         payload = request.get_json(force=True, silent=True) or {}
         group_name = payload.get("group_name")
         eol_name_filter = payload.get("eol_name")  # Opsiyonel EOL filtresi
@@ -1934,10 +2004,7 @@ def manual_collection_scan():
             }), 400
         
         # 1. Grup adından grup bul
-        group = DollyGroup.query.filter_by(
-            GroupName=group_name,
-            IsActive=True
-        ).first()
+        group = group_resolver.group_by_name(group_name, active_only=True)
         
         if not group:
             return jsonify({
@@ -1945,14 +2012,8 @@ def manual_collection_scan():
                 "retryable": True
             }), 404
         
-        # 2. Find dolly by barcode with all needed fields
-        find_query = """
-        SELECT TOP 1 DollyNo, VinNo, EOLName, DollyOrderNo, CustomerReferans, EOLID, Adet
-        FROM DollyEOLInfo
-        WHERE EOLDollyBarcode = :barcode OR DollyNo = :barcode
-        """
-        
-        result = db.session.execute(db.text(find_query), {"barcode": barcode}).fetchone()
+        # 2. Find dolly by barcode with all needed fields (ortak barkod çözümleyici)
+        result = barcode_resolver.resolve(barcode)
         
         if not result:
             return jsonify({
@@ -1960,34 +2021,23 @@ def manual_collection_scan():
                 "retryable": True
             }), 404
         
-        dolly_no = result[0]
-        vin_no = result[1]
-        eol_name = result[2]
-        dolly_order_no = result[3]
-        customer_referans = result[4]
-        eol_id = result[5]
-        adet = result[6] or 1
+        dolly_no = result.DollyNo
+        vin_no = result.VinNo
+        eol_name = result.EOLName
+        dolly_order_no = result.DollyOrderNo
+        customer_referans = result.CustomerReferans
+        eol_id = result.EOLID
+        adet = result.Adet or 1
         
         # 3. Dolly'nin EOL'ü bu grubun içinde mi kontrol et (EOL Name üzerinden)
-        from ..models.pworkstation import PWorkStation
-        
-        # EOL adından PWorkStation'ları bul
-        pworkstations = PWorkStation.query.filter_by(PWorkStationName=eol_name).all()
-        
-        if not pworkstations:
+        if not group_resolver.workstation_ids(eol_name):
             return jsonify({
                 "error": f"EOL '{eol_name}' PWorkStation tablosunda bulunamadı",
                 "retryable": True
             }), 404
         
         # Bu grup bu EOL'lerden herhangi birini içeriyor mu?
-        pws_ids = [pws.Id for pws in pworkstations]
-        group_eol = DollyGroupEOL.query.filter(
-            DollyGroupEOL.GroupId == group.Id,
-            DollyGroupEOL.PWorkStationId.in_(pws_ids)
-        ).first()
-        
-        if not group_eol:
+        if not group_resolver.eol_in_group(eol_name, group.group_id):
             return jsonify({
                 "error": f"Bu dolly '{eol_name}' EOL'ünden geliyor, '{group_name}' grubunda değil",
                 "retryable": True
@@ -2015,25 +2065,14 @@ def manual_collection_scan():
             }), 400
         
         # ✅ SIRALI OKUTMA KONTROLÜ (Her EOL için ayrı ayrı - DollyOrderNo bazlı)
-        # 1. Okutulan dolly'nin DollyOrderNo'sunu bul
-        dolly_order_query = """
-        SELECT TOP 1 DollyOrderNo
-        FROM DollyEOLInfo
-        WHERE DollyNo = :dolly_no AND EOLName = :eol_name
-        """
-        
-        dolly_order_result = db.session.execute(db.text(dolly_order_query), {
-            "dolly_no": dolly_no,
-            "eol_name": eol_name
-        }).fetchone()
-        
-        if not dolly_order_result or not dolly_order_result[0]:
+        # 1. Okutulan dolly'nin DollyOrderNo'su (çözümlenen satırdan)
+        if not dolly_order_no:
             return jsonify({
                 "error": f"Dolly '{dolly_no}' için DollyOrderNo bulunamadı",
                 "retryable": True
             }), 404
         
-        current_order_no = dolly_order_result[0]
+        current_order_no = dolly_order_no
         
         # 2. Bu grup+EOL'de şu ana kadar taranan en yüksek DollyOrderNo'yu bul
         import hashlib
@@ -2069,14 +2108,14 @@ def manual_collection_scan():
             """
             
             min_order_result = db.session.execute(db.text(min_order_query), {
-                "group_id": group.Id,
+                "group_id": group.group_id,
                 "eol_name": eol_name
             }).fetchone()
             
             min_order_value = min_order_result[0] if min_order_result and min_order_result[0] else None
             
             # DEBUG LOG
-            current_app.logger.warning(f"🔍 MIN ORDER DEBUG - Group: {group_name} (ID:{group.Id}), EOL: {eol_name}, MinOrder: {min_order_value}")
+            current_app.logger.warning(f"🔍 MIN ORDER DEBUG - Group: {group_name} (ID:{group.group_id}), EOL: {eol_name}, MinOrder: {min_order_value}")
             
             # Eğer JOIN sonuç vermezse, tüm EOL'deki minimum order'ı al
             if min_order_value is None:
@@ -2140,16 +2179,6 @@ def manual_collection_scan():
         # Örnek: MANUAL-A3F2B1C4-20260121
         session_id = f"MANUAL-{group_hash}-{datetime.utcnow().strftime('%Y%m%d')}"
         
-        # Count scanned dollys for this session to determine ScanOrder
-        count_query = """
-        SELECT COUNT(DISTINCT DollyNo) 
-        FROM DollySubmissionHold
-        WHERE LoadingSessionId = :session_id AND Status = 'scanned'
-        """
-        
-        scan_count = db.session.execute(db.text(count_query), {"session_id": session_id}).scalar() or 0
-        scan_order = scan_count + 1
-        
         # Insert to DollySubmissionHold with all fields
         insert_query = """
         INSERT INTO DollySubmissionHold 
@@ -2162,18 +2191,22 @@ def manual_collection_scan():
              GETUTCDATE(), GETUTCDATE())
         """
         
-        db.session.execute(db.text(insert_query), {
-            "dolly_no": dolly_no,
-            "vin_no": vin_no or "",
-            "operator": operator,
-            "session_id": session_id,
-            "dolly_order_no": dolly_order_no,
-            "customer_referans": customer_referans,
-            "eol_name": eol_name,
-            "eol_id": eol_id,
-            "adet": adet,
-            "scan_order": scan_order
-        })
+        def insert_hold(scan_order):
+            db.session.execute(db.text(insert_query), {
+                "dolly_no": dolly_no,
+                "vin_no": vin_no or "",
+                "operator": operator,
+                "session_id": session_id,
+                "dolly_order_no": dolly_order_no,
+                "customer_referans": customer_referans,
+                "eol_name": eol_name,
+                "eol_id": eol_id,
+                "adet": adet,
+                "scan_order": scan_order
+            })
+        
+        # ScanOrder: session'ın aktif (scanned) taramaları içinde sıradaki değer
+        scan_order, _ = scan_sequencer.claim(session_id, insert_hold, scanned_only=True)
         db.session.commit()
         
         # Log to audit
@@ -2326,23 +2359,8 @@ def mobile_manual_collection_submit():
         display_customer_referans = group_name  # Varsayılan: grup ismi
         
         if unique_eol_names:
-            # EOL'ler için PWorkStation bul
-            eol_stations = db.session.query(PWorkStation).filter(
-                PWorkStation.PWorkStationName.in_(unique_eol_names)
-            ).all()
-            
-            # Bu EOL'ler için grup isimleri bul
-            group_names_set = set()
-            for eol in eol_stations:
-                group_eols = db.session.query(DollyGroupEOL).filter(
-                    DollyGroupEOL.PWorkStationId == eol.Id
-                ).all()
-                
-                for ge in group_eols:
-                    if ge.GroupId:
-                        group = db.session.query(DollyGroup).filter_by(Id=ge.GroupId).first()
-                        if group and group.GroupName:
-                            group_names_set.add(group.GroupName)
+            # Bu EOL'ler için grup isimleri bul (grup eşlemesi bellekte)
+            group_names_set = set(group_resolver.group_names_for_eols(unique_eol_names))
             
             # Eğer grup isimleri bulunduysa, join et
             if group_names_set:
@@ -2355,6 +2373,7 @@ def mobile_manual_collection_submit():
         
         total_vins = 0
         total_dollys = 0
+        scanned_session_ids = set()
         
         # 3. Her dolly için işlem yap (TÜM EOL'lerden)
         for dolly_no, eol_name, scan_order in scanned_dolly_info:
@@ -2385,6 +2404,7 @@ def mobile_manual_collection_submit():
                 
                 if hold_record:
                     # Mevcut kaydı güncelle: scanned → pending
+                    scanned_session_ids.add(hold_record.LoadingSessionId)
                     hold_record.Status = 'pending'
                     hold_record.PartNumber = single_part_number  # TEK PartNumber
                     hold_record.DollyOrderNo = eol_record.DollyOrderNo
@@ -2425,6 +2445,10 @@ def mobile_manual_collection_submit():
         
         # Commit
         db.session.commit()
+        queue_snapshot.discard_many((dolly_no, None) for dolly_no, _, _ in scanned_dolly_info)
+        # Tarama session'larının aktif sıraları kapandı; sonraki tarama 1'den başlar
+        for scanned_session_id in scanned_session_ids:
+            scan_sequencer.forget(scanned_session_id)
         
         # Audit log
         from ..services.audit_service import AuditService
@@ -2445,10 +2469,10 @@ def mobile_manual_collection_submit():
         
         # Web operator paneli için realtime bildirim gönder
         try:
-            from ..services.realtime_service import RealtimeService
             RealtimeService.emit_notification(
                 message=f"✅ {total_dollys} dolly / {total_vins} VIN submit edildi • {single_part_number}",
-                notification_type="success"
+                notification_type="success",
+                roles=(ROLE_OPERATOR, ROLE_ADMIN)
             )
             # Ayrıca task/dolly update sinyali gönder
             RealtimeService.emit_dolly_update(
@@ -2459,7 +2483,8 @@ def mobile_manual_collection_submit():
                     "dolly_count": total_dollys,
                     "vin_count": total_vins,
                     "eol_distribution": eol_distribution
-                }
+                },
+                roles=(ROLE_OPERATOR,)
             )
         except Exception as e:
             current_app.logger.warning(f"Realtime notification failed for mobile submit: {e}")
@@ -2525,34 +2550,15 @@ def manual_collection_remove_last():
                 "retryable": True
             }), 400
 
-        # Find dolly by barcode
-        find_query = """
-        SELECT TOP 1 DollyNo
-        FROM DollyEOLInfo
-        WHERE EOLDollyBarcode = :barcode OR DollyNo = :barcode
-        """
-        result = db.session.execute(db.text(find_query), {"barcode": barcode}).fetchone()
-        if not result:
+        # Find dolly by barcode (DollyNo ve EOLName tek çözümlemeden)
+        resolved = barcode_resolver.resolve(barcode)
+        if not resolved:
             return jsonify({
                 "error": f"Barkod '{barcode}' sistemde bulunamadı",
                 "retryable": True
             }), 404
-        dolly_no = result[0]
-
-
-        # 1. Barkoddan EOLName'i bul
-        eol_query = """
-        SELECT TOP 1 EOLName FROM DollyEOLInfo
-        WHERE EOLDollyBarcode = :barcode OR DollyNo = :barcode
-        """
-        eol_result = db.session.execute(db.text(eol_query), {"barcode": barcode}).fetchone()
-        if not eol_result:
-            logger.error(f"[MANUAL_REMOVE] Barkoddan EOL grubu bulunamadı | barcode={barcode}")
-            return jsonify({
-                "error": f"Barkoddan EOL grubu bulunamadı",
-                "retryable": True
-            }), 404
-        eol_name = eol_result[0]
+        dolly_no = resolved.DollyNo
+        eol_name = resolved.EOLName
         logger.info(f"[MANUAL_REMOVE] barcode={barcode} eol_name={eol_name}")
 
         # 2. O EOL grubu ve kullanıcı için en son scanned kasayı bul
@@ -2601,10 +2607,13 @@ def manual_collection_remove_last():
         # Delete from DollySubmissionHold
         delete_query = """
         DELETE FROM DollySubmissionHold
+        OUTPUT deleted.LoadingSessionId, deleted.ScanOrder
         WHERE DollyNo = :dolly_no AND Status = 'scanned'
         """
-        db.session.execute(db.text(delete_query), {"dolly_no": dolly_no})
+        deleted_rows = db.session.execute(db.text(delete_query), {"dolly_no": dolly_no}).fetchall()
         db.session.commit()
+        for row in deleted_rows:
+            scan_sequencer.release(row.LoadingSessionId, row.ScanOrder)
         logger.info(f"[MANUAL_REMOVE] SUCCESS: Dolly çıkartıldı | operator={operator} eol_name={eol_name} dolly_no={dolly_no}")
 
         # Log to audit
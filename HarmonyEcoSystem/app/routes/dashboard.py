@@ -12,11 +12,14 @@ from sqlalchemy import func, text, case, or_
 from markupsafe import Markup, escape
 
 from ..extensions import db
-from ..models import AuditLog, DollyEOLInfo, DollyEOLInfoBackup, TerminalBarcodeSession, TerminalDevice, UserAccount, UserRole
+from ..models import AuditLog, DollyEOLInfo, TerminalBarcodeSession, TerminalDevice, UserAccount, UserRole
 from ..models.sefer import SeferDollyEOL
 from ..services import AuditService, DollyService
+from ..services.group_resolver import group_resolver
+from ..services.production_date_cache import production_date_cache
 from ..modules.operator_edit import add_manual_dolly, remove_last_dolly_in_eol
 from ..services.realtime_service import RealtimeService
+from ..services.shipment_summary import shipment_summaries
 from ..utils.auth import role_required
 from ..utils.security import hash_password
 
@@ -24,22 +27,6 @@ dashboard_bp = Blueprint("dashboard", __name__)
 audit_service = AuditService()
 
 
-def _get_production_date_from_backup(dolly_no: str):
-    """
-    DollyEOLInfoBackup tablosundan üretim tarihini parametrik sorgu ile al.
-    ⚠️ CRITICAL: Sadece parametrik sorgu kullan, sistem yavaşlar!
-    """
-    if not dolly_no:
-        return None
-    try:
-        backup_record = DollyEOLInfoBackup.query.filter_by(DollyNo=dolly_no).first()
-        if backup_record and backup_record.EOLDATE:
-            return backup_record.EOLDATE
-    except Exception as e:
-        current_app.logger.warning(f"⚠️ Backup'tan üretim tarihi alınamadı (DollyNo={dolly_no}): {e}")
-    return None
-
-
 @dashboard_bp.get("/")
 @login_required
 def dashboard_home():
@@ -51,8 +38,6 @@ def dashboard_home():
     if user_role == "operator":
         # Web operator view - show pending dollys from DollySubmissionHold
         from ..models.dolly_hold import DollySubmissionHold
-        from ..models.group import DollyGroup, DollyGroupEOL
-        from ..models.pworkstation import PWorkStation
         
         # Get pending submissions grouped by PartNumber ONLY
         # Include both 'pending' and 'loading_completed' status
@@ -75,41 +60,22 @@ def dashboard_home():
         from datetime import datetime
         pending_tasks = []
         
+        # Tüm part_number'ların EOL'lerini tek sorguda al
+        eol_names_by_part = {}
+        for part_number, eol_name in db.session.query(
+            DollySubmissionHold.PartNumber,
+            DollySubmissionHold.EOLName
+        ).filter(
+            DollySubmissionHold.Status.in_(['pending', 'loading_completed'])
+        ).distinct().all():
+            if eol_name:
+                eol_names_by_part.setdefault(part_number, []).append(eol_name)
+        
         for p in pending_submissions:
-            # Her part_number için ShippingTag'leri kontrol et
-            # Bu part_number'a ait EOL'leri bul
-            eol_names_query = db.session.query(
-                db.func.distinct(DollySubmissionHold.EOLName)
-            ).filter(
-                DollySubmissionHold.PartNumber == p.PartNumber,
-                DollySubmissionHold.Status.in_(['pending', 'loading_completed'])
-            ).all()
-            
-            eol_names = [eol[0] for eol in eol_names_query if eol[0]]
-            
-            # EOL'ler için ShippingTag'leri al
-            shipping_tags = set()
-            group_ids = set()
-            if eol_names:
-                eol_stations = db.session.query(PWorkStation).filter(
-                    PWorkStation.PWorkStationName.in_(eol_names)
-                ).all()
-                
-                for eol in eol_stations:
-                    group_eols = db.session.query(DollyGroupEOL).filter(
-                        DollyGroupEOL.PWorkStationId == eol.Id
-                    ).all()
-                    
-                    for ge in group_eols:
-                        if ge.ShippingTag:  # NULL kontrolü
-                            shipping_tags.add(ge.ShippingTag)
-                        if ge.GroupId:
-                            group_ids.add(ge.GroupId)
-
-            group_names = []
-            if group_ids:
-                groups = db.session.query(DollyGroup).filter(DollyGroup.Id.in_(group_ids)).all()
-                group_names = sorted({g.GroupName for g in groups if g.GroupName})
+            # Her part_number için ShippingTag'leri kontrol et (grup eşlemesi bellekte)
+            eol_names = eol_names_by_part.get(p.PartNumber, [])
+            shipping_tags = group_resolver.shipping_tags_for_eols(eol_names)
+            group_names = group_resolver.group_names_for_eols(eol_names)
             
             # ✅ ETİKET SİSTEMİ: Etiketlere göre group_tag belirle
             # 🟰 'irsaliye': Sadece manuel irsaliye butonu göster
@@ -204,7 +170,7 @@ def dashboard_home():
         groups_raw = db.session.query(DollyEOLInfo).order_by(
             DollyEOLInfo.DollyNo.asc()
         ).limit(default_limit).all()
-        groups = [service._to_queue_entry(record) for record in groups_raw]
+        groups = service._to_queue_entries(groups_raw)
         
         # Filtre parametreleri (admin paneli için)
         filters = {
@@ -235,8 +201,11 @@ def dashboard_home():
         # Sondan başa sıralama: en yeni en üstte
         operator_tasks_raw = sorted(operator_tasks_raw, key=lambda t: t.CreatedAt or t.UpdatedAt or 0, reverse=True)
         operator_tasks = [service._to_web_operator_task_entry(task) for task in operator_tasks_raw]
+        task_holds = service.list_hold_entries_by_part_numbers(
+            [task_entry.part_number for task_entry in operator_tasks[:default_limit]]
+        )
         for task_entry in operator_tasks[:default_limit]:
-            task_entry.hold_entries = service.list_hold_entries_by_part_number(task_entry.part_number)
+            task_entry.hold_entries = task_holds.get(task_entry.part_number, [])
         
         # Pagination bilgisi - basitleştirilmiş (her tablo 50 kayıt gösterir)
         pagination_info = {
@@ -368,7 +337,8 @@ def manual_collection():
     service = DollyService(current_app.config.get("APP_CONFIG", {}))
     active_groups = service.get_active_groups()
     # Get all available dollys grouped by EOL (en çok dolly olan EOL üstte)
-    eol_dollys = service.get_dollys_by_eol_for_collection()
+    # per_eol=None: operatör her dolly'yi seçebilmeli, EOL başına kırpma yok
+    eol_dollys = service.get_dollys_by_eol_for_collection(per_eol=None)
     
     return render_template(
         "dashboard/manual_collection_table.html",
@@ -557,31 +527,11 @@ def operator_task_detail(part_number: str):
         first_sub = submissions[0]
         
         # Grup etiketlerini kontrol et - tüm EOL'ler için ShippingTag kontrolü
-        from ..models.group import DollyGroupEOL
-        from ..models.pworkstation import PWorkStation
-        
         # Bu part_number için kullanılan EOL'leri bul
         unique_eol_names = set(sub.EOLName for sub in submissions if sub.EOLName)
         
-        # Her EOL için ShippingTag'leri al
-        shipping_tags = set()
-        if unique_eol_names:
-            eol_stations = db.session.query(PWorkStation).filter(
-                PWorkStation.PWorkStationName.in_(unique_eol_names)
-            ).all()
-            
-            current_app.logger.info(f"🔍 Part {part_number} için {len(eol_stations)} EOL bulundu")
-            
-            for eol in eol_stations:
-                # Bu EOL için tüm grup etiketlerini al
-                group_eols = db.session.query(DollyGroupEOL).filter(
-                    DollyGroupEOL.PWorkStationId == eol.Id
-                ).all()
-                
-                for ge in group_eols:
-                    if ge.ShippingTag:  # NULL kontrolü ekle
-                        shipping_tags.add(ge.ShippingTag)
-                        current_app.logger.info(f"  📌 EOL {eol.PWorkStationName}: ShippingTag = {ge.ShippingTag}")
+        # Her EOL için ShippingTag'leri al (grup eşlemesi bellekte)
+        shipping_tags = group_resolver.shipping_tags_for_eols(unique_eol_names)
         
         current_app.logger.info(f"📊 Toplanan ShippingTag'ler: {shipping_tags}")
         
@@ -699,8 +649,6 @@ def operator_send_asn(part_number: str):
         from ..models.sefer import SeferDollyEOL
         from ..services.ceva_service import CevaService, ASNItemDetail
         from ..services.audit_service import AuditService
-        from ..models.group import DollyGroupEOL
-        from ..models.pworkstation import PWorkStation
         
         # Get form data
         sefer_numarasi = request.form.get('sefer_numarasi', '').strip()
@@ -745,18 +693,12 @@ def operator_send_asn(part_number: str):
         for sub in all_submissions:
             # Bu submission'ın EOL'ü için ShippingTag kontrolü
             if sub.EOLName:
-                eol_station = db.session.query(PWorkStation).filter_by(
-                    PWorkStationName=sub.EOLName
-                ).first()
-                
-                if eol_station:
+                if group_resolver.workstation_ids(sub.EOLName):
                     # Bu EOL için grup etiketlerini kontrol et
-                    group_eol = db.session.query(DollyGroupEOL).filter_by(
-                        PWorkStationId=eol_station.Id
-                    ).first()
+                    group_links = group_resolver.links_for_eol(sub.EOLName)
                     
-                    if group_eol:
-                        tag = group_eol.ShippingTag
+                    if group_links:
+                        tag = group_links[0].shipping_tag
                         # ✅ Case-insensitive ve trim yaparak karşılaştır
                         tag_normalized = tag.lower().strip() if tag else None
                         tag_debug.append(f"{sub.EOLName}={tag}({tag_normalized})")  # Debug
@@ -896,10 +838,11 @@ def operator_send_asn(part_number: str):
         current_app.logger.info(f"✅ CEVA ASN kabul edildi - SeferDollyEOL'a kaydediliyor...")
         
         transferred_count = 0
+        production_dates = production_date_cache.get_production_dates([sub.DollyNo for sub in submissions])
         
         for sub in submissions:
             # 📅 Üretim tarihini backup tablosundan al
-            production_date = _get_production_date_from_backup(sub.DollyNo)
+            production_date = production_dates.get(sub.DollyNo)
             dolly_info = DollyEOLInfo.query.filter_by(DollyNo=sub.DollyNo, VinNo=sub.VinNo).first()
             eol_dt = production_date or getattr(dolly_info, "InsertedAt", None) or getattr(dolly_info, "EOLDATE", None) or sub.CreatedAt
             # Terminal zamanı: forklift tamamladıysa LoadingCompletedAt, yoksa tarama zamanı (CreatedAt).
@@ -932,6 +875,7 @@ def operator_send_asn(part_number: str):
         
         # Commit transaction
         db.session.commit()
+        shipment_summaries.invalidate()
         
         current_app.logger.info(f"✅ ASN başarılı: {transferred_count} VIN SeferDollyEOL'a taşındı")
         
@@ -1374,9 +1318,10 @@ def operator_complete_task_manually(part_number: str):
         
         # Tüm kayıtları SeferDollyEOL'e taşı
         moved_count = 0
+        production_dates = production_date_cache.get_production_dates([sub.DollyNo for sub in submissions])
         for sub in submissions:
             # 📅 Üretim tarihini backup tablosundan al
-            production_date = _get_production_date_from_backup(sub.DollyNo)
+            production_date = production_dates.get(sub.DollyNo)
             dolly_info = DollyEOLInfo.query.filter_by(DollyNo=sub.DollyNo, VinNo=sub.VinNo).first()
             eol_dt = production_date or getattr(dolly_info, "InsertedAt", None) or getattr(dolly_info, "EOLDATE", None) or sub.CreatedAt
             terminal_dt = sub.LoadingCompletedAt or sub.CreatedAt
@@ -1409,6 +1354,7 @@ def operator_complete_task_manually(part_number: str):
             moved_count += 1
         
         db.session.commit()
+        shipment_summaries.invalidate()
         
         # Audit log
         audit_service.log(
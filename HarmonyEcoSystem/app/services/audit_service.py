@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from flask import current_app
+from sqlalchemy import insert
 
 from ..extensions import db
 from ..models import AuditLog, UserAccount, TerminalDevice
+from .audit_sink import audit_sink
+from .unit_of_work import current_unit_of_work
 
 
 class AuditService:
@@ -34,22 +38,46 @@ class AuditService:
         elif actor_name:
             name = actor_name
         payload = json.dumps(metadata, ensure_ascii=False) if metadata else None
-        log = AuditLog(
-            ActorType=actor_type,
-            ActorId=actor_id,
-            ActorName=name,
-            Action=action,
-            Resource=resource,
-            ResourceId=resource_id,
-            Payload=payload,
-        )
-        db.session.add(log)
+        row = {
+            "ActorType": actor_type,
+            "ActorId": actor_id,
+            "ActorName": name,
+            "Action": action,
+            "Resource": resource,
+            "ResourceId": resource_id,
+            "Payload": payload,
+            "CreatedAt": datetime.utcnow(),
+        }
+        uow = current_unit_of_work()
+        if uow is not None:
+            # Unit of work içinde: yalnızca biriktir, blok sonunda toplu yazılır
+            uow.audit_rows.append(row)
+            return
+        if audit_sink.is_running:
+            # Çağıranların bir kısmı bekleyen değişikliklerinin burada commit
+            # edilmesine güveniyor; audit satırı ise arka planda toplu yazılır
+            if db.session.new or db.session.dirty or db.session.deleted:
+                db.session.commit()
+            audit_sink.enqueue(row)
+            self._log_line(action, name or actor_type, resource, resource_id, payload)
+            return
+        db.session.add(AuditLog(**row))
         db.session.commit()
+        self._log_line(action, name or actor_type, resource, resource_id, payload)
+
+    def write_staged(self, rows: List[Dict[str, Any]]) -> None:
+        """Unit of work'te biriken kayıtları tek bulk insert ile yaz (commit etmez)"""
+        db.session.execute(insert(AuditLog), rows)
+        for row in rows:
+            self._log_line(row["Action"], row["ActorName"] or row["ActorType"], row["Resource"], row["ResourceId"], row["Payload"])
+
+    @staticmethod
+    def _log_line(action: str, actor: str, resource: Optional[str], resource_id: Optional[str], payload: Optional[str]) -> None:
         try:
             current_app.logger.info(
                 "AUDIT action=%s actor=%s resource=%s id=%s meta=%s",
                 action,
-                name or actor_type,
+                actor,
                 resource or "-",
                 resource_id or "-",
                 payload or "",
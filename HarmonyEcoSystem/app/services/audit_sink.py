@@ -0,0 +1,234 @@
+"""
+Audit Sink
+AuditLog satırlarını istek thread'i yerine arka planda, toplu olarak yazar.
+
+AuditService.log satırı sınırlı bir kuyruğa bırakır; writer thread'i
+kuyruğu `batch_size`'lık partiler halinde tek bulk insert + commit ile
+boşaltır. Veritabanına yazılamayan partiler yerel JSONL dosyasına
+(spill) eklenir ve bağlantı düzelince geri yüklenir. Kuyruk doluysa
+satır düşürülür ve sayaçlara yansır. Uygulama kapanırken (atexit)
+kuyruk senkron olarak boşaltılır.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from ..extensions import db
+from ..models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """Sınırlı kuyruk + arka plan bulk insert yazıcısı"""
+
+    def __init__(self, max_queue: int = 5000, batch_size: int = 200, flush_interval: float = 1.0):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path: Optional[Path] = None
+        self.spill_replay_interval = 60  # saniye
+        self.app = None
+        self.is_running = False
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._last_replay = 0.0
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "spilled": 0, "replayed": 0, "failed_batches": 0}
+
+    def start(self, app, spill_path: Optional[str] = None) -> None:
+        if self.is_running:
+            return
+        self.app = app
+        if spill_path:
+            self.spill_path = Path(spill_path)
+        if self._queue.maxsize != self.max_queue:
+            self._queue = queue.Queue(maxsize=self.max_queue)
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+        self._thread.start()
+        app.logger.info(f"📝 Audit sink started (queue={self.max_queue}, batch={self.batch_size})")
+
+    def stop(self, timeout: float = 10) -> None:
+        """Writer'ı durdur ve kalan satırları senkron yaz (atexit)"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._drain_all()
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        offered = stats["enqueued"] + stats["dropped"]
+        stats.update({
+            "is_running": self.is_running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self.max_queue,
+            "drop_rate": round(stats["dropped"] / offered, 4) if offered else 0.0,
+            "spill_file": str(self.spill_path) if self.spill_path else None,
+            "spill_pending": self.spill_path.exists() if self.spill_path else False,
+        })
+        return stats
+
+    # ------------------------------------------------------------------ writer
+    def _run(self) -> None:
+        while self.is_running:
+            batch = self._take_batch(block=True)
+            if batch:
+                self._write(batch)
+            # Kuyruk hiç boşalmasa da (yoğun vardiya) spill düzenli geri yüklenir
+            if self.spill_path and time.monotonic() - self._last_replay >= self.spill_replay_interval:
+                self._replay_spill()
+
+    def _take_batch(self, block: bool) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_all(self) -> None:
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> bool:
+        with self._write_lock:
+            try:
+                with self.app.app_context():
+                    try:
+                        db.session.execute(insert(AuditLog), rows)
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        raise
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                self._count("failed_batches")
+                self._spill(rows, e)
+                return False
+        self._count("written", len(rows))
+        return True
+
+    # ------------------------------------------------------------------ spill
+    def _spill(self, rows: List[Dict[str, Any]], error: Exception) -> None:
+        if not self.spill_path:
+            self._count("dropped", len(rows))
+            self._log_error(f"Audit batch lost ({len(rows)} rows, no spill file): {error}")
+            return
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as handle:
+                for row in rows:
+                    handle.write(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n")
+            self._count("spilled", len(rows))
+            self._log_error(f"Audit DB write failed, {len(rows)} rows spilled to {self.spill_path}: {error}")
+        except Exception as spill_error:
+            self._count("dropped", len(rows))
+            self._log_error(f"Audit spill failed ({len(rows)} rows lost): {spill_error}")
+
+    def _replay_spill(self) -> None:
+        """Spill dosyasındaki satırları veritabanına geri yükle"""
+        self._last_replay = time.monotonic()
+        if not self.spill_path:
+            return
+        replay_path = self.spill_path.with_suffix(self.spill_path.suffix + ".replay")
+        # Önceki geri yükleme yarıda kaldıysa (crash) önce o dosya işlenir; üzerine yazılmaz
+        if replay_path.exists() and not self._replay_file(replay_path):
+            return
+        if not self.spill_path.exists():
+            return
+        try:
+            self.spill_path.replace(replay_path)
+        except Exception as e:
+            self._log_error(f"Audit spill rotate failed: {e}")
+            return
+        self._replay_file(replay_path)
+
+    def _replay_file(self, replay_path: Path) -> bool:
+        """Dosyadaki satırları yaz ve dosyayı sil; okunamazsa dosya yerinde kalır"""
+        rows: List[Dict[str, Any]] = []
+        try:
+            with replay_path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    try:
+                        rows.append(_decode_row(line))
+                    except ValueError as e:
+                        # Crash sırasında yarım yazılmış satır: atlanır, diğerleri kaybolmaz
+                        self._count("dropped")
+                        self._log_error(f"Audit spill line skipped: {e}")
+        except Exception as e:
+            self._log_error(f"Audit spill read failed: {e}")
+            return False
+        replayed = 0
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            # Başarısız parti _write içinde yeniden spill dosyasına eklenir
+            if self._write(chunk):
+                replayed += len(chunk)
+        replay_path.unlink(missing_ok=True)
+        if replayed:
+            self._count("replayed", replayed)
+            if self.app:
+                self.app.logger.info(f"📝 Audit spill replayed: {replayed} rows")
+        return True
+
+    # ------------------------------------------------------------------ helpers
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _log_error(self, message: str) -> None:
+        if self.app:
+            self.app.logger.error(message)
+        else:
+            logger.error(message)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_row(line: str) -> Dict[str, Any]:
+    row = json.loads(line)
+    if row.get("CreatedAt"):
+        row["CreatedAt"] = datetime.fromisoformat(row["CreatedAt"])
+    return row
+
+
+# Global instance
+audit_sink = AuditSink()
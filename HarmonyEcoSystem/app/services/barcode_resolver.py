@@ -0,0 +1,93 @@
+"""
+Barcode Resolver
+Tarama endpoint'lerinin ortak barkod -> dolly çözümlemesi.
+
+Okutulan değer EOLDollyBarcode ya da doğrudan DollyNo olabilir. Önce
+queue_snapshot'taki normalize edilmiş barkod / DollyNo indekslerine bakılır
+(snapshot EOL akışının InsertedAt / RECEIPTID watermark'ıyla artımlı
+beslenir; tarama isteği tam yükleme yapmaz, snapshot henüz yüklenmemişse
+doğrudan SQL'e gidilir). Bulunamazsa `EOLDollyBarcode = :b OR DollyNo = :b` yerine iki
+ayrı index seek'li SQL fallback çalışır ve bulunan satır snapshot'a eklenir.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional
+
+from flask import current_app
+from sqlalchemy import text
+
+from ..extensions import db
+from ..utils.barcode import normalize_barcode
+from .queue_snapshot import SnapshotRow, _COLUMNS, queue_snapshot
+
+# Her kol kendi index'inde seek yapar; barkod eşleşmesi DollyNo eşleşmesinden önce gelir
+_FALLBACK_SQL = f"""
+    SELECT TOP 1 {_COLUMNS}
+    FROM (
+        SELECT TOP 1 0 AS MatchRank, {_COLUMNS}
+        FROM DollyEOLInfo WITH (NOLOCK)
+        WHERE EOLDollyBarcode = :barcode
+        UNION ALL
+        SELECT TOP 1 1 AS MatchRank, {_COLUMNS}
+        FROM DollyEOLInfo WITH (NOLOCK)
+        WHERE DollyNo = :barcode
+    ) matches
+    ORDER BY MatchRank
+"""
+
+
+class BarcodeResolver:
+    """Normalize barkod -> DollyEOLInfo satırı (snapshot, yoksa iki seek'li SQL)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"snapshot_hits": 0, "sql_hits": 0, "misses": 0}
+
+    def resolve(self, barcode: Optional[str]) -> Optional[SnapshotRow]:
+        """Barkodun / DollyNo'nun ilk VIN satırı (InsertedAt, VinNo sırasıyla); yoksa None"""
+        key = normalize_barcode(barcode)
+        if not key:
+            return None
+
+        row = self._from_snapshot(key)
+        if row is not None:
+            self._count("snapshot_hits")
+            return row
+
+        row = self._from_sql(key)
+        if row is not None:
+            self._count("sql_hits")
+            queue_snapshot.upsert(row)
+            return row
+
+        self._count("misses")
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def _from_snapshot(self, key: str) -> Optional[SnapshotRow]:
+        try:
+            # Yeni satırlar snapshot işleyicilerine (EOL_READY) buradan da ulaşır
+            queue_snapshot.refresh(allow_full_load=False)
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Queue snapshot refresh failed during barcode lookup: {e}")
+            return None
+        rows = queue_snapshot.by_barcode(key) or queue_snapshot.by_dolly(key)
+        if not rows:
+            return None
+        return min(rows, key=lambda row: (row.InsertedAt is None, row.InsertedAt or 0, row.VinNo or ""))
+
+    def _from_sql(self, key: str) -> Optional[SnapshotRow]:
+        result = db.session.execute(text(_FALLBACK_SQL), {"barcode": key}).fetchone()
+        return SnapshotRow(**result._mapping) if result else None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+# Global instance
+barcode_resolver = BarcodeResolver()
@@ -0,0 +1,175 @@
+"""
+Change Feed
+DollyEOLInfo'ya eklenen VIN satırlarını (InsertedAt, DollyNo, VinNo) keyset
+watermark'ıyla sırayla okur.
+
+Her `poll` çağrısı watermark'tan sonraki satırları sayfa sayfa çeker ve
+her sayfayı tek bir batch olarak işleyiciye verir. Watermark ancak işleyici
+batch'i hatasız bitirdikten sonra ilerler (hata alan batch bir sonraki
+çağrıda tekrar gelir) ve ChangeFeedCheckpoint tablosuna (migration 030)
+yazılır; böylece restart sonrası kalınan yerden devam edilir. Bir sonraki
+sayfa işleyici bitmeden çekilmez ve bir çağrıda en fazla `max_pages` sayfa
+okunur: yavaş tüketici sorgu hızını da yavaşlatır, büyük birikim birkaç
+döngüye yayılır.
+
+InsertedAt UTC tutulur; başlangıç noktası ve "yerleşme" sınırı bu yüzden
+veritabanı saatinden (SYSUTCDATETIME) hesaplanır. Sayfa sorgusu NOLOCK
+kullanmaz (geri alınan satırlar duyurulmaz) ve yalnızca `settle_seconds`
+saniyeden eski satırları okur: daha erken zaman damgasıyla geç commit olan
+satır watermark geçmeden görünür hale gelir.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..extensions import db
+from .schema_registry import schema_registry
+
+_PAGE_SQL = """
+    SELECT TOP (:page_size)
+        DollyNo, VinNo, CustomerReferans, Adet, EOLName, EOLID, EOLDATE, EOLDollyBarcode, InsertedAt
+    FROM DollyEOLInfo
+    WHERE InsertedAt IS NOT NULL
+      AND InsertedAt <= DATEADD(SECOND, -:settle_seconds, SYSUTCDATETIME())
+      AND (
+          InsertedAt > :ts
+          OR (InsertedAt = :ts AND (DollyNo > :dolly_no OR (DollyNo = :dolly_no AND VinNo > :vin_no)))
+      )
+    ORDER BY InsertedAt, DollyNo, VinNo
+"""
+
+_INITIAL_WATERMARK_SQL = "SELECT DATEADD(SECOND, -:lookback_seconds, SYSUTCDATETIME())"
+
+_LOAD_CHECKPOINT_SQL = """
+    SELECT LastInsertedAt, LastDollyNo, LastVinNo
+    FROM ChangeFeedCheckpoint WITH (NOLOCK)
+    WHERE FeedName = :feed_name
+"""
+
+# Başka bir worker daha ileri yazdıysa geri alınmaz
+_SAVE_CHECKPOINT_SQL = """
+    MERGE ChangeFeedCheckpoint WITH (HOLDLOCK) AS t
+    USING (SELECT :feed_name AS FeedName) AS s
+    ON t.FeedName = s.FeedName
+    WHEN MATCHED AND (t.LastInsertedAt IS NULL OR t.LastInsertedAt <= :ts) THEN
+        UPDATE SET LastInsertedAt = :ts, LastDollyNo = :dolly_no, LastVinNo = :vin_no,
+                   RowsProcessed = t.RowsProcessed + :rows, UpdatedAt = SYSUTCDATETIME()
+    WHEN NOT MATCHED THEN
+        INSERT (FeedName, LastInsertedAt, LastDollyNo, LastVinNo, RowsProcessed, UpdatedAt)
+        VALUES (:feed_name, :ts, :dolly_no, :vin_no, :rows, SYSUTCDATETIME());
+"""
+
+Watermark = Tuple[datetime, str, str]
+
+
+class ChangeFeed:
+    """DollyEOLInfo için kalıcı watermark'lı, sayfalı değişiklik akışı"""
+
+    def __init__(self, feed_name: str = "DollyEOLInfo", page_size: int = 200, max_pages: int = 10):
+        self.feed_name = feed_name
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.initial_lookback = timedelta(minutes=1)  # Checkpoint yoksa geriye bakılan süre
+        self.settle_seconds = 5  # Bu süreden yeni satırlar bir sonraki döngüye kalır (geç commit payı)
+        self._lock = threading.Lock()
+        self._watermark: Optional[Watermark] = None
+        self.caught_up = True
+        self.stats = {"polls": 0, "pages": 0, "rows": 0, "handler_errors": 0, "checkpoint_writes": 0}
+
+    def is_available(self) -> bool:
+        return schema_registry.has_feature("eol_inserted_at")
+
+    def poll(self, handler: Callable[[List[Dict[str, Any]]], None]) -> int:
+        """
+        Watermark'tan sonraki satırları batch'ler halinde `handler`'a ver.
+        İşlenen satır sayısını döndürür; `caught_up` False ise birikim sürüyor.
+        """
+        with self._lock:
+            if self._watermark is None:
+                self._watermark = self._load_watermark()
+            self.stats["polls"] += 1
+
+            processed = 0
+            self.caught_up = False
+            for _ in range(self.max_pages):
+                ts, dolly_no, vin_no = self._watermark
+                batch = [
+                    dict(row._mapping)
+                    for row in db.session.execute(
+                        db.text(_PAGE_SQL),
+                        {
+                            "page_size": self.page_size,
+                            "settle_seconds": self.settle_seconds,
+                            "ts": ts,
+                            "dolly_no": dolly_no,
+                            "vin_no": vin_no,
+                        },
+                    )
+                ]
+                if not batch:
+                    self.caught_up = True
+                    break
+
+                try:
+                    handler(batch)
+                except Exception:
+                    self.stats["handler_errors"] += 1
+                    db.session.rollback()
+                    raise
+
+                last = batch[-1]
+                self._watermark = (last["InsertedAt"], last["DollyNo"], last["VinNo"])
+                self._save_watermark(len(batch))
+                self.stats["pages"] += 1
+                self.stats["rows"] += len(batch)
+                processed += len(batch)
+                if len(batch) < self.page_size:
+                    self.caught_up = True
+                    break
+            return processed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            watermark = self._watermark
+            return {
+                **self.stats,
+                "caught_up": self.caught_up,
+                "persistent": self._checkpoint_available(),
+                "watermark": {
+                    "insertedAt": watermark[0].isoformat() if watermark else None,
+                    "dollyNo": watermark[1] if watermark else None,
+                    "vinNo": watermark[2] if watermark else None,
+                },
+            }
+
+    # ------------------------------------------------------------------ checkpoint
+    def _checkpoint_available(self) -> bool:
+        return schema_registry.has_feature("change_feed_checkpoint")
+
+    def _load_watermark(self) -> Watermark:
+        if self._checkpoint_available():
+            row = db.session.execute(db.text(_LOAD_CHECKPOINT_SQL), {"feed_name": self.feed_name}).fetchone()
+            if row is not None and row.LastInsertedAt is not None:
+                return (row.LastInsertedAt, row.LastDollyNo or "", row.LastVinNo or "")
+        # InsertedAt UTC: uygulama sunucusunun yerel saati değil, DB'nin UTC saati
+        start = db.session.execute(
+            db.text(_INITIAL_WATERMARK_SQL),
+            {"lookback_seconds": int(self.initial_lookback.total_seconds())},
+        ).scalar()
+        return (start, "", "")
+
+    def _save_watermark(self, rows: int) -> None:
+        if self._checkpoint_available():
+            ts, dolly_no, vin_no = self._watermark
+            db.session.execute(
+                db.text(_SAVE_CHECKPOINT_SQL),
+                {"feed_name": self.feed_name, "ts": ts, "dolly_no": dolly_no, "vin_no": vin_no, "rows": rows},
+            )
+            self.stats["checkpoint_writes"] += 1
+        db.session.commit()
+
+
+# Global instance
+eol_change_feed = ChangeFeed()
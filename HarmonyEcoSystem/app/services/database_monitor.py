@@ -12,25 +12,27 @@ from flask import current_app
 from ..extensions import db
 from ..models.dolly import DollyEOLInfo
 from .audit_service import AuditService
+from .change_feed import eol_change_feed
+from .queue_snapshot import queue_snapshot
+from ..utils.dedupe import BoundedDedupe
 
 class DatabaseMonitor:
     def __init__(self):
         self.is_running = False
         self.monitoring_thread = None
         self.last_check_times = {}
-        self.last_processed_ids = {'DollyEOLInfo': set()}
+        # Görülen VIN'ler (batch tekrarı / EOLDATE taramasında aynı satırlar) ve duyurulan dolly'ler
+        self.seen_vins = BoundedDedupe(max_entries=20000, window_seconds=24 * 3600)
+        self.announced_dollies = BoundedDedupe(max_entries=5000, window_seconds=24 * 3600)
         self.callbacks = {
             'new_dolly': [],
+            'new_dolly_batch': [],  # Change feed sayfası (VIN satırları) tek seferde
             'dolly_updated': [],
             'dolly_status_changed': []
         }
         self.check_interval = 2  # Her 2 saniyede kontrol et (performans için optimize edildi)
         self.app = None  # Flask app referansı
         self.audit = AuditService()
-        # Cache management
-        self.max_processed_ids = 1000  # Maksimum cache boyutu (bellekten tasarruf)
-        self.cache_cleanup_counter = 0
-        self.cache_cleanup_interval = 300  # Her 300 sorgudan bir (10 dakika) cache temizle
         
     def start_monitoring(self, app=None):
         """Monitoring'i başlat"""
@@ -80,6 +82,9 @@ class DatabaseMonitor:
                     with self.app.app_context():
                         # DollyEOLInfo tablosunu kontrol et
                         self._check_dolly_eol_info()
+
+                        # Kuyruk snapshot'ının periyodik tam yenilemesi istek yolunda değil burada
+                        self._reload_queue_snapshot()
                         
                         # SQLAlchemy session temizliği - bellek sızıntısını önle
                         db.session.remove()
@@ -91,7 +96,8 @@ class DatabaseMonitor:
                     # App context olmadan çalışma durumu
                     print("⚠️ No app context available for monitoring")
                     
-                time.sleep(self.check_interval)
+                # Birikim varsa (feed yetişemedi) beklemeden sonraki sayfalara geç
+                time.sleep(self.check_interval if eol_change_feed.caught_up else 0.1)
                 
             except Exception as e:
                 if self.app:
@@ -104,67 +110,80 @@ class DatabaseMonitor:
         """DollyEOLInfo tablosundaki yeni kayıtları kontrol et"""
         try:
             table_name = 'DollyEOLInfo'
-            last_check = self.last_check_times.get(table_name)
-            
-            # Periyodik cache temizliği - bellek optimizasyonu
-            self.cache_cleanup_counter += 1
-            if self.cache_cleanup_counter >= self.cache_cleanup_interval:
-                self._cleanup_cache()
-                self.cache_cleanup_counter = 0
-            
-            if last_check is None:
-                # İlk çalıştırma - son 1 dakikayı kontrol et
-                last_check = datetime.now() - timedelta(minutes=1)
-                self.last_check_times[table_name] = last_check
-                
-            # Yeni kayıtları bul
-            new_records = self._get_new_dolly_records(last_check)
-            processed_set = self.last_processed_ids.setdefault(table_name, set())
-            seen_in_cycle: set = set()
-            unique_records = []
-
-            for record in new_records:
-                dolly_no = record.get('DollyNo')
-                if dolly_no in processed_set or dolly_no in seen_in_cycle:
-                    continue
-                seen_in_cycle.add(dolly_no)
-                unique_records.append(record)
-                processed_set.add(dolly_no)
-                
-                # Bellek yönetimi - cache boyutu sınırlama
-                if len(processed_set) > self.max_processed_ids:
-                    # En eski %20'yi temizle (FIFO yaklaşımı)
-                    to_remove = list(processed_set)[:int(self.max_processed_ids * 0.2)]
-                    processed_set.difference_update(to_remove)
             
-            if unique_records:
-                current_app.logger.info(f"🆕 {len(unique_records)} new dolly record(s) found")
-                
-                for record in unique_records:
-                    dolly_no = record.get('DollyNo')
-
-                    # Callback'leri çağır
-                    self._trigger_callbacks('new_dolly', record)
-                    
-                    # Audit log'a kaydet
-                    self.audit.log(
-                        action='NEW_DOLLY_DETECTED',
-                        resource='DollyEOLInfo',
-                        resource_id=str(dolly_no or ''),
-                        actor_name='system',
-                        metadata={
-                            'details': f"New dolly detected: {dolly_no or 'Unknown'}"
-                        }
-                    )
+            if eol_change_feed.is_available():
+                # InsertedAt watermark'ından sonraki VIN'ler batch batch gelir
+                eol_change_feed.poll(self._announce_new_dollies)
+            else:
+                # InsertedAt kolonu olmayan eski şema: EOLDATE taraması
+                last_check = self.last_check_times.get(table_name)
+                if last_check is None:
+                    # İlk çalıştırma - son 1 dakikayı kontrol et
+                    last_check = datetime.now() - timedelta(minutes=1)
+                    self.last_check_times[table_name] = last_check
+                self._announce_new_dollies(self._get_new_dolly_records(last_check))
                     
             # Son kontrol zamanını güncelle
             self.last_check_times[table_name] = datetime.now()
             
         except Exception as e:
             current_app.logger.error(f"Error checking DollyEOLInfo: {e}")
+
+    def _reload_queue_snapshot(self):
+        """Diğer worker'ların kuyruk silmelerini yakalamak için snapshot'ı zamanı geldiyse yeniden oku"""
+        try:
+            queue_snapshot.reload_if_due()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error reloading queue snapshot: {e}")
+
+    def _announce_new_dollies(self, new_records: List[Dict]):
+        """
+        Batch'teki daha önce duyurulmamış dolly'ler için callback + audit.
+        Anahtarlar ancak işlem başarılı olunca kaydedilir: hata alan batch
+        feed tarafından tekrar verildiğinde "görüldü" sayılıp kaybolmaz.
+        """
+        fresh_records = [
+            record for record in new_records
+            if not self.seen_vins.seen((record.get('DollyNo'), record.get('VinNo')))
+        ]
+        # Dolly başına ilk VIN satırı duyurulur
+        first_by_dolly: Dict = {}
+        for record in fresh_records:
+            dolly_no = record.get('DollyNo')
+            if dolly_no not in first_by_dolly and not self.announced_dollies.seen(dolly_no):
+                first_by_dolly[dolly_no] = record
+        unique_records = list(first_by_dolly.values())
+
+        if fresh_records:
+            self._trigger_callbacks('new_dolly_batch', fresh_records)
+        
+        if unique_records:
+            current_app.logger.info(f"🆕 {len(unique_records)} new dolly record(s) found")
+            
+            for record in unique_records:
+                dolly_no = record.get('DollyNo')
+
+                # Callback'leri çağır
+                self._trigger_callbacks('new_dolly', record)
+                
+                # Audit log'a kaydet
+                self.audit.log(
+                    action='NEW_DOLLY_DETECTED',
+                    resource='DollyEOLInfo',
+                    resource_id=str(dolly_no or ''),
+                    actor_name='system',
+                    metadata={
+                        'details': f"New dolly detected: {dolly_no or 'Unknown'}"
+                    }
+                )
+                self.announced_dollies.add(dolly_no)
+
+        for record in fresh_records:
+            self.seen_vins.add((record.get('DollyNo'), record.get('VinNo')))
             
     def _get_new_dolly_records(self, since_datetime: datetime) -> List[Dict]:
-        """Belirli bir tarihten sonraki yeni dolly kayıtlarını getir"""
+        """Belirli bir tarihten sonraki yeni dolly kayıtlarını getir (InsertedAt olmayan şemalar için)"""
         try:
             # DollyEOLInfo tablosundaki gerçek sütun isimleri kullan - Performans için optimize edildi
             query = text("""
@@ -215,29 +234,6 @@ class DatabaseMonitor:
         except Exception as e:
             current_app.logger.error(f"Error triggering callbacks: {e}")
     
-    def _cleanup_cache(self):
-        """Cache temizliği - bellek optimizasyonu"""
-        try:
-            for table_name, processed_set in self.last_processed_ids.items():
-                original_size = len(processed_set)
-                if original_size > self.max_processed_ids:
-                    # Sadece son max_processed_ids/2 kadarını tut
-                    items_to_keep = list(processed_set)[-(self.max_processed_ids // 2):]
-                    processed_set.clear()
-                    processed_set.update(items_to_keep)
-                    
-                    if self.app:
-                        self.app.logger.info(
-                            f"🧹 Cache cleaned for {table_name}: {original_size} -> {len(processed_set)} items"
-                        )
-                    else:
-                        print(f"🧹 Cache cleaned for {table_name}: {original_size} -> {len(processed_set)} items")
-        except Exception as e:
-            if self.app:
-                self.app.logger.error(f"Cache cleanup error: {e}")
-            else:
-                print(f"Cache cleanup error: {e}")
-            
     def get_monitoring_stats(self) -> Dict:
         """Monitoring istatistiklerini getir"""
         return {
@@ -250,6 +246,11 @@ class DatabaseMonitor:
             'registered_callbacks': {
                 event: len(callbacks)
                 for event, callbacks in self.callbacks.items()
+            },
+            'change_feed': eol_change_feed.get_stats(),
+            'dedupe': {
+                'vins': self.seen_vins.get_stats(),
+                'dollies': self.announced_dollies.get_stats()
             }
         }
 
@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from flask import current_app
 import re
 
-from sqlalchemy import asc, desc, func, inspect as sa_inspect, text, case, or_
+from sqlalchemy import and_, asc, desc, func, insert, text, case, or_, update
 
 from ..extensions import db
 from ..models import (
@@ -24,8 +24,117 @@ from ..models import (
     WebOperatorTask,
 )
 from .audit_service import AuditService
+from .barcode_resolver import barcode_resolver
 from .realtime_service import RealtimeService
-from .lifecycle_service import LifecycleService
+from .group_resolver import group_resolver
+from .lifecycle_service import LifecycleService, _chunks
+from .part_number_allocator import part_number_allocator
+from .production_date_cache import production_date_cache
+from .queue_grouping import OTHER_GROUP, compiled_group_matcher, extract_project_name
+from .queue_snapshot import queue_snapshot
+from .queue_stats import queue_stats
+from .scan_sequencer import scan_sequencer
+from .schema_registry import schema_registry
+from .shipment_summary import shipment_summaries
+from .unit_of_work import unit_of_work
+
+# Eski yöntemle bugün verilmiş en büyük PT sayacı (sayaç satırı yoksa / ilk kez oluşturulurken)
+_PT_COUNTER_SEED_SQL = """
+    SELECT ISNULL(MAX(CAST(RIGHT(PartNumber, 4) AS INT)), 0) AS LastCounter
+    FROM DollySubmissionHold
+    WHERE PartNumber LIKE 'PT' + :date + '%'
+"""
+
+# Toplu kuyruk kaldırma: k(DollyNo, VinNo) anahtarları; VinNo NULL ise dolly'nin tüm VIN'leri
+_ARCHIVE_QUEUE_ROWS_SQL = """
+    INSERT INTO DollyQueueRemoved
+        (DollyNo, VinNo, CustomerReferans, Adet, EOLName, EOLID, EOLDATE, EOLDollyBarcode,
+         DollyOrderNo, RECEIPTID, OriginalInsertedAt, RemovedAt, RemovedBy, RemovalReason)
+    OUTPUT inserted.Id, inserted.DollyNo, inserted.VinNo
+    SELECT e.DollyNo, e.VinNo, e.CustomerReferans, e.Adet, e.EOLName, e.EOLID, e.EOLDATE, e.EOLDollyBarcode,
+           e.DollyOrderNo, e.RECEIPTID, e.InsertedAt, :now, :removed_by, :reason
+    FROM DollyEOLInfo e WITH (UPDLOCK, HOLDLOCK)
+    JOIN (VALUES {keys}) AS k(DollyNo, VinNo)
+      ON e.DollyNo = k.DollyNo AND (k.VinNo IS NULL OR e.VinNo = k.VinNo)
+"""
+
+_DELETE_QUEUE_ROWS_SQL = """
+    DELETE e
+    FROM DollyEOLInfo e
+    JOIN (VALUES {keys}) AS k(DollyNo, VinNo)
+      ON e.DollyNo = k.DollyNo AND (k.VinNo IS NULL OR e.VinNo = k.VinNo)
+"""
+
+_RESTORE_QUEUE_ROWS_SQL = """
+    INSERT INTO DollyEOLInfo
+        (DollyNo, VinNo, CustomerReferans, Adet, EOLName, EOLID, EOLDATE, EOLDollyBarcode,
+         DollyOrderNo, RECEIPTID, InsertedAt)
+    OUTPUT inserted.DollyNo, inserted.VinNo, inserted.DollyOrderNo, inserted.CustomerReferans,
+           inserted.Adet, inserted.EOLName, inserted.EOLID, inserted.EOLDATE,
+           inserted.EOLDollyBarcode, inserted.RECEIPTID, inserted.InsertedAt
+    SELECT r.DollyNo, r.VinNo, r.CustomerReferans, r.Adet, r.EOLName, r.EOLID, r.EOLDATE, r.EOLDollyBarcode,
+           r.DollyOrderNo, r.RECEIPTID, :now
+    FROM DollyQueueRemoved r
+    WHERE r.Id IN :archive_ids
+"""
+
+
+# Manuel toplama: önce en çok dolly'si olan `limit` EOL (sayılar tüm kuyruk üzerinden)
+_COLLECTION_TOP_EOLS_SQL = """
+    SELECT TOP (:limit)
+        COALESCE(NULLIF(EOLName, ''), 'Unknown') AS EOLKey,
+        COUNT(DISTINCT DollyNo) AS DollyCount,
+        COUNT(*) AS TotalVINs
+    FROM DollyEOLInfo WITH (NOLOCK)
+    GROUP BY COALESCE(NULLIF(EOLName, ''), 'Unknown')
+    ORDER BY DollyCount DESC, MIN(InsertedAt)
+"""
+
+# ...sonra yalnızca bu EOL'lerin satırları; EOL başına ilk görülme sırasıyla en fazla :per_eol dolly
+_COLLECTION_ROWS_SQL = """
+    WITH src AS (
+        SELECT DollyNo, VinNo, DollyOrderNo, CustomerReferans, EOLName, EOLID, EOLDATE, InsertedAt, Adet,
+               COALESCE(NULLIF(EOLName, ''), 'Unknown') AS EOLKey
+        FROM DollyEOLInfo WITH (NOLOCK)
+    ), firsts AS (
+        SELECT src.*, MIN(InsertedAt) OVER (PARTITION BY EOLKey, DollyNo) AS FirstSeen
+        FROM src
+        WHERE EOLKey IN :eol_keys
+    ), ranked AS (
+        SELECT firsts.*,
+               DENSE_RANK() OVER (
+                   PARTITION BY EOLKey
+                   ORDER BY CASE WHEN FirstSeen IS NULL THEN 1 ELSE 0 END, FirstSeen, DollyNo
+               ) AS DollyRank
+        FROM firsts
+    )
+    SELECT DollyNo, VinNo, DollyOrderNo, CustomerReferans, EOLName, EOLID, EOLDATE, InsertedAt, Adet
+    FROM ranked
+    WHERE :per_eol IS NULL OR DollyRank <= :per_eol
+    ORDER BY CASE WHEN InsertedAt IS NULL THEN 1 ELSE 0 END, InsertedAt
+"""
+
+
+# Session'da aynı dolly'nin aktif hold'ları; kilit eşzamanlı ikinci taramayı commit'e kadar bekletir
+_ACTIVE_SCAN_HOLDS_SQL = """
+    SELECT Id
+    FROM DollySubmissionHold WITH (UPDLOCK, HOLDLOCK)
+    WHERE LoadingSessionId = :session_id
+      AND DollyNo = :dolly_no
+      AND Status = 'scanned'
+    ORDER BY Id
+"""
+
+
+def _queue_key_values(keys: List[Tuple[str, Optional[str]]]) -> Tuple[str, Dict[str, Any]]:
+    """(DollyNo, VinNo) anahtarları için parametrik VALUES listesi"""
+    rows = []
+    params: Dict[str, Any] = {}
+    for index, (dolly_no, vin_no) in enumerate(keys):
+        rows.append(f"(:d{index}, :v{index})")
+        params[f"d{index}"] = dolly_no
+        params[f"v{index}"] = vin_no
+    return ", ".join(rows), params
 
 
 @dataclass
@@ -119,19 +228,14 @@ class DollyService:
     
     def _get_production_date_from_backup(self, dolly_no: str) -> Optional[datetime]:
         """
-        DollyEOLInfoBackup tablosundan üretim tarihini parametrik sorgu ile al.
+        DollyEOLInfoBackup tablosundan üretim tarihi (LRU önbellekli, parametrik sorgu).
         ⚠️ CRITICAL: Sadece parametrik sorgu kullan, sistem yavaşlar!
         """
-        if not dolly_no:
-            return None
-        try:
-            # Parametrik sorgu - sadece bu DollyNo için
-            backup_record = DollyEOLInfoBackup.query.filter_by(DollyNo=dolly_no).first()
-            if backup_record and backup_record.EOLDATE:
-                return backup_record.EOLDATE
-        except Exception as e:
-            current_app.logger.warning(f"⚠️ Backup tablosundan üretim tarihi alınamadı (DollyNo={dolly_no}): {e}")
-        return None
+        return production_date_cache.get_production_date(dolly_no)
+
+    def _get_production_dates_from_backup(self, dolly_nos: List[str]) -> Dict[str, datetime]:
+        """Birden çok DollyNo için üretim tarihleri (önbellekte olmayanlar tek IN sorgusuyla)"""
+        return production_date_cache.get_production_dates(dolly_nos)
         
     def _extract_dolly_number(self, dolly_no: str) -> int:
         """Dolly numarasının sonundaki sayısal kısmı çıkar"""
@@ -173,28 +277,53 @@ class DollyService:
         """Legacy view to keep dashboard compatibility."""
         if self.use_mock_data:
             return self._mock_queue_entries
-        # Dolly No bazlı sıralama - sonundaki rakama göre
-        records = DollyEOLInfo.query.all()
-        records = sorted(records, key=self._dolly_sort_key)
-        entries: List[QueueEntry] = []
-        for record in records:
-            self.lifecycle.ensure_received(record)
-            entries.append(self._to_queue_entry(record))
-        return entries
+        # Dolly No bazlı sıralama - sonundaki rakama göre (snapshot sıralı tutar)
+        self._refresh_queue_snapshot()
+        return self._to_queue_entries(queue_snapshot.all_sorted())
+
+    def list_groups_page(
+        self, limit: int, cursor: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[QueueEntry], Optional[Dict[str, Any]]]:
+        """Keyset sayfalı kuyruk listesi (list_groups ile aynı sıra). (entries, next_cursor) döner."""
+        after = None
+        if cursor:
+            try:
+                after = (int(cursor["n"]), str(cursor["d"]), str(cursor["v"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Invalid cursor for queue listing")
+
+        if self.use_mock_data:
+            return self._mock_queue_entries[:limit], None
+
+        self._refresh_queue_snapshot()
+        rows, has_more = queue_snapshot.page(after, limit)
+        next_cursor = None
+        if has_more and rows:
+            number, dolly_no, vin_no = queue_snapshot.sort_key(rows[-1])
+            next_cursor = {"n": number, "d": dolly_no, "v": vin_no}
+        return self._to_queue_entries(rows), next_cursor
+
+    def _refresh_queue_snapshot(self) -> None:
+        """Snapshot'ı artımlı yenile (yeni satırların EOL_READY kaydı snapshot işleyicisinde)"""
+        queue_snapshot.refresh()
 
     def group_by_vin(self, vin_no: str) -> Optional[QueueEntry]:
-        for group in self.list_groups():
-            if group.vin_no == vin_no:
-                return group
-        return None
+        if self.use_mock_data:
+            return next((group for group in self._mock_queue_entries if group.vin_no == vin_no), None)
+        self._refresh_queue_snapshot()
+        record = queue_snapshot.by_vin(vin_no)
+        return self._to_queue_entry(record) if record else None
+
+    def _group_by_dolly(self, dolly_no: str) -> Optional[QueueEntry]:
+        if self.use_mock_data:
+            return next((group for group in self._mock_queue_entries if group.dolly_no == dolly_no), None)
+        self._refresh_queue_snapshot()
+        records = queue_snapshot.by_dolly(dolly_no)
+        return self._to_queue_entry(records[0]) if records else None
 
     def acknowledge_group(self, dolly_no: str, terminal_user: str) -> bool:
         """Marks a dolly as processed and logs it to SeferDollyEOL."""
-        group = None
-        for candidate in self.list_groups():
-            if candidate.dolly_no == dolly_no:
-                group = candidate
-                break
+        group = self._group_by_dolly(dolly_no)
         if not group:
             return False
 
@@ -259,6 +388,7 @@ class DollyService:
             hold_record.Status = "completed"
             hold_record.UpdatedAt = datetime.utcnow()
             db.session.commit()
+            shipment_summaries.invalidate()
         self.audit.log(
             action="dolly.completed",
             resource="dolly",
@@ -311,7 +441,47 @@ class DollyService:
         if status:
             query = query.filter_by(Status=status)
         records = query.order_by(desc(DollySubmissionHold.CreatedAt)).all()
-        return [self._to_hold_entry(record) for record in records]
+        return self._to_hold_entries(records)
+
+    def list_hold_entries_page(
+        self, limit: int, cursor: Optional[Dict[str, Any]] = None, status: Optional[str] = None
+    ) -> Tuple[List[HoldEntry], Optional[Dict[str, Any]]]:
+        """Keyset sayfalı hold listesi: CreatedAt DESC, Id DESC. (entries, next_cursor) döner."""
+        if self.use_mock_data:
+            return self.list_hold_entries(status=status)[:limit], None
+
+        query = DollySubmissionHold.query
+        if status:
+            query = query.filter_by(Status=status)
+        query = self._apply_keyset(query, DollySubmissionHold, cursor)
+        records = query.order_by(desc(DollySubmissionHold.CreatedAt), desc(DollySubmissionHold.Id)).limit(limit + 1).all()
+        return self._to_hold_entries(records[:limit]), self._next_keyset_cursor(records, limit)
+
+    @staticmethod
+    def _apply_keyset(query, model, cursor: Optional[Dict[str, Any]]):
+        """(CreatedAt, Id) DESC sıralaması için 'cursor'dan sonraki kayıtlar"""
+        if not cursor:
+            return query
+        from ..utils.pagination import cursor_datetime
+
+        created_at = cursor_datetime(cursor, "createdAt")
+        try:
+            last_id = int(cursor["id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor: 'id' missing or malformed")
+        return query.filter(
+            or_(
+                model.CreatedAt < created_at,
+                and_(model.CreatedAt == created_at, model.Id < last_id),
+            )
+        )
+
+    @staticmethod
+    def _next_keyset_cursor(records: list, limit: int) -> Optional[Dict[str, Any]]:
+        if len(records) <= limit:
+            return None
+        last = records[limit - 1]
+        return {"createdAt": last.CreatedAt, "id": last.Id}
 
     def enqueue_hold_entry(
         self,
@@ -444,6 +614,7 @@ class DollyService:
             
             self._update_group_eols(group.Id, enriched_rows)
             db.session.commit()
+            group_resolver.bump()
             
             definition = self.list_group_definition_by_id(group.Id)
             self.audit.log(
@@ -532,6 +703,7 @@ class DollyService:
             
             self._update_group_eols(group_id, enriched_rows)
             db.session.commit()
+            group_resolver.bump()
             
             definition = self.list_group_definition_by_id(group_id)
             self.audit.log(
@@ -573,6 +745,7 @@ class DollyService:
             # Delete the group
             db.session.delete(group)
             db.session.commit()
+            group_resolver.bump()
 
             self.audit.log(
                 action="group.delete",
@@ -728,9 +901,10 @@ class DollyService:
         if limit:
             query = query.limit(limit)
         rows = query.all()
+        statuses = self.lifecycle.latest_statuses(row.DollyNo for row in rows)
         entries: List[QueueEntry] = []
         for row in rows:
-            entry = self._to_queue_entry(row)
+            entry = self._to_queue_entry(row, statuses)
             entry.metadata["shippingTag"] = self._shipping_tag_for_eol(row.EOLName)
             entries.append(entry)
         return entries
@@ -806,10 +980,18 @@ class DollyService:
         db.session.flush()  # Ekleme işlemini hemen uygula
 
     def _dolly_group_tables_available(self) -> bool:
-        return self._table_exists("DollyGroup") and self._table_exists("DollyGroupEOL")
+        return schema_registry.has_feature("dolly_groups")
+
+    def _to_queue_entries(self, records) -> List[QueueEntry]:
+        """Kayıt listesini durumları tek sorguda çözerek QueueEntry'ye çevir"""
+        statuses = self.lifecycle.latest_statuses(record.DollyNo for record in records)
+        return [self._to_queue_entry(record, statuses) for record in records]
 
-    def _to_queue_entry(self, record: DollyEOLInfo) -> QueueEntry:
-        status = self.lifecycle.latest_status(record.DollyNo) or "waiting"
+    def _to_queue_entry(self, record: DollyEOLInfo, statuses: Optional[Dict[str, str]] = None) -> QueueEntry:
+        if statuses is None:
+            status = self.lifecycle.latest_status(record.DollyNo) or "waiting"
+        else:
+            status = statuses.get(record.DollyNo) or "waiting"
         metadata: Dict[str, str] = {}
         if record.EOLDollyBarcode:
             metadata["barcode"] = record.EOLDollyBarcode
@@ -826,46 +1008,14 @@ class DollyService:
             metadata=metadata,
         )
 
-    def _to_hold_entry(self, record: DollySubmissionHold) -> HoldEntry:
-        payload: Dict[str, Any] = {}
-        if record.Payload:
-            try:
-                payload = json.loads(record.Payload)
-            except json.JSONDecodeError:
-                payload = {"raw": record.Payload}
-        barcode = payload.get("barcode") if isinstance(payload, dict) else None
-        
-        # Get DollyEOLInfo data for this dolly
-        dolly_info = db.session.query(DollyEOLInfo).filter_by(DollyNo=record.DollyNo).first()
-        
-        return HoldEntry(
-            id=record.Id,
-            dolly_no=record.DollyNo,
-            vin_no=record.VinNo,
-            status=record.Status,
-            terminal_user=record.TerminalUser,
-            dolly_order_no=record.DollyOrderNo,  # ÇOK ÖNEMLİ: CEVA'ya gönderilecek!
-            scan_order=record.ScanOrder,  # Okutma sırası
-            scanned_at=record.CreatedAt,
-            submitted_at=record.SubmittedAt,
-            payload=payload,
-            barcode=barcode,
-            # DollyEOLInfo fields
-            customer_referans=dolly_info.CustomerReferans if dolly_info else None,
-            adet=dolly_info.Adet if dolly_info else None,
-            eol_name=dolly_info.EOLName if dolly_info else None,
-            eol_id=dolly_info.EOLID if dolly_info else None,
-            eol_date=dolly_info.EOLDATE if dolly_info else None,
-            eol_dolly_barcode=dolly_info.EOLDollyBarcode if dolly_info else None
-        )
-
     def _shipping_tag_for_eol(self, eol_name: str) -> str:
-        definitions = self.list_group_definitions()
-        for definition in definitions:
-            for eol in definition.eols:
-                if eol.name == eol_name:
-                    return eol.shipping_tag or "both"
-        return "both"
+        if self.use_mock_data:
+            for definition in self.list_group_definitions():
+                for eol in definition.eols:
+                    if eol.name == eol_name:
+                        return eol.shipping_tag or "both"
+            return "both"
+        return group_resolver.shipping_tag(eol_name)
 
     def _final_status_for_tag(self, tag: str) -> str:
         tag = (tag or "both").lower()
@@ -883,7 +1033,7 @@ class DollyService:
             return None
         if not barcode:
             return None
-        record = DollyEOLInfo.query.filter_by(EOLDollyBarcode=barcode).first()
+        record = barcode_resolver.resolve(barcode)
         if not record:
             return None
         self.lifecycle.ensure_received(record)
@@ -935,20 +1085,31 @@ class DollyService:
 
     def _generate_part_number(self) -> str:
         """Generate unique part number for web operator tasks."""
-        today = datetime.utcnow().strftime("%Y%m%d")
-        
-        # Get highest counter for today
-        existing = db.session.execute(
-            db.text("""
-                SELECT ISNULL(MAX(CAST(RIGHT(PartNumber, 4) AS INT)), 0) + 1 as NextCounter
-                FROM DollySubmissionHold
-                WHERE PartNumber LIKE 'PT' + :date + '%'
-            """),
-            {"date": today}
-        ).fetchone()
-        
-        counter = existing[0] if existing else 1
+        now = datetime.utcnow()
+        today = now.strftime("%Y%m%d")
+        
+        # PartNumberCounter varsa blok rezervasyonlu sayaç; ilk gün satırı eski numaralardan devam eder
+        counter = self._next_part_counter("PT", now.date(), seed_sql=_PT_COUNTER_SEED_SQL, seed_params={"date": today})
+        if counter is None:
+            # Get highest counter for today
+            existing = db.session.execute(
+                db.text(_PT_COUNTER_SEED_SQL),
+                {"date": today}
+            ).fetchone()
+            counter = (existing[0] or 0) + 1 if existing else 1
         return f"PT{today}{counter:04d}"
+
+    def _next_part_counter(
+        self,
+        series: str,
+        day: date,
+        seed_sql: Optional[str] = None,
+        seed_params: Optional[dict] = None,
+    ) -> Optional[int]:
+        """Seri + gün bazlı çakışmasız sayaç (migration 027 yoksa None)"""
+        if not schema_registry.has_feature("part_number_counter"):
+            return None
+        return part_number_allocator.allocate(series, day, seed_sql=seed_sql, seed_params=seed_params)
     
     def _get_eol_shipping_tags(self) -> Dict[str, str]:
         """Get shipping tags for all EOLs from DollyGroupEOL.
@@ -957,17 +1118,7 @@ class DollyService:
             Dict mapping EOL name to shipping tag (asn, irsaliye, or both)
         """
         try:
-            if not self._dolly_group_tables_available():
-                return {}
-            
-            results = db.session.query(
-                PWorkStation.PWorkStationName,
-                DollyGroupEOL.ShippingTag
-            ).join(
-                DollyGroupEOL, PWorkStation.Id == DollyGroupEOL.PWorkStationId
-            ).all()
-            
-            return {row[0]: row[1] for row in results}
+            return group_resolver.shipping_tags_by_eol()
         except Exception as e:
             current_app.logger.error(f"Error getting EOL shipping tags: {e}")
             return {}
@@ -1001,17 +1152,39 @@ class DollyService:
             query = query.filter_by(Status=status)
         
         tasks = query.order_by(desc(WebOperatorTask.CreatedAt)).all()
+        hold_entries = self.list_hold_entries_by_part_numbers([task.PartNumber for task in tasks])
         entries = []
         
         for task in tasks:
             task_entry = self._to_web_operator_task_entry(task)
-            # Load hold entries for this task
-            hold_entries = self.list_hold_entries_by_part_number(task.PartNumber)
-            task_entry.hold_entries = hold_entries
+            task_entry.hold_entries = hold_entries.get(task.PartNumber, [])
             entries.append(task_entry)
             
         return entries
 
+    def list_web_operator_tasks_page(
+        self,
+        limit: int,
+        cursor: Optional[Dict[str, Any]] = None,
+        status: Optional[str] = None,
+        include_holds: bool = True,
+    ) -> Tuple[List[WebOperatorTaskEntry], Optional[Dict[str, Any]]]:
+        """Keyset sayfalı görev listesi: CreatedAt DESC, Id DESC. (entries, next_cursor) döner."""
+        query = WebOperatorTask.query
+        if status:
+            query = query.filter_by(Status=status)
+        query = self._apply_keyset(query, WebOperatorTask, cursor)
+        tasks = query.order_by(desc(WebOperatorTask.CreatedAt), desc(WebOperatorTask.Id)).limit(limit + 1).all()
+        page = tasks[:limit]
+
+        hold_entries = self.list_hold_entries_by_part_numbers([task.PartNumber for task in page]) if include_holds else {}
+        entries = []
+        for task in page:
+            task_entry = self._to_web_operator_task_entry(task)
+            task_entry.hold_entries = hold_entries.get(task.PartNumber, [])
+            entries.append(task_entry)
+        return entries, self._next_keyset_cursor(tasks, limit)
+
     def get_web_operator_task(self, part_number: str) -> Optional[WebOperatorTaskEntry]:
         """Get specific web operator task with its hold entries."""
         task = WebOperatorTask.query.filter_by(PartNumber=part_number).first()
@@ -1028,7 +1201,24 @@ class DollyService:
             DollySubmissionHold.DollyNo.asc(),
             desc(DollySubmissionHold.CreatedAt)
         ).all()
-        return [self._to_hold_entry(hold) for hold in holds]
+        return self._to_hold_entries(holds)
+
+    def list_hold_entries_by_part_numbers(self, part_numbers: List[str]) -> Dict[str, List[HoldEntry]]:
+        """Birden fazla part number için hold entry'leri tek seferde getir (PartNumber -> entries)."""
+        unique = sorted({part_number for part_number in part_numbers if part_number})
+        holds: List[DollySubmissionHold] = []
+        for chunk in _chunks(unique):
+            holds.extend(
+                DollySubmissionHold.query.filter(DollySubmissionHold.PartNumber.in_(chunk)).order_by(
+                    DollySubmissionHold.DollyNo.asc(),
+                    desc(DollySubmissionHold.CreatedAt)
+                ).all()
+            )
+
+        grouped: Dict[str, List[HoldEntry]] = {part_number: [] for part_number in unique}
+        for hold, entry in zip(holds, self._to_hold_entries(holds)):
+            grouped[hold.PartNumber].append(entry)
+        return grouped
 
     @staticmethod
     def _normalize_identifier(value: Optional[str]) -> str:
@@ -1259,6 +1449,7 @@ class DollyService:
             task.UpdatedAt = datetime.utcnow()
             
         db.session.commit()
+        shipment_summaries.invalidate()
         
         # Audit log - safe fallback for missing audit service
         try:
@@ -1286,6 +1477,8 @@ class DollyService:
             PartNumber=part_number
         ).filter(DollySubmissionHold.Status != "removed").all()
         
+        production_dates = self._get_production_dates_from_backup([hold.DollyNo for hold in holds])
+
         # Create sefer records
         for hold in holds:
             payload = {}
@@ -1296,7 +1489,7 @@ class DollyService:
                     payload = {}
 
             # 📅 Üretim tarihini backup tablosundan al
-            production_date = self._get_production_date_from_backup(hold.DollyNo)
+            production_date = production_dates.get(hold.DollyNo)
 
             sefer = SeferDollyEOL(
                 SeferNumarasi=payload.get("sefer_no"),
@@ -1332,6 +1525,7 @@ class DollyService:
         task.UpdatedAt = datetime.utcnow()
         
         db.session.commit()
+        shipment_summaries.invalidate()
         
         self.audit.log(
             action=f"task.submitted_{tag_type}",
@@ -1367,7 +1561,35 @@ class DollyService:
             hold_entries=[]
         )
 
-    def _to_hold_entry(self, hold: DollySubmissionHold) -> HoldEntry:
+    def _eol_info_for_holds(self, holds: List[DollySubmissionHold]) -> Dict[Tuple[str, str], DollyEOLInfo]:
+        """Hold kayıtlarının DollyEOLInfo satırlarını tek IN sorgusuyla getir ((DollyNo, VinNo) -> kayıt)."""
+        dolly_nos = sorted({hold.DollyNo for hold in holds if hold.DollyNo})
+        lookup: Dict[Tuple[str, str], DollyEOLInfo] = {}
+        for chunk in _chunks(dolly_nos):
+            for record in DollyEOLInfo.query.filter(DollyEOLInfo.DollyNo.in_(chunk)).all():
+                lookup[(record.DollyNo, record.VinNo)] = record
+        return lookup
+
+    @staticmethod
+    def _first_eol_info_by_dolly(lookup: Dict[Tuple[str, str], DollyEOLInfo]) -> Dict[str, DollyEOLInfo]:
+        """DollyNo -> ilk VIN kaydı (dolly seviyesinde müşteri / EOL bilgisi için)"""
+        by_dolly: Dict[str, DollyEOLInfo] = {}
+        for (dolly_no, vin_no), record in sorted(lookup.items()):
+            by_dolly.setdefault(dolly_no, record)
+        return by_dolly
+
+    def _to_hold_entries(self, holds: List[DollySubmissionHold]) -> List[HoldEntry]:
+        """Toplu dönüşüm: DollyEOLInfo her hold için ayrı ayrı değil, bir kez sorgulanır."""
+        if not holds:
+            return []
+        eol_lookup = self._eol_info_for_holds(holds)
+        return [self._to_hold_entry(hold, eol_lookup) for hold in holds]
+
+    def _to_hold_entry(
+        self,
+        hold: DollySubmissionHold,
+        eol_lookup: Optional[Dict[Tuple[str, str], DollyEOLInfo]] = None,
+    ) -> HoldEntry:
         """Convert DollySubmissionHold model to HoldEntry dataclass."""
         payload = {}
         if hold.Payload:
@@ -1385,10 +1607,13 @@ class DollyService:
                     customer_hint = details.get("customer_ref")
 
         # Get DollyEOLInfo data for this specific VIN
-        dolly_record = db.session.query(DollyEOLInfo).filter(
-            DollyEOLInfo.DollyNo == hold.DollyNo,
-            DollyEOLInfo.VinNo == hold.VinNo
-        ).first()
+        if eol_lookup is not None:
+            dolly_record = eol_lookup.get((hold.DollyNo, hold.VinNo))
+        else:
+            dolly_record = db.session.query(DollyEOLInfo).filter(
+                DollyEOLInfo.DollyNo == hold.DollyNo,
+                DollyEOLInfo.VinNo == hold.VinNo
+            ).first()
 
         # For breakdown, only show THIS VIN's data (not all VINs of the dolly)
         breakdown = []
@@ -1429,60 +1654,20 @@ class DollyService:
     def list_queue_dollys_grouped(self, per_group: int = 50) -> Dict[str, List[QueueEntry]]:
         """Get queue dollys grouped by active EOL groups (dynamic)"""
         try:
-            # Get active EOL groups
-            active_groups = db.session.query(
-                DollyGroup.Id,
-                DollyGroup.GroupName,
-                DollyGroupEOL.PWorkStationId
-            ).join(
-                DollyGroupEOL, DollyGroup.Id == DollyGroupEOL.GroupId
-            ).filter(
-                DollyGroup.IsActive == True
-            ).all()
+            # Grup tanımı versiyonu başına bir kez derlenen eşleyici
+            matcher = compiled_group_matcher()
 
             # Get all queue dollys
             all_dollys = self.list_groups()
             
-            # Create dynamic groups
-            grouped = {}
-            station_to_group = {}
-            
-            # Build station-to-group mapping
-            for group_info in active_groups:
-                group_name = group_info.GroupName
-                station_id = group_info.PWorkStationId
-                station_to_group[station_id] = group_name
-                if group_name not in grouped:
-                    grouped[group_name] = []
-            
-            # Add "Diğer" group for unmapped stations
-            if "Diğer" not in grouped:
-                grouped["Diğer"] = []
+            # Create dynamic groups (aktif gruplar + "Diğer")
+            grouped = {group_name: [] for group_name in matcher.group_names}
+            grouped.setdefault(OTHER_GROUP, [])
             
-            # Group dollys based on their EOL name/ID
+            # Tek geçiş: istasyon -> grup adı -> proje kuralları
             for dolly in all_dollys:
-                # Try to find matching group by EOL name
-                group_name = "Diğer"
-                
-                # Check if dolly's EOL matches any group's stations
-                if hasattr(dolly, 'eol_name') and dolly.eol_name:
-                    for group_info in active_groups:
-                        # Simple name matching - can be improved
-                        if group_info.GroupName in dolly.eol_name or dolly.eol_name in group_info.GroupName:
-                            group_name = group_info.GroupName
-                            break
-                
-                # If no match found, use project name grouping
-                if group_name == "Diğer":
-                    project = self._extract_project_name(
-                        getattr(dolly, 'eol_name', ''),
-                        getattr(dolly, 'customer_ref', '')
-                    )
-                    group_name = project
-                    if group_name not in grouped:
-                        grouped[group_name] = []
-                
-                grouped[group_name].append(dolly)
+                group_name = matcher.group_for(dolly.eol_id, dolly.eol_name, dolly.customer_ref)
+                grouped.setdefault(group_name, []).append(dolly)
             
             # Sort each group by dolly number (numeric part at end)
             for project in grouped:
@@ -1519,6 +1704,7 @@ class DollyService:
         )
         db.session.add(new_dolly)
         db.session.commit()
+        queue_snapshot.upsert(new_dolly)
         
         # Log lifecycle
         self.lifecycle.ensure_received(new_dolly)
@@ -1570,36 +1756,14 @@ class DollyService:
                 "shipping_tag": "both",
             }
 
-        # Normalize id to int when possible (database column is integer)
-        normalized_eol_id: Optional[int]
-        try:
-            normalized_eol_id = int(eol_id)
-        except (TypeError, ValueError):
-            normalized_eol_id = None
-
-        query = db.session.query(
-            DollyGroup.Id.label("group_id"),
-            DollyGroup.GroupName.label("group_name"),
-            DollyGroupEOL.ShippingTag.label("shipping_tag"),
-        ).join(
-            DollyGroupEOL, DollyGroup.Id == DollyGroupEOL.GroupId
-        ).filter(
-            DollyGroup.IsActive == True
-        )
-
-        if normalized_eol_id is not None:
-            query = query.filter(DollyGroupEOL.PWorkStationId == normalized_eol_id)
-        else:
-            # If we cannot normalize the id, force empty set so default values kick in
-            query = query.filter(text("1=0"))
-
-        group_query = query.first()
+        # Id int'e çevrilemezse resolver boş döner ve varsayılan değerler kullanılır
+        link = next((link for link in group_resolver.links_for_workstation(eol_id) if link.is_active), None)
 
-        if group_query:
+        if link:
             return {
-                "group_id": group_query.group_id,
-                "group_name": group_query.group_name,
-                "shipping_tag": group_query.shipping_tag or "both",
+                "group_id": link.group_id,
+                "group_name": link.group_name,
+                "shipping_tag": link.shipping_tag or "both",
             }
 
         return {
@@ -1662,7 +1826,9 @@ class DollyService:
             raise ValueError("Grup bulunamadı")
             
         # Generate unique manual part number
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        now = datetime.now()
+        counter = self._next_part_counter("MANUAL", now.date())
+        timestamp = f"{now:%Y%m%d}{counter:04d}" if counter else now.strftime('%Y%m%d%H%M%S')
         part_number = f"MANUAL_{group.Name}_{timestamp}_{actor_name}"
         
         # Create web operator task
@@ -1758,6 +1924,10 @@ class DollyService:
 
     def get_queue_stats(self) -> Dict[str, Any]:
         """Get queue statistics for dashboard - DOLLY BAZLI SAYIM"""
+        if not self.use_mock_data:
+            # Tek gruplu SQL sorgusu + kısa TTL önbellek (queue_stats)
+            return queue_stats.get()
+
         grouped_dollys = self.list_queue_dollys_grouped()
         
         # Unique dolly numbersını say (VIN bazlı değil)
@@ -1796,31 +1966,7 @@ class DollyService:
 
     def _extract_project_name(self, eol_name: str, customer_ref: str) -> str:
         """Extract project name from EOL name or customer reference"""
-        # Try to extract from EOL name first (V710MR-EOL -> V710MR)
-        if eol_name:
-            if "V710" in eol_name.upper():
-                if "MR" in eol_name.upper():
-                    return "V710MR"
-                elif "LLS" in eol_name.upper():
-                    return "V710LLS"
-                else:
-                    return "V710"
-            elif "J74" in eol_name.upper():
-                return "J74"
-            elif "C5" in eol_name.upper():
-                return "C5"
-        
-        # Try customer reference
-        if customer_ref:
-            customer_upper = customer_ref.upper()
-            if "V710" in customer_upper:
-                return "V710MR" if "MR" in customer_upper else "V710"
-            elif "J74" in customer_upper:
-                return "J74"
-            elif "C5" in customer_upper:
-                return "C5"
-        
-        return "OTHER"
+        return extract_project_name(eol_name, customer_ref)
 
     def get_active_groups(self):
         """Get list of active EOL groups"""
@@ -1844,28 +1990,33 @@ class DollyService:
         try:
             from collections import defaultdict
             
-            # Get all DollyNo+VinNo combinations that are already in submission hold
-            submitted_pairs = db.session.query(
-                DollySubmissionHold.DollyNo,
-                DollySubmissionHold.VinNo
-            ).filter(
-                DollySubmissionHold.Status.in_(['completed', 'pending', 'holding'])
-            ).all()
-            
-            # Create set of (DollyNo, VinNo) tuples for quick lookup
-            submitted_set = {(pair.DollyNo, pair.VinNo) for pair in submitted_pairs}
-            
-            # Get all dollys from DollyEOLInfo, ordered by DollyNo
-            all_dollys = db.session.query(DollyEOLInfo).order_by(
-                DollyEOLInfo.DollyNo.asc(),
-                DollyEOLInfo.VinNo.asc()
-            ).all()
-            
-            # Filter out already submitted VINs
-            available_dollys = [
-                dolly for dolly in all_dollys 
-                if (dolly.DollyNo, dolly.VinNo) not in submitted_set
-            ]
+            # Submit edilmiş (DollyNo, VinNo) çiftleri NOT EXISTS ile SQL'de elenir;
+            # limit, DENSE_RANK ile ilk `limit` farklı DollyNo'ya uygulanır
+            columns = ", ".join(f"e.{column.name}" for column in DollyEOLInfo.__table__.columns)
+            statement = db.text(
+                f"""
+                SELECT ranked.*
+                FROM (
+                    SELECT {columns},
+                           DENSE_RANK() OVER (ORDER BY e.DollyNo) AS DollyRank
+                    FROM DollyEOLInfo e WITH (NOLOCK)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM DollySubmissionHold h WITH (NOLOCK)
+                        WHERE h.DollyNo = e.DollyNo
+                          AND h.VinNo = e.VinNo
+                          AND h.Status IN :statuses
+                    )
+                ) ranked
+                WHERE ranked.DollyRank <= :limit
+                ORDER BY ranked.DollyNo ASC, ranked.VinNo ASC
+                """
+            ).bindparams(db.bindparam("statuses", expanding=True))
+            available_dollys = (
+                db.session.query(DollyEOLInfo)
+                .from_statement(statement)
+                .params(statuses=['completed', 'pending', 'holding'], limit=limit)
+                .all()
+            )
             
             # Group by DollyNo
             grouped = defaultdict(list)
@@ -1874,7 +2025,7 @@ class DollyService:
             
             # Convert to list - only include dollys that have ALL their VINs available
             result = []
-            for dolly_no, vins in sorted(grouped.items())[:limit]:
+            for dolly_no, vins in grouped.items():
                 # Use first VIN's data as representative
                 first = vins[0]
                 result.append({
@@ -1889,7 +2040,7 @@ class DollyService:
                     'AllVinData': vins
                 })
             
-            current_app.logger.info(f"✅ Found {len(result)} available dollys (grouped) for manual collection (filtered from {len(all_dollys)} total VINs)")
+            current_app.logger.info(f"✅ Found {len(result)} available dollys (grouped) for manual collection ({len(available_dollys)} VINs)")
             if len(result) > 0:
                 current_app.logger.info(f"📦 First available: {result[0]['DollyNo']}, Last: {result[-1]['DollyNo']}")
             return result
@@ -1900,89 +2051,47 @@ class DollyService:
             current_app.logger.error(traceback.format_exc())
             return []
 
-    def get_dollys_by_eol_for_collection(self, limit: int = 100):
+    def get_dollys_by_eol_for_collection(self, limit: int = 100, per_eol: Optional[int] = 200):
         """Get available dollys grouped by EOL, ordered by insertion time
         
         NOTE: Submit edilen dolly'ler DollyEOLInfo'dan silindiği için
         burada sadece mevcut kayıtları çekmek yeterli. Ek filtrelemeye gerek yok.
+
+        En çok dolly'si olan `limit` EOL önce GROUP BY ile seçilir; yalnızca bu
+        EOL'lerin satırları akış halinde okunur. Her EOL için en fazla `per_eol`
+        dolly detayı gelir (None = hepsi), DollyCount / TotalVINs yine tüm kuyruğu sayar.
         """
         try:
-            from collections import defaultdict
-            
-            # Get ALL dollys from DollyEOLInfo - ORDER BY InsertedAt (kayıt atılma sırası)
-            # Submit edilenler zaten silinmiş olduğu için burada sadece available olanlar var
-            available_dollys = db.session.query(DollyEOLInfo).order_by(
-                db.case((DollyEOLInfo.InsertedAt == None, 1), else_=0),
-                DollyEOLInfo.InsertedAt.asc()
-            ).all()
-            
-            # Group by EOLName first, then by DollyNo within each EOL
-            # Track insertion order globally for all dollys
-            eol_groups = defaultdict(lambda: defaultdict(list))
-            global_dolly_order = {}  # Track first occurrence of each DollyNo globally
-            eol_first_occurrence = {}  # Track first occurrence of each EOL
-            
-            for idx, dolly in enumerate(available_dollys):
-                eol_name = dolly.EOLName or 'Unknown'
-                dolly_no = dolly.DollyNo
-                
-                # Track first occurrence of EOL
-                if eol_name not in eol_first_occurrence:
-                    eol_first_occurrence[eol_name] = idx
-                
-                # Track first occurrence of DollyNo globally (across all EOLs)
-                if dolly_no not in global_dolly_order:
-                    global_dolly_order[dolly_no] = idx
-                
-                eol_groups[eol_name][dolly_no].append(dolly)
-            
-            # Build result structure: EOL -> Dollys (preserve insert order)
+            top_eols = db.session.execute(text(_COLLECTION_TOP_EOLS_SQL), {"limit": limit}).fetchall()
+            if not top_eols:
+                current_app.logger.info("✅ Found 0 EOLs with dollys for manual collection")
+                return []
+
+            buckets = {
+                bucket['EOLName']: bucket
+                for bucket in self._bucket_collection_rows(
+                    self._iter_collection_rows([row.EOLKey for row in top_eols], per_eol), per_eol
+                )
+            }
+
+            # GROUP BY sırası: DollyCount descending (en çok dolly olan EOL üstte)
             result = []
-            
-            # Sort EOLs by first occurrence
-            for eol_name in sorted(eol_first_occurrence.keys(), key=lambda x: eol_first_occurrence[x]):
-                dolly_dict = eol_groups[eol_name]
-                dollys_in_eol = []
-                
-                # Sort dollys by GLOBAL first occurrence order (not within EOL)
-                for dolly_no in sorted(dolly_dict.keys(), key=lambda x: global_dolly_order[x]):
-                    vins = dolly_dict[dolly_no]
-                    # VINs in insert order (no sorting)
-                    first_vin = vins[0]
-                    vin_list = [v.VinNo for v in vins]
-                    
-                    # Debug log
-                    if len(vins) > 1:
-                        current_app.logger.info(f"📦 Dolly {dolly_no}: {len(vins)} VINs = {vin_list}")
-                    
-                    dollys_in_eol.append({
-                        'DollyNo': dolly_no,
-                        'DollyOrderNo': first_vin.DollyOrderNo,
-                        'VinCount': len(vins),
-                        'Vins': vin_list,  # Insert order preserved
-                        'CustomerReferans': first_vin.CustomerReferans,
-                        'EOLID': first_vin.EOLID,
-                        'EOLDATE': first_vin.EOLDATE,
-                        'InsertedAt': first_vin.InsertedAt,
-                        'Adet': first_vin.Adet,
-                    })
-                
-                result.append({
-                    'EOLName': eol_name,
-                    'EOLID': dollys_in_eol[0]['EOLID'] if dollys_in_eol else None,
-                    'DollyCount': len(dollys_in_eol),
-                    'TotalVINs': sum(d['VinCount'] for d in dollys_in_eol),
-                    'Dollys': dollys_in_eol
-                })
-            
-            # Sort by DollyCount descending (en çok dolly olan üstte)
-            result.sort(key=lambda x: x['DollyCount'], reverse=True)
-            
-            current_app.logger.info(f"✅ Found {len(result)} EOLs with dollys for manual collection")
-            for eol in result:
-                current_app.logger.info(f"  📦 {eol['EOLName']}: {eol['DollyCount']} dollys, {eol['TotalVINs']} VINs")
-            
-            return result[:limit]
+            for row in top_eols:
+                bucket = buckets.get(row.EOLKey)
+                if bucket is None:
+                    continue
+                bucket['DollyCount'] = row.DollyCount
+                bucket['TotalVINs'] = row.TotalVINs
+                result.append(bucket)
+
+            total_dollys = sum(eol['DollyCount'] for eol in result)
+            total_vins = sum(eol['TotalVINs'] for eol in result)
+            multi_vin = sum(1 for eol in result for dolly in eol['Dollys'] if dolly['VinCount'] > 1)
+            current_app.logger.info(
+                f"✅ Found {len(result)} EOLs with dollys for manual collection "
+                f"({total_dollys} dollys, {total_vins} VINs, {multi_vin} multi-VIN dollys)"
+            )
+            return result
             
         except Exception as e:
             current_app.logger.error(f"Get dollys by EOL error: {e}")
@@ -1990,6 +2099,73 @@ class DollyService:
             current_app.logger.error(traceback.format_exc())
             return []
 
+    def _iter_collection_rows(self, eol_keys: List[str], per_eol: Optional[int], batch_size: int = 1000):
+        """Seçilen EOL'lerin DollyEOLInfo satırlarını InsertedAt sırasıyla, sunucu tarafı cursor ile akıt"""
+        # Submit edilenler zaten silinmiş olduğu için burada sadece available olanlar var
+        result = db.session.execute(
+            text(_COLLECTION_ROWS_SQL).bindparams(db.bindparam("eol_keys", expanding=True)),
+            {"eol_keys": eol_keys, "per_eol": per_eol},
+            execution_options={"yield_per": batch_size},
+        )
+        yield from result
+
+    @staticmethod
+    def _bucket_collection_rows(rows, per_eol: Optional[int]) -> List[Dict[str, Any]]:
+        """Akan satırları EOL kovalarına dağıt (EOL ilk görülme sırası korunur)"""
+        buckets: Dict[str, Dict[str, Any]] = {}
+        dolly_entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        global_dolly_order: Dict[str, int] = {}  # Track first occurrence of each DollyNo globally
+        counted: Dict[str, set] = {}
+
+        for idx, row in enumerate(rows):
+            eol_name = row.EOLName or 'Unknown'
+            dolly_no = row.DollyNo
+            global_dolly_order.setdefault(dolly_no, idx)
+
+            bucket = buckets.get(eol_name)
+            if bucket is None:
+                bucket = buckets[eol_name] = {
+                    'EOLName': eol_name,
+                    'EOLID': row.EOLID,
+                    'DollyCount': 0,
+                    'TotalVINs': 0,
+                    'Dollys': [],
+                }
+                counted[eol_name] = set()
+            bucket['TotalVINs'] += 1
+            if dolly_no not in counted[eol_name]:
+                counted[eol_name].add(dolly_no)
+                bucket['DollyCount'] += 1
+
+            entry = dolly_entries.get((eol_name, dolly_no))
+            if entry is not None:
+                # VINs in insert order (no sorting)
+                entry['Vins'].append(row.VinNo)
+                entry['VinCount'] += 1
+                continue
+            if per_eol and len(bucket['Dollys']) >= per_eol:
+                continue
+            entry = {
+                'DollyNo': dolly_no,
+                'DollyOrderNo': row.DollyOrderNo,
+                'VinCount': 1,
+                'Vins': [row.VinNo],  # Insert order preserved
+                'CustomerReferans': row.CustomerReferans,
+                'EOLID': row.EOLID,
+                'EOLDATE': row.EOLDATE,
+                'InsertedAt': row.InsertedAt,
+                'Adet': row.Adet,
+            }
+            dolly_entries[(eol_name, dolly_no)] = entry
+            bucket['Dollys'].append(entry)
+
+        # Dollys by GLOBAL first occurrence order (not within EOL)
+        for bucket in buckets.values():
+            bucket['Dollys'].sort(key=lambda d: global_dolly_order[d['DollyNo']])
+            if bucket['Dollys']:
+                bucket['EOLID'] = bucket['Dollys'][0]['EOLID']
+        return list(buckets.values())
+
     def get_all_available_dollys_for_collection(self, limit: int = 100):
         """Get all available dollys from DollyEOLInfo, ordered by DollyNo"""
         try:
@@ -2134,7 +2310,11 @@ class DollyService:
             
             for i in range(task_count):
                 # Generate unique part number
-                part_number = f"WO_{group.GroupName}_{base_timestamp}_{i+1:03d}"
+                counter = self._next_part_counter("WO", datetime.now().date())
+                if counter:
+                    part_number = f"WO_{group.GroupName}_{base_timestamp[:8]}{counter:04d}"
+                else:
+                    part_number = f"WO_{group.GroupName}_{base_timestamp}_{i+1:03d}"
                 
                 # Create task
                 task = WebOperatorTask(
@@ -2194,6 +2374,7 @@ class DollyService:
                 ).all()
 
             dollys = sorted(dollys, key=self._dolly_sort_key)
+            statuses = self.lifecycle.latest_statuses(dolly.DollyNo for dolly in dollys)
 
             queue_entries = []
             for dolly in dollys:
@@ -2208,7 +2389,7 @@ class DollyService:
                         DollySubmissionHold.Status.in_(['submitted', 'completed'])
                     ).first()
 
-                    entry = self._to_queue_entry(dolly)
+                    entry = self._to_queue_entry(dolly, statuses)
                     entry.vin_no = vin
                     if submitted_dolly:
                         entry.status = "submitted"
@@ -2262,7 +2443,9 @@ class DollyService:
             
             # Generate unique part number for this collection
             # M- prefix for Manuel, T- prefix for Terminal
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            now = datetime.now()
+            counter = self._next_part_counter("M", now.date())
+            timestamp = f"{now:%Y%m%d}{counter:04d}" if counter else now.strftime('%Y%m%d%H%M%S')
             part_number = f"M-{group_name}-{timestamp}"
             
             # Create web operator task for this manual collection
@@ -2537,7 +2720,9 @@ class DollyService:
                 raise ValueError("Grup bulunamadı")
             
             # Generate unique part number for manual submission
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            now = datetime.now()
+            counter = self._next_part_counter("MANUAL", now.date())
+            timestamp = f"{now:%Y%m%d}{counter:04d}" if counter else now.strftime('%Y%m%d%H%M%S')
             part_number = f"MANUAL_{group_name}_{timestamp}"
             
             # Create web operator task for this manual submission
@@ -2639,11 +2824,7 @@ class DollyService:
         return part_number
 
     def _table_exists(self, table_name: str) -> bool:
-        try:
-            inspector = sa_inspect(db.engine)
-            return table_name in inspector.get_table_names()
-        except Exception:
-            return False
+        return schema_registry.has_table(table_name)
 
     # NEW WORKFLOW METHODS
     def forklift_scan_dolly(
@@ -2683,54 +2864,61 @@ class DollyService:
         if not loading_session_id:
             loading_session_id = f"LOAD_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{forklift_user or 'UNKNOWN'}"
         
-        # Calculate scan order (1, 2, 3... within this session)
-        max_order = db.session.query(func.max(DollySubmissionHold.ScanOrder)).filter(
-            DollySubmissionHold.LoadingSessionId == loading_session_id
-        ).scalar() or 0
-        scan_order = max_order + 1
-        
-        # Create hold entry for EACH VIN in the dolly
-        first_hold = None
-        for vin_record in vin_records:
-            hold = DollySubmissionHold(
-                DollyNo=dolly_no,
-                VinNo=vin_record.VinNo,
-                DollyOrderNo=vin_record.DollyOrderNo,  # ÇOK ÖNEMLİ: CEVA'ya gönderilecek!
-                CustomerReferans=vin_record.CustomerReferans,  # Customer bilgisi
-                EOLName=vin_record.EOLName,  # EOL bilgisi
-                EOLID=vin_record.EOLID,  # EOL ID
-                Adet=vin_record.Adet or 1,  # Adet bilgisi
-                Status="scanned",
-                TerminalUser=forklift_user,
-                LoadingSessionId=loading_session_id,
-                ScanOrder=scan_order,
-                Payload=json.dumps({"barcode": barcode}) if barcode else None,
-                CreatedAt=datetime.utcnow()
-            )
-            db.session.add(hold)
-            
-            if first_hold is None:
-                first_hold = hold
-            
+        # Hold, lifecycle ve audit satırları tek commit ile yazılır
+        with unit_of_work():
+            # Dolly bu session'da zaten taranmış (retry): yeni hold yazılmaz, mevcut hold döner
+            existing_ids = db.session.execute(
+                text(_ACTIVE_SCAN_HOLDS_SQL),
+                {"session_id": loading_session_id, "dolly_no": dolly_no},
+            ).scalars().all()
+            if existing_ids:
+                current_app.logger.info(
+                    f"ℹ️ Dolly {dolly_no} session {loading_session_id} içinde zaten taranmış, mevcut hold döndürülüyor"
+                )
+                return self._to_hold_entry(db.session.get(DollySubmissionHold, existing_ids[0]))
+
+            # Create hold entry for EACH VIN in the dolly (ScanOrder: 1, 2, 3... within this session)
+            def insert_holds(scan_order: int) -> List[DollySubmissionHold]:
+                holds = [
+                    DollySubmissionHold(
+                        DollyNo=dolly_no,
+                        VinNo=vin_record.VinNo,
+                        DollyOrderNo=vin_record.DollyOrderNo,  # ÇOK ÖNEMLİ: CEVA'ya gönderilecek!
+                        CustomerReferans=vin_record.CustomerReferans,  # Customer bilgisi
+                        EOLName=vin_record.EOLName,  # EOL bilgisi
+                        EOLID=vin_record.EOLID,  # EOL ID
+                        Adet=vin_record.Adet or 1,  # Adet bilgisi
+                        Status="scanned",
+                        TerminalUser=forklift_user,
+                        LoadingSessionId=loading_session_id,
+                        ScanOrder=scan_order,
+                        Payload=json.dumps({"barcode": barcode}) if barcode else None,
+                        CreatedAt=datetime.utcnow()
+                    )
+                    for vin_record in vin_records
+                ]
+                db.session.add_all(holds)
+                return holds
+
+            scan_order, holds = scan_sequencer.claim(loading_session_id, insert_holds)
+            first_hold = holds[0]
+
             # Log lifecycle for each VIN
-            self.lifecycle.log_status(
-                dolly_no,
-                vin_record.VinNo,
+            self.lifecycle.log_status_many(
+                ((dolly_no, vin_record.VinNo) for vin_record in vin_records),
                 LifecycleService.Status.SCAN_CAPTURED,
                 source="FORKLIFT",
                 metadata={"forkliftUser": forklift_user, "sessionId": loading_session_id, "scanOrder": scan_order}
             )
         
-        db.session.commit()
-        
-        # Audit log (summary for all VINs)
-        self.audit.log(
-            action="forklift.scan",
-            resource="dolly",
-            resource_id=dolly_no,
-            actor_name=forklift_user or "forklift",
-            metadata={"sessionId": loading_session_id, "scanOrder": scan_order, "vinCount": len(vin_records)}
-        )
+            # Audit log (summary for all VINs)
+            self.audit.log(
+                action="forklift.scan",
+                resource="dolly",
+                resource_id=dolly_no,
+                actor_name=forklift_user or "forklift",
+                metadata={"sessionId": loading_session_id, "scanOrder": scan_order, "vinCount": len(vin_records)}
+            )
         
         return self._to_hold_entry(first_hold)
     
@@ -2780,7 +2968,7 @@ class DollyService:
             last_dolly = scanned_dollys[0]
             
             # STEP 3: Find dolly by barcode
-            dolly_info = DollyEOLInfo.query.filter_by(EOLDollyBarcode=dolly_barcode).first()
+            dolly_info = barcode_resolver.resolve(dolly_barcode)
             if not dolly_info:
                 raise ValueError(f"Barkod '{dolly_barcode}' sistemde bulunamadı")
             
@@ -2861,86 +3049,77 @@ class DollyService:
             Summary of completed loading
         """
         try:
-            # Get all scanned dollys in this session
-            holds = DollySubmissionHold.query.filter_by(
-                LoadingSessionId=loading_session_id,
-                Status="scanned"
-            ).all()
-            
-            if not holds:
-                raise ValueError(f"Session {loading_session_id} bulunamadı veya zaten tamamlanmış")
-            
-            # Update all to loading_completed status
-            now = datetime.utcnow()
-            for hold in holds:
-                hold.Status = "loading_completed"
-                hold.LoadingCompletedAt = now
-                hold.UpdatedAt = now
-                
-                # Log lifecycle
-                self.lifecycle.log_status(
-                    hold.DollyNo,
-                    hold.VinNo,
+            # Hold güncellemeleri, görev, lifecycle ve audit satırları tek commit ile yazılır
+            with unit_of_work():
+                now = datetime.utcnow()
+                part_number = self._generate_part_number()
+
+                # Session'daki tüm scanned hold'ları tek UPDATE ile tamamla ve PartNumber ata
+                holds = sorted(
+                    db.session.execute(
+                        db.text(
+                            """
+                            UPDATE DollySubmissionHold WITH (ROWLOCK)
+                            SET Status = 'loading_completed',
+                                LoadingCompletedAt = :now,
+                                UpdatedAt = :now,
+                                PartNumber = :part_number
+                            OUTPUT inserted.DollyNo, inserted.VinNo, inserted.ScanOrder
+                            WHERE LoadingSessionId = :session_id AND Status = 'scanned'
+                            """
+                        ),
+                        {"now": now, "part_number": part_number, "session_id": loading_session_id},
+                    ).fetchall(),
+                    key=lambda row: (row.ScanOrder is None, row.ScanOrder or 0),
+                )
+
+                if not holds:
+                    # Ayrılan part number boşluk olarak kalır
+                    raise ValueError(f"Session {loading_session_id} bulunamadı veya zaten tamamlanmış")
+
+                self.lifecycle.log_status_many(
+                    ((hold.DollyNo, hold.VinNo) for hold in holds),
                     LifecycleService.Status.WAITING_OPERATOR,
                     source="FORKLIFT",
                     metadata={"forkliftUser": forklift_user, "sessionId": loading_session_id}
                 )
-            
-            db.session.commit()
-            
-            # Create WebOperatorTask for this session
-            part_number = self._generate_part_number()
-            
-            # Determine group tag from first dolly's EOL
-            first_hold = holds[0]
-            group_tag = "both"  # Default
-            
-            # Try to get group tag from EOL name
-            try:
-                from .dolly_service import DollyService
-                # Get EOL info to determine shipping tag
-                eol_info = db.session.query(DollyEOLInfo).filter_by(
-                    DollyNo=first_hold.DollyNo
-                ).first()
-                
-                if eol_info and eol_info.EOLName:
-                    # Check if this EOL has a specific shipping tag
-                    group_tag_mapping = self._get_eol_shipping_tags()
-                    group_tag = group_tag_mapping.get(eol_info.EOLName, "both")
-            except Exception as e:
-                current_app.logger.warning(f"Could not determine group tag: {e}")
-            
-            # Create task
-            task = WebOperatorTask(
-                PartNumber=part_number,
-                Status="pending",
-                GroupTag=group_tag,
-                CreatedAt=now,
-                UpdatedAt=now
-            )
-            db.session.add(task)
-            
-            # Update all holds with the part number
-            for hold in holds:
-                hold.PartNumber = part_number
-            
-            db.session.commit()
-            
-            current_app.logger.info(f"✅ WebOperatorTask created: {part_number} for session {loading_session_id}")
-            
-            # Audit log
-            self.audit.log(
-                action="forklift.complete_loading",
-                resource="loading_session",
-                resource_id=loading_session_id,
-                actor_name=forklift_user or "forklift",
-                metadata={
-                    "dollyCount": len(holds),
-                    "partNumber": part_number,
-                    "taskCreated": True
-                }
-            )
-            
+
+                # Group tag ilk dolly'nin EOL'ünden (grup tanımları group_resolver önbelleğinde)
+                group_tag = "both"  # Default
+                try:
+                    eol_name = db.session.execute(
+                        db.text("SELECT TOP 1 EOLName FROM DollyEOLInfo WITH (NOLOCK) WHERE DollyNo = :dolly_no"),
+                        {"dolly_no": holds[0].DollyNo},
+                    ).scalar()
+                    group_tag = group_resolver.shipping_tag(eol_name)
+                except Exception as e:
+                    current_app.logger.warning(f"Could not determine group tag: {e}")
+
+                # Create WebOperatorTask for this session
+                db.session.add(WebOperatorTask(
+                    PartNumber=part_number,
+                    Status="pending",
+                    GroupTag=group_tag,
+                    CreatedAt=now,
+                    UpdatedAt=now
+                ))
+
+                current_app.logger.info(f"✅ WebOperatorTask created: {part_number} for session {loading_session_id}")
+
+                # Audit log
+                self.audit.log(
+                    action="forklift.complete_loading",
+                    resource="loading_session",
+                    resource_id=loading_session_id,
+                    actor_name=forklift_user or "forklift",
+                    metadata={
+                        "dollyCount": len(holds),
+                        "partNumber": part_number,
+                        "taskCreated": True
+                    }
+                )
+            shipment_summaries.invalidate()
+
         except ValueError:
             raise
         except Exception as e:
@@ -3001,69 +3180,12 @@ class DollyService:
         return sessions
     
     def list_pending_shipments(self) -> List[Dict[str, Any]]:
-        """List all loading sessions waiting for operator to add shipment details."""
-        sessions = self.list_loading_sessions(status="loading_completed")
-        
-        # Enrich with dolly details
-        for session in sessions:
-            dollys = DollySubmissionHold.query.filter_by(
-                LoadingSessionId=session["loadingSessionId"]
-            ).order_by(DollySubmissionHold.ScanOrder).all()
-            
-            session["dollys"] = [
-                {
-                    "id": d.Id,  # Added ID for checkbox selection
-                    "dollyNo": d.DollyNo,
-                    "vinNo": d.VinNo,
-                    "scanOrder": d.ScanOrder,
-                    "scannedAt": d.CreatedAt.isoformat() if d.CreatedAt else None,
-                    "customerReferans": None,  # Will be enriched from DollyEOLInfo
-                    "eolName": None
-                }
-                for d in dollys
-            ]
-            
-            # Enrich with DollyEOLInfo data
-            for dolly_dict in session["dollys"]:
-                eol_info = DollyEOLInfo.query.filter_by(DollyNo=dolly_dict["dollyNo"]).first()
-                if eol_info:
-                    dolly_dict["customerReferans"] = eol_info.CustomerReferans
-                    dolly_dict["eolName"] = eol_info.EOLName
-        
-        return sessions
+        """List all loading sessions waiting for operator to add shipment details (tek sorgu, önbellekli)."""
+        return shipment_summaries.pending()
     
     def get_shipment_details(self, loading_session_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed information about a specific loading session."""
-        dollys = DollySubmissionHold.query.filter_by(
-            LoadingSessionId=loading_session_id
-        ).order_by(DollySubmissionHold.ScanOrder).all()
-        
-        if not dollys:
-            return None
-        
-        # Get DollyEOLInfo details for each dolly
-        dolly_details = []
-        for hold in dollys:
-            eol_info = DollyEOLInfo.query.filter_by(DollyNo=hold.DollyNo).first()
-            dolly_details.append({
-                "dollyNo": hold.DollyNo,
-                "vinNo": hold.VinNo,
-                "scanOrder": hold.ScanOrder,
-                "scannedAt": hold.CreatedAt.isoformat() if hold.CreatedAt else None,
-                "customerReferans": eol_info.CustomerReferans if eol_info else None,
-                "eolName": eol_info.EOLName if eol_info else None,
-                "adet": eol_info.Adet if eol_info else None
-            })
-        
-        return {
-            "loadingSessionId": loading_session_id,
-            "status": dollys[0].Status,
-            "forkliftUser": dollys[0].TerminalUser,
-            "dollyCount": len(dollys),
-            "firstScanAt": dollys[0].CreatedAt.isoformat() if dollys[0].CreatedAt else None,
-            "completedAt": dollys[0].LoadingCompletedAt.isoformat() if dollys[0].LoadingCompletedAt else None,
-            "dollys": dolly_details
-        }
+        """Get detailed information about a specific loading session (tek sorgu)."""
+        return shipment_summaries.details(loading_session_id)
     
     def validate_sefer_format(self, sefer: str) -> bool:
         """Validate sefer number format (e.g., SFR20250001 or custom format)."""
@@ -3158,72 +3280,89 @@ class DollyService:
                     "Lütfen farklı bir numara girin."
                 )
             
-            # Get dollys in this session
-            query = DollySubmissionHold.query.filter_by(
-                LoadingSessionId=loading_session_id,
-                Status="loading_completed"
-            )
-            
-            # Partial shipment: only selected dollys
-            if selected_dolly_ids:
-                query = query.filter(DollySubmissionHold.Id.in_(selected_dolly_ids))
-            
-            holds = query.all()
+            # Hold güncellemeleri, SeferDollyEOL, lifecycle ve audit satırları tek commit ile yazılır
+            with unit_of_work():
+                # Get dollys in this session
+                query = DollySubmissionHold.query.filter_by(
+                    LoadingSessionId=loading_session_id,
+                    Status="loading_completed"
+                )
             
-            if not holds:
+                # Partial shipment: only selected dollys
                 if selected_dolly_ids:
-                    raise ValueError(f"Seçili dolly'ler bulunamadı veya zaten tamamlanmış")
-                else:
-                    raise ValueError(f"Session {loading_session_id} bulunamadı veya zaten tamamlanmış")
-            
-            now = datetime.utcnow()
-            completed_dollys = []
-            
-            # Process each dolly
-            for hold in holds:
-                # Update hold entry
-                hold.SeferNumarasi = sefer_numarasi
-                hold.PlakaNo = plaka_no
-                hold.Status = "completed"
-                hold.SubmittedAt = now
-                hold.UpdatedAt = now
-                
-                # Get dolly info
-                dolly_info = DollyEOLInfo.query.filter_by(DollyNo=hold.DollyNo).first()
-                if not dolly_info:
-                    continue
-                
-                # Create SeferDollyEOL record
-                # 📅 Üretim tarihini backup tablosundan al
-                production_date = self._get_production_date_from_backup(hold.DollyNo)
-                eol_dt = production_date or getattr(dolly_info, "InsertedAt", None) or getattr(dolly_info, "EOLDATE", None) or hold.CreatedAt
-                terminal_dt = hold.LoadingCompletedAt or hold.CreatedAt or eol_dt
-
-                sefer_record = SeferDollyEOL(
-                    SeferNumarasi=sefer_numarasi,
-                    PlakaNo=plaka_no,
-                    DollyNo=hold.DollyNo,
-                    VinNo=hold.VinNo,
-                    PartNumber=getattr(hold, "PartNumber", None),
-                    CustomerReferans=dolly_info.CustomerReferans,
-                    Adet=dolly_info.Adet,
-                    EOLName=dolly_info.EOLName,
-                    EOLID=dolly_info.EOLID,
-                    EOLDate=eol_dt,
-                    TerminalUser=hold.TerminalUser,
-                    TerminalDate=terminal_dt,
-                    VeriGirisUser=operator_user,
-                    ASNDate=now if shipping_type in ["asn", "both"] else None,
-                    IrsaliyeDate=now if shipping_type in ["irsaliye", "both"] else None
-                )
-                db.session.add(sefer_record)
-                
-                # Log lifecycle
-                final_status = self._final_status_for_tag(shipping_type)
-                self.lifecycle.log_status(
-                    hold.DollyNo,
-                    hold.VinNo,
-                    final_status,
+                    query = query.filter(DollySubmissionHold.Id.in_(selected_dolly_ids))
+            
+                holds = query.all()
+            
+                if not holds:
+                    if selected_dolly_ids:
+                        raise ValueError(f"Seçili dolly'ler bulunamadı veya zaten tamamlanmış")
+                    else:
+                        raise ValueError(f"Session {loading_session_id} bulunamadı veya zaten tamamlanmış")
+            
+                now = datetime.utcnow()
+                completed_dollys = []
+
+                # EOL bilgisi ve üretim tarihleri tüm dolly'ler için iki IN sorgusuyla
+                eol_by_dolly = self._first_eol_info_by_dolly(self._eol_info_for_holds(holds))
+                production_dates = self._get_production_dates_from_backup(list(eol_by_dolly))
+
+                # Hold güncellemesi tek UPDATE (chunk başına)
+                for chunk in _chunks([hold.Id for hold in holds]):
+                    db.session.execute(
+                        update(DollySubmissionHold)
+                        .where(DollySubmissionHold.Id.in_(chunk))
+                        .values(
+                            SeferNumarasi=sefer_numarasi,
+                            PlakaNo=plaka_no,
+                            Status="completed",
+                            SubmittedAt=now,
+                            UpdatedAt=now,
+                        )
+                    )
+
+                sefer_rows = []
+                for hold in holds:
+                    dolly_info = eol_by_dolly.get(hold.DollyNo)
+                    if not dolly_info:
+                        continue
+
+                    # 📅 Üretim tarihi backup tablosundan
+                    production_date = production_dates.get(hold.DollyNo)
+                    eol_dt = production_date or getattr(dolly_info, "InsertedAt", None) or getattr(dolly_info, "EOLDATE", None) or hold.CreatedAt
+                    terminal_dt = hold.LoadingCompletedAt or hold.CreatedAt or eol_dt
+
+                    sefer_rows.append({
+                        "SeferNumarasi": sefer_numarasi,
+                        "PlakaNo": plaka_no,
+                        "DollyNo": hold.DollyNo,
+                        "VinNo": hold.VinNo,
+                        "PartNumber": getattr(hold, "PartNumber", None),
+                        "CustomerReferans": dolly_info.CustomerReferans,
+                        "Adet": dolly_info.Adet,
+                        "EOLName": dolly_info.EOLName,
+                        "EOLID": dolly_info.EOLID,
+                        "EOLDate": eol_dt,
+                        "TerminalUser": hold.TerminalUser,
+                        "TerminalDate": terminal_dt,
+                        "VeriGirisUser": operator_user,
+                        "ASNDate": now if shipping_type in ["asn", "both"] else None,
+                        "IrsaliyeDate": now if shipping_type in ["irsaliye", "both"] else None,
+                    })
+                    completed_dollys.append({
+                        "dollyNo": hold.DollyNo,
+                        "vinNo": hold.VinNo,
+                        "scanOrder": hold.ScanOrder
+                    })
+
+                if sefer_rows:
+                    # Tek executemany (pyodbc fast_executemany)
+                    db.session.execute(insert(SeferDollyEOL), sefer_rows)
+
+                # Lifecycle satırları tek bulk insert
+                self.lifecycle.log_status_many(
+                    ((row["DollyNo"], row["VinNo"]) for row in sefer_rows),
+                    self._final_status_for_tag(shipping_type),
                     source="OPERATOR",
                     metadata={
                         "operatorUser": operator_user,
@@ -3232,29 +3371,22 @@ class DollyService:
                         "shippingType": shipping_type
                     }
                 )
-                
-                completed_dollys.append({
-                    "dollyNo": hold.DollyNo,
-                    "vinNo": hold.VinNo,
-                    "scanOrder": hold.ScanOrder
-                })
-            
-            db.session.commit()
-            
-            # Audit log
-            self.audit.log(
-                action="operator.complete_shipment",
-                resource="loading_session",
-                resource_id=loading_session_id,
-                actor_name=operator_user or "operator",
-                metadata={
-                    "seferNumarasi": sefer_numarasi,
-                    "plakaNo": plaka_no,
-                    "shippingType": shipping_type,
-                    "dollyCount": len(completed_dollys),
-                    "partialShipment": bool(selected_dolly_ids)
-                }
-            )
+
+                # Audit log
+                self.audit.log(
+                    action="operator.complete_shipment",
+                    resource="loading_session",
+                    resource_id=loading_session_id,
+                    actor_name=operator_user or "operator",
+                    metadata={
+                        "seferNumarasi": sefer_numarasi,
+                        "plakaNo": plaka_no,
+                        "shippingType": shipping_type,
+                        "dollyCount": len(completed_dollys),
+                        "partialShipment": bool(selected_dolly_ids)
+                    }
+                )
+            shipment_summaries.invalidate()
             
             return {
                 "loadingSessionId": loading_session_id,
@@ -3340,6 +3472,7 @@ class DollyService:
             )
             
             db.session.commit()
+            queue_snapshot.discard(dolly_no, vin_no)
             return True
             
         except Exception as e:
@@ -3369,12 +3502,12 @@ class DollyService:
         Returns:
             Dict: {"success_count": 5, "failed": [], "removed_ids": []}
         """
-        success_count = 0
         failed = []
         removed_ids = []
+        removed_keys = []
         
         try:
-            # Aynı dolly'yi birden çok VIN ile gönderebileceğimiz için gruplayıp tek seferde çekelim.
+            # Aynı dolly'yi birden çok VIN ile gönderebileceğimiz için gruplayalım (VIN yoksa tüm VIN'ler)
             grouped_dollys: Dict[str, set[str]] = {}
             for item in dolly_list:
                 dolly_no = str(item.get("dolly_no") or "").strip()
@@ -3386,28 +3519,31 @@ class DollyService:
                 grouped_dollys.setdefault(dolly_no, set())
                 if vin_no:
                     grouped_dollys[dolly_no].add(vin_no)
-            
-            for dolly_no, vin_set in grouped_dollys.items():
-                # Dollynin tüm VIN'lerini tek seferde al (seçili VIN listesi varsa filtrele)
-                query = DollyEOLInfo.query.filter_by(DollyNo=dolly_no)
-                if vin_set:
-                    query = query.filter(DollyEOLInfo.VinNo.in_(vin_set))
-                
-                records = query.all()
-                if not records:
+
+            keys: List[Tuple[str, Optional[str]]] = [
+                (dolly_no, vin_no)
+                for dolly_no, vin_set in grouped_dollys.items()
+                for vin_no in (sorted(vin_set) or [None])
+            ]
+
+            # Arşive kopyala + sil: chunk başına iki set-based ifade, tek transaction
+            now = datetime.utcnow()
+            for chunk in _chunks(keys, size=900):  # 2100 parametre sınırı
+                values, params = _queue_key_values(chunk)
+                archived = db.session.execute(
+                    db.text(_ARCHIVE_QUEUE_ROWS_SQL.format(keys=values)),
+                    {**params, "now": now, "removed_by": removed_by, "reason": reason},
+                ).fetchall()
+                db.session.execute(db.text(_DELETE_QUEUE_ROWS_SQL.format(keys=values)), params)
+                for row in archived:
+                    removed_ids.append(row.Id)
+                    removed_keys.append((row.DollyNo, row.VinNo))
+
+            removed_dollys = {dolly_no for dolly_no, _ in removed_keys}
+            for dolly_no in grouped_dollys:
+                if dolly_no not in removed_dollys:
                     failed.append({"dolly_no": dolly_no, "vin_no": None, "error": "Kayıt bulunamadı"})
-                    continue
-                
-                for record in records:
-                    removed_record = DollyQueueRemoved.from_dolly_eol(
-                        dolly_eol_record=record,
-                        removed_by=removed_by,
-                        reason=reason
-                    )
-                    db.session.add(removed_record)
-                    db.session.delete(record)
-                    success_count += 1
-                    removed_ids.append(removed_record.Id)
+            success_count = len(removed_ids)
             
             # Audit log
             self.audit.log(
@@ -3424,6 +3560,7 @@ class DollyService:
             )
             
             db.session.commit()
+            queue_snapshot.discard_many(removed_keys)
             
             return {
                 "success_count": success_count,
@@ -3580,6 +3717,7 @@ class DollyService:
             )
             
             db.session.commit()
+            queue_snapshot.upsert(new_record)
             return True
             
         except Exception as e:
@@ -3596,51 +3734,65 @@ class DollyService:
         restored_by: str
     ) -> Dict[str, Any]:
         """Arşivden birden fazla dolly'yi geri sıraya al."""
-        success = 0
         failed: List[Dict[str, Any]] = []
         restored_ids: List[int] = []
+        restored_rows = []
         
         try:
-            conn = db.session.connection()
-            conn.execute(text("SET IDENTITY_INSERT DollyEOLInfo ON"))
-            for archive_id in archive_ids:
-                with db.session.no_autoflush:
-                    removed_record = DollyQueueRemoved.query.filter_by(Id=archive_id).first()
-                
-                if not removed_record:
+            requested = list(dict.fromkeys(archive_ids))
+            archive_rows = {}
+            for chunk in _chunks(requested):
+                for row in db.session.execute(
+                    db.text(
+                        """
+                        SELECT r.Id, r.DollyNo, r.VinNo,
+                               CASE WHEN EXISTS (
+                                   SELECT 1 FROM DollyEOLInfo e
+                                   WHERE e.DollyNo = r.DollyNo AND e.VinNo = r.VinNo
+                               ) THEN 1 ELSE 0 END AS InQueue
+                        FROM DollyQueueRemoved r WITH (UPDLOCK)
+                        WHERE r.Id IN :archive_ids
+                        """
+                    ).bindparams(db.bindparam("archive_ids", expanding=True)),
+                    {"archive_ids": chunk},
+                ):
+                    archive_rows[row.Id] = row
+
+            # Aynı DollyNo/VinNo birden çok kez arşivlendiyse yalnızca ilki geri gelir
+            claimed = set()
+            for archive_id in requested:
+                row = archive_rows.get(archive_id)
+                if row is None:
                     failed.append({"archive_id": archive_id, "error": "Arşiv kaydı bulunamadı"})
-                    continue
-                
-                existing = DollyEOLInfo.query.filter_by(
-                    DollyNo=removed_record.DollyNo,
-                    VinNo=removed_record.VinNo
-                ).first()
-                if existing:
+                elif row.InQueue or (row.DollyNo, row.VinNo) in claimed:
                     failed.append({"archive_id": archive_id, "error": "Zaten sırada"})
-                    continue
-                
-                new_record = DollyEOLInfo(
-                    DollyNo=removed_record.DollyNo,
-                    VinNo=removed_record.VinNo,
-                    CustomerReferans=removed_record.CustomerReferans,
-                    Adet=removed_record.Adet,
-                    EOLName=removed_record.EOLName,
-                    EOLID=removed_record.EOLID,
-                    EOLDATE=removed_record.EOLDATE,
-                    EOLDollyBarcode=removed_record.EOLDollyBarcode,
-                    DollyOrderNo=removed_record.DollyOrderNo,
-                    RECEIPTID=removed_record.RECEIPTID,
-                    InsertedAt=datetime.utcnow()
-                )
-                
-                db.session.add(new_record)
-                db.session.delete(removed_record)
-                
-                success += 1
-                restored_ids.append(archive_id)
-            
-            db.session.flush()
-            conn.execute(text("SET IDENTITY_INSERT DollyEOLInfo OFF"))
+                else:
+                    claimed.add((row.DollyNo, row.VinNo))
+                    restored_ids.append(archive_id)
+
+            if restored_ids:
+                now = datetime.utcnow()
+                conn = db.session.connection()
+                conn.execute(text("SET IDENTITY_INSERT DollyEOLInfo ON"))
+                try:
+                    for chunk in _chunks(restored_ids):
+                        params = {"archive_ids": chunk}
+                        restored_rows.extend(
+                            queue_snapshot.to_row(row)
+                            for row in conn.execute(
+                                text(_RESTORE_QUEUE_ROWS_SQL).bindparams(db.bindparam("archive_ids", expanding=True)),
+                                {**params, "now": now},
+                            )
+                        )
+                        conn.execute(
+                            text("DELETE FROM DollyQueueRemoved WHERE Id IN :archive_ids").bindparams(
+                                db.bindparam("archive_ids", expanding=True)
+                            ),
+                            params,
+                        )
+                finally:
+                    conn.execute(text("SET IDENTITY_INSERT DollyEOLInfo OFF"))
+            success = len(restored_ids)
             
             self.audit.log(
                 action="queue.restore_multiple_dollys",
@@ -3654,6 +3806,8 @@ class DollyService:
                 }
             )
             db.session.commit()
+            for row in restored_rows:
+                queue_snapshot.upsert(row)
             
             return {
                 "success_count": success,
@@ -3666,14 +3820,16 @@ class DollyService:
                 "count": len(archive_ids),
                 "restored_by": restored_by
             })
-            try:
-                # Off in case of mid-loop failure
-                db.session.connection().execute(text("SET IDENTITY_INSERT DollyEOLInfo OFF"))
-            except Exception:
-                pass
             raise RuntimeError(f"Toplu geri yükleme hatası: {str(e)}")
     
 
+def _record_eol_ready(new_rows) -> None:
+    """Snapshot'ta ilk kez görülen dolly'ler için EOL_READY (istek ya da monitor yolu fark etmez)"""
+    LifecycleService().ensure_received_many(row.DollyNo for row in new_rows)
+
+
+queue_snapshot.register_callback(_record_eol_ready)
+
 def _mock_entry(dolly_no: str, vin: str, eol_name: str, adet: int) -> QueueEntry:
     return QueueEntry(
         dolly_no=dolly_no,
@@ -0,0 +1,273 @@
+"""
+Group Resolver
+EOL adı / PWorkStation Id → grup, grup adı ve ShippingTag eşlemesinin
+process içi, versiyonlu önbelleği.
+
+Grup tanımları (DollyGroup / DollyGroupEOL) nadiren değişir fakat kuyruk,
+operatör ve manuel toplama ekranlarında her satır için sorgulanıyordu.
+create/update/delete_group commit sonrası `bump()` çağırır; versiyon
+CacheVersion tablosunda tutulduğu için diğer worker'lar da en geç
+`version_check_interval` saniye içinde yeniden yükler.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..extensions import db
+from ..models import DollyGroup, DollyGroupEOL, PWorkStation
+from .schema_registry import schema_registry
+
+CACHE_KEY = "group_resolver"
+
+
+@dataclass(frozen=True)
+class GroupLink:
+    group_id: int
+    group_name: str
+    is_active: bool
+    workstation_id: int
+    shipping_tag: str
+
+
+@dataclass(frozen=True)
+class GroupRef:
+    group_id: int
+    name: str
+    description: Optional[str]
+    is_active: bool
+
+
+class GroupResolver:
+    """Versiyonlu EOL → grup / ShippingTag çözümleyici"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._links_by_eol: Dict[str, Tuple[GroupLink, ...]] = {}
+        self._links_by_workstation: Dict[int, Tuple[GroupLink, ...]] = {}
+        self._stations_by_name: Dict[str, Tuple[int, ...]] = {}
+        self._station_names: Dict[int, str] = {}
+        self._groups: Dict[int, GroupRef] = {}
+        self._groups_by_name: Dict[str, GroupRef] = {}
+        self._loaded = False
+        self._db_version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self.version = 0  # Yerel yükleme sayacı
+        self.version_check_interval = 5  # DB versiyon kontrolü aralığı (saniye)
+        self.fallback_ttl = 60  # CacheVersion tablosu yoksa yeniden yükleme aralığı (saniye)
+        self.stats = {"loads": 0, "version_checks": 0, "bumps": 0}
+
+    # ------------------------------------------------------------------ lookups
+    def links_for_eol(self, eol_name: Optional[str]) -> Tuple[GroupLink, ...]:
+        if not eol_name:
+            return ()
+        with self._lock:
+            self._ensure_fresh()
+            return self._links_by_eol.get(eol_name, ())
+
+    def links_for_workstation(self, workstation_id) -> Tuple[GroupLink, ...]:
+        try:
+            key = int(workstation_id)
+        except (TypeError, ValueError):
+            return ()
+        with self._lock:
+            self._ensure_fresh()
+            return self._links_by_workstation.get(key, ())
+
+    def shipping_tag(self, eol_name: Optional[str], default: str = "both") -> str:
+        """EOL'ün ilk grup bağlantısındaki ShippingTag (grup adına göre sıralı)"""
+        links = self.links_for_eol(eol_name)
+        return (links[0].shipping_tag or default) if links else default
+
+    def shipping_tags_by_eol(self) -> Dict[str, str]:
+        with self._lock:
+            self._ensure_fresh()
+            return {name: links[0].shipping_tag for name, links in self._links_by_eol.items() if links}
+
+    def shipping_tags_for_eols(self, eol_names: Iterable[str]) -> Set[str]:
+        return {link.shipping_tag for name in set(eol_names) for link in self.links_for_eol(name) if link.shipping_tag}
+
+    def group_ids_for_eols(self, eol_names: Iterable[str]) -> Set[int]:
+        return {link.group_id for name in set(eol_names) for link in self.links_for_eol(name)}
+
+    def group_names_for_eols(self, eol_names: Iterable[str]) -> List[str]:
+        return sorted({link.group_name for name in set(eol_names) for link in self.links_for_eol(name) if link.group_name})
+
+    def get_group(self, group_id: int, active_only: bool = False) -> Optional[GroupRef]:
+        with self._lock:
+            self._ensure_fresh()
+            group = self._groups.get(group_id)
+        if group and active_only and not group.is_active:
+            return None
+        return group
+
+    def group_by_name(self, group_name: str, active_only: bool = False) -> Optional[GroupRef]:
+        with self._lock:
+            self._ensure_fresh()
+            group = self._groups_by_name.get(group_name)
+        if group and active_only and not group.is_active:
+            return None
+        return group
+
+    def workstation_ids(self, eol_name: str) -> Tuple[int, ...]:
+        with self._lock:
+            self._ensure_fresh()
+            return self._stations_by_name.get(eol_name, ())
+
+    def workstation_name(self, workstation_id: int) -> Optional[str]:
+        with self._lock:
+            self._ensure_fresh()
+            return self._station_names.get(workstation_id)
+
+    def active_station_groups(self) -> Tuple[Tuple[str, ...], Dict[int, str]]:
+        """En az bir istasyonu olan aktif grup adları (ada göre sıralı) ve istasyon Id -> ilk aktif grup adı"""
+        with self._lock:
+            self._ensure_fresh()
+            names: Set[str] = set()
+            station_groups: Dict[int, str] = {}
+            for workstation_id, links in self._links_by_workstation.items():
+                for link in links:
+                    if link.is_active:
+                        names.add(link.group_name)
+                        station_groups.setdefault(workstation_id, link.group_name)
+            return tuple(sorted(names)), station_groups
+
+    def current_version(self) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return self.version
+
+    def eol_in_group(self, eol_name: str, group_id: int) -> bool:
+        return any(link.group_id == group_id for link in self.links_for_eol(eol_name))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "version": self.version,
+                "db_version": self._db_version,
+                "eol_count": len(self._links_by_eol),
+                "group_count": len(self._groups),
+            }
+
+    # ------------------------------------------------------------------ invalidation
+    def bump(self) -> None:
+        """Grup tanımları değişti: DB versiyonunu artır ve yerelde yeniden yüklemeye zorla"""
+        with self._lock:
+            self._loaded = False
+            self.stats["bumps"] += 1
+            if not self._version_table_available():
+                return
+            db.session.execute(
+                db.text(
+                    """
+                    MERGE CacheVersion WITH (HOLDLOCK) AS t
+                    USING (SELECT :cache_key AS CacheKey) AS s
+                    ON t.CacheKey = s.CacheKey
+                    WHEN MATCHED THEN
+                        UPDATE SET Version = t.Version + 1, UpdatedAt = GETUTCDATE()
+                    WHEN NOT MATCHED THEN
+                        INSERT (CacheKey, Version, UpdatedAt) VALUES (:cache_key, 1, GETUTCDATE());
+                    """
+                ),
+                {"cache_key": CACHE_KEY},
+            )
+            db.session.commit()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    # ------------------------------------------------------------------ internals
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if not self._loaded:
+            self._load(now)
+            return
+        if now - self._checked_at < self.version_check_interval:
+            return
+        self._checked_at = now
+        if self._version_table_available():
+            self.stats["version_checks"] += 1
+            if self._read_db_version() != self._db_version:
+                self._load(now)
+        elif now - self._loaded_at >= self.fallback_ttl:
+            self._load(now)
+
+    def _version_table_available(self) -> bool:
+        return schema_registry.has_feature("cache_version")
+
+    def _group_tables_available(self) -> bool:
+        return schema_registry.has_feature("dolly_groups")
+
+    def _read_db_version(self) -> Optional[int]:
+        return db.session.execute(
+            db.text("SELECT Version FROM CacheVersion WITH (NOLOCK) WHERE CacheKey = :cache_key"),
+            {"cache_key": CACHE_KEY},
+        ).scalar()
+
+    def _load(self, now: float) -> None:
+        db_version = self._read_db_version() if self._version_table_available() else None
+
+        stations = db.session.query(PWorkStation.Id, PWorkStation.PWorkStationName).all()
+        groups: Dict[int, GroupRef] = {}
+        rows = []
+        if self._group_tables_available():
+            groups = {
+                row.Id: GroupRef(group_id=row.Id, name=row.GroupName, description=row.Description, is_active=bool(row.IsActive))
+                for row in db.session.query(DollyGroup.Id, DollyGroup.GroupName, DollyGroup.Description, DollyGroup.IsActive)
+            }
+            rows = (
+                db.session.query(
+                    DollyGroupEOL.GroupId,
+                    DollyGroupEOL.PWorkStationId,
+                    DollyGroupEOL.ShippingTag,
+                    PWorkStation.PWorkStationName,
+                )
+                .join(PWorkStation, DollyGroupEOL.PWorkStationId == PWorkStation.Id)
+                .all()
+            )
+
+        by_eol: Dict[str, List[GroupLink]] = {}
+        by_workstation: Dict[int, List[GroupLink]] = {}
+        for group_id, workstation_id, tag, eol_name in rows:
+            group = groups.get(group_id)
+            if not group:
+                continue
+            link = GroupLink(
+                group_id=group_id,
+                group_name=group.name,
+                is_active=group.is_active,
+                workstation_id=workstation_id,
+                shipping_tag=(tag or "both").lower().strip(),
+            )
+            by_eol.setdefault(eol_name, []).append(link)
+            by_workstation.setdefault(workstation_id, []).append(link)
+
+        # list_group_definitions ile aynı öncelik: grup adına göre sıralı
+        def _ordered(links: List[GroupLink]) -> Tuple[GroupLink, ...]:
+            return tuple(sorted(links, key=lambda link: (link.group_name or "", link.workstation_id)))
+
+        stations_by_name: Dict[str, List[int]] = {}
+        for station_id, station_name in stations:
+            stations_by_name.setdefault(station_name, []).append(station_id)
+
+        self._groups = groups
+        self._groups_by_name = {group.name: group for group in groups.values()}
+        self._links_by_eol = {name: _ordered(links) for name, links in by_eol.items()}
+        self._links_by_workstation = {ws_id: _ordered(links) for ws_id, links in by_workstation.items()}
+        self._stations_by_name = {name: tuple(ids) for name, ids in stations_by_name.items()}
+        self._station_names = {station_id: station_name for station_id, station_name in stations}
+        self._db_version = db_version
+        self._loaded = True
+        self._loaded_at = now
+        self._checked_at = now
+        self.version += 1
+        self.stats["loads"] += 1
+
+
+# Global instance
+group_resolver = GroupResolver()
@@ -0,0 +1,127 @@
+"""
+Idempotency
+El terminallerinin tekrar gönderdiği tarama isteklerini (zayıf Wi-Fi
+retry'ları) veritabanına gitmeden önceki yanıtla karşılar.
+
+Anahtar istemciden gelir (`Idempotency-Key` header'ı ya da payload'da
+`idempotencyKey`) veya yoksa (endpoint, kullanıcı, session, barkod)
+dörtlüsünden türetilir. Aynı anahtarla eşzamanlı gelen ikinci istek ilkinin
+bitmesini bekler ve onun yanıtını alır; böylece aynı tarama için iki hold
+satırı yazılmaz. Yalnızca başarılı (2xx) yanıtlar saklanır, hata alan
+istek tekrar denenebilir.
+
+İstemci anahtarının yanıtı `client_ttl` boyunca saklanır. Türetilmiş anahtar
+yalnızca uçuştaki tekrarları birleştirir (`derived_ttl` = 0): aynı barkod
+remove-last sonrası tekrar okutulduğunda eski yanıt dönmemeli; sıralı
+tekrarları servis katmanı mevcut hold'u döndürerek karşılar.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import jsonify, request
+
+REPLAY_HEADER = "Idempotent-Replay"
+
+
+class _Slot:
+    __slots__ = ("done", "body", "status", "expires_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body: Any = None
+        self.status: Optional[int] = None
+        self.expires_at = 0.0
+
+
+class IdempotencyCache:
+    """Kısa TTL'li, process içi anahtar -> önceki yanıt haritası"""
+
+    def __init__(self, client_ttl: float = 300, derived_ttl: float = 0, wait_timeout: float = 15, max_entries: int = 10000):
+        self.client_ttl = client_ttl
+        self.derived_ttl = derived_ttl
+        self.wait_timeout = wait_timeout
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()
+        self.stats = {"executed": 0, "replayed": 0, "waited": 0}
+
+    def key_for(self, scope: str, actor: Optional[str], *parts: Any) -> Tuple[str, float]:
+        """İstemci anahtarı varsa onu, yoksa türetilmiş anahtarı (ve TTL'ini) döndür"""
+        payload = request.get_json(force=True, silent=True) or {}
+        client_key = request.headers.get("Idempotency-Key") or payload.get("idempotencyKey")
+        if client_key:
+            return f"{scope}|{actor or '-'}|key:{client_key}", self.client_ttl
+        return f"{scope}|{actor or '-'}|" + "|".join(str(part or "") for part in parts), self.derived_ttl
+
+    def run(self, key: str, ttl: float, handler: Callable[[], Any]):
+        """`handler` yanıtını anahtar için bir kez üret; tekrarlarda önceki yanıtı döndür"""
+        slot, owner = self._acquire(key)
+        if not owner:
+            with self._lock:
+                self.stats["waited"] += 1
+            slot.done.wait(self.wait_timeout)
+            if slot.status is not None:
+                with self._lock:
+                    self.stats["replayed"] += 1
+                return jsonify(slot.body), slot.status, {REPLAY_HEADER: "true"}
+            # İlk istek başarısız oldu / zaman aşımı: bu istek normal yoldan işlenir
+            return handler()
+
+        try:
+            result = handler()
+        except Exception:
+            self._release(key, slot)
+            raise
+
+        response, status = (result[0], result[1]) if isinstance(result, tuple) else (result, result.status_code)
+        if 200 <= status < 300:
+            slot.body = response.get_json(silent=True)
+            slot.status = status
+            slot.expires_at = time.monotonic() + ttl
+            with self._lock:
+                self.stats["executed"] += 1
+            if ttl > 0:
+                slot.done.set()
+            else:
+                # Yalnızca bekleyenler yanıtı alır; anahtar hemen serbest kalır
+                self._release(key, slot)
+        else:
+            self._release(key, slot)
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._slots)}
+
+    def _acquire(self, key: str) -> Tuple[_Slot, bool]:
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None and (not slot.done.is_set() or slot.expires_at > now):
+                return slot, False
+            slot = self._slots[key] = _Slot()
+            self._slots.move_to_end(key)
+            self._evict(now)
+            return slot, True
+
+    def _release(self, key: str, slot: _Slot) -> None:
+        with self._lock:
+            if self._slots.get(key) is slot:
+                del self._slots[key]
+        slot.done.set()
+
+    def _evict(self, now: float) -> None:
+        while self._slots:
+            oldest_key, oldest = next(iter(self._slots.items()))
+            if len(self._slots) <= self.max_entries and not (oldest.done.is_set() and oldest.expires_at <= now):
+                break
+            del self._slots[oldest_key]
+            oldest.done.set()
+
+
+# Global instance
+scan_idempotency = IdempotencyCache()
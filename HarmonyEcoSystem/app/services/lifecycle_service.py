@@ -1,10 +1,28 @@
 from __future__ import annotations
 
 import json
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
 
 from ..extensions import db
-from ..models import DollyLifecycle, DollyEOLInfo
+from ..models import DollyCurrentStatus, DollyLifecycle, DollyEOLInfo
+from .schema_registry import schema_registry
+from .unit_of_work import current_unit_of_work
+
+
+# DollyNo başına son lifecycle kaydı (CreatedAt, Id sırasıyla)
+_LATEST_LIFECYCLE_SQL = """
+    SELECT Id, DollyNo, VinNo, Status, Source
+    FROM (
+        SELECT Id, DollyNo, VinNo, Status, Source,
+               ROW_NUMBER() OVER (PARTITION BY DollyNo ORDER BY CreatedAt DESC, Id DESC) AS rn
+        FROM DollyLifecycle WITH (NOLOCK)
+        {where}
+    ) ranked
+    WHERE rn = 1
+"""
 
 
 class LifecycleService:
@@ -34,6 +52,35 @@ class LifecycleService:
             return
         self.log_status(record.DollyNo, record.VinNo, self.Status.EOL_READY, source="EOL_FEED")
 
+    def ensure_received_many(self, dolly_nos: Iterable[str]) -> int:
+        """EOL_READY kaydı olmayan dolly'ler için tek INSERT ... SELECT ile kayıt aç"""
+        pending = sorted({str(dolly_no) for dolly_no in dolly_nos if dolly_no})
+        inserted = 0
+        for chunk in _chunks(pending):
+            result = db.session.execute(
+                db.text(
+                    """
+                    INSERT INTO DollyLifecycle (DollyNo, VinNo, Status, Source, CreatedAt)
+                    SELECT e.DollyNo, MIN(e.VinNo), :status, :source, GETUTCDATE()
+                    FROM DollyEOLInfo e
+                    WHERE e.DollyNo IN :dolly_nos
+                      AND NOT EXISTS (
+                          SELECT 1 FROM DollyLifecycle l
+                          WHERE l.DollyNo = e.DollyNo AND l.Status = :status
+                      )
+                    GROUP BY e.DollyNo
+                    """
+                ).bindparams(db.bindparam("dolly_nos", expanding=True)),
+                {"dolly_nos": chunk, "status": self.Status.EOL_READY, "source": "EOL_FEED"},
+            )
+            chunk_inserted = max(result.rowcount or 0, 0)
+            if chunk_inserted and self._projection_available():
+                self._sync_current_status(chunk)
+            inserted += chunk_inserted
+        if pending and current_unit_of_work() is None:
+            db.session.commit()
+        return inserted
+
     def log_status(
         self,
         dolly_no: str,
@@ -43,6 +90,18 @@ class LifecycleService:
         metadata: Optional[dict] = None,
     ) -> None:
         payload = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        uow = current_unit_of_work()
+        if uow is not None:
+            # Unit of work içinde: yalnızca biriktir, blok sonunda toplu yazılır
+            uow.lifecycle_rows.append({
+                "DollyNo": dolly_no,
+                "VinNo": vin_no,
+                "Status": status,
+                "Source": source,
+                "Metadata": payload,
+                "CreatedAt": datetime.utcnow(),
+            })
+            return
         log = DollyLifecycle(
             DollyNo=dolly_no,
             VinNo=vin_no,
@@ -51,12 +110,198 @@ class LifecycleService:
             Metadata=payload,
         )
         db.session.add(log)
+        if self._projection_available():
+            db.session.flush()  # Id gerekli
+            self._upsert_current_status(log)
         db.session.commit()
 
+    def log_status_many(
+        self,
+        entries: Iterable[Tuple[str, str]],
+        status: str,
+        source: str,
+        metadata: Optional[dict] = None,
+    ) -> int:
+        """Aynı durumu birden çok (DollyNo, VinNo) için tek bulk insert ile yaz"""
+        payload = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        now = datetime.utcnow()
+        rows = [
+            {"DollyNo": dolly_no, "VinNo": vin_no, "Status": status, "Source": source, "Metadata": payload, "CreatedAt": now}
+            for dolly_no, vin_no in entries
+        ]
+        if not rows:
+            return 0
+        uow = current_unit_of_work()
+        if uow is not None:
+            uow.lifecycle_rows.extend(rows)
+            return len(rows)
+        self.write_staged(rows)
+        db.session.commit()
+        return len(rows)
+
+    def write_staged(self, rows: List[Dict[str, Any]]) -> None:
+        """Unit of work'te biriken kayıtları tek bulk insert ile yaz, projeksiyonu eşitle (commit etmez)"""
+        db.session.execute(insert(DollyLifecycle), rows)
+        if self._projection_available():
+            for chunk in _chunks(sorted({row["DollyNo"] for row in rows})):
+                self._sync_current_status(chunk)
+
     def latest_status(self, dolly_no: str) -> Optional[str]:
+        if self._projection_available():
+            current = db.session.get(DollyCurrentStatus, dolly_no)
+            return current.Status if current else None
         log = (
             DollyLifecycle.query.filter_by(DollyNo=dolly_no)
             .order_by(DollyLifecycle.CreatedAt.desc())
             .first()
         )
         return log.Status if log else None
+
+    def latest_statuses(self, dolly_nos: Iterable[str]) -> Dict[str, str]:
+        """Birden fazla dolly'nin son durumunu tek pencereli sorgu ile getir"""
+        pending = sorted({str(dolly_no) for dolly_no in dolly_nos if dolly_no})
+        statuses: Dict[str, str] = {}
+        if self._projection_available():
+            query = "SELECT DollyNo, Status FROM DollyCurrentStatus WITH (NOLOCK) WHERE DollyNo IN :dolly_nos"
+        else:
+            query = _LATEST_LIFECYCLE_SQL.format(where="WHERE DollyNo IN :dolly_nos")
+        for chunk in _chunks(pending):
+            rows = db.session.execute(
+                db.text(query).bindparams(db.bindparam("dolly_nos", expanding=True)),
+                {"dolly_nos": chunk},
+            )
+            statuses.update({row.DollyNo: row.Status for row in rows})
+        return statuses
+
+    # ------------------------------------------------------------------
+    # DollyCurrentStatus projeksiyonu
+    # ------------------------------------------------------------------
+    def _projection_available(self) -> bool:
+        """DollyCurrentStatus tablosu (migration 025) mevcut mu?"""
+        return schema_registry.has_feature("current_status_projection")
+
+    def _upsert_current_status(self, log: DollyLifecycle) -> None:
+        """Tek lifecycle kaydını projeksiyona yaz (eski Id yeni kaydı ezemez)"""
+        db.session.execute(
+            db.text(
+                """
+                MERGE DollyCurrentStatus WITH (HOLDLOCK) AS t
+                USING (SELECT :dolly_no AS DollyNo) AS s
+                ON t.DollyNo = s.DollyNo
+                WHEN MATCHED AND t.LifecycleId < :lifecycle_id THEN
+                    UPDATE SET VinNo = :vin_no, Status = :status, Source = :source,
+                               LifecycleId = :lifecycle_id, UpdatedAt = GETUTCDATE()
+                WHEN NOT MATCHED THEN
+                    INSERT (DollyNo, VinNo, Status, Source, LifecycleId, UpdatedAt)
+                    VALUES (:dolly_no, :vin_no, :status, :source, :lifecycle_id, GETUTCDATE());
+                """
+            ),
+            {
+                "dolly_no": log.DollyNo,
+                "vin_no": log.VinNo,
+                "status": log.Status,
+                "source": log.Source,
+                "lifecycle_id": log.Id,
+            },
+        )
+
+    def _sync_current_status(self, dolly_nos: Optional[list] = None) -> int:
+        """Projeksiyonu DollyLifecycle geçmişinden set-based MERGE ile eşitle.
+
+        dolly_nos verilmezse tüm tablo yeniden kurulur ve geçmişi olmayan satırlar silinir.
+        """
+        if dolly_nos is None:
+            source = _LATEST_LIFECYCLE_SQL.format(where="")
+            delete_clause = "WHEN NOT MATCHED BY SOURCE THEN DELETE"
+        else:
+            source = _LATEST_LIFECYCLE_SQL.format(where="WHERE DollyNo IN :dolly_nos")
+            delete_clause = ""
+        statement = db.text(
+            f"""
+            MERGE DollyCurrentStatus WITH (HOLDLOCK) AS t
+            USING ({source}) AS s
+            ON t.DollyNo = s.DollyNo
+            WHEN MATCHED AND (t.LifecycleId <> s.Id OR t.Status <> s.Status) THEN
+                UPDATE SET VinNo = s.VinNo, Status = s.Status, Source = s.Source,
+                           LifecycleId = s.Id, UpdatedAt = GETUTCDATE()
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (DollyNo, VinNo, Status, Source, LifecycleId, UpdatedAt)
+                VALUES (s.DollyNo, s.VinNo, s.Status, s.Source, s.Id, GETUTCDATE())
+            {delete_clause};
+            """
+        )
+        if dolly_nos is None:
+            result = db.session.execute(statement)
+        else:
+            result = db.session.execute(
+                statement.bindparams(db.bindparam("dolly_nos", expanding=True)),
+                {"dolly_nos": dolly_nos},
+            )
+        return max(result.rowcount or 0, 0)
+
+    def rebuild_current_status(self) -> int:
+        """DollyCurrentStatus'u tüm geçmişten yeniden kur (backfill). Değişen satır sayısını döner."""
+        if not self._projection_available():
+            raise RuntimeError("DollyCurrentStatus tablosu yok - önce migration 025'i çalıştırın")
+        try:
+            changed = self._sync_current_status()
+            db.session.commit()
+            return changed
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def check_current_status(self, sample_limit: int = 20) -> Dict[str, Any]:
+        """Projeksiyonu geçmişle karşılaştır: eksik, eski ve sahipsiz satırları say"""
+        if not self._projection_available():
+            raise RuntimeError("DollyCurrentStatus tablosu yok - önce migration 025'i çalıştırın")
+        latest = _LATEST_LIFECYCLE_SQL.format(where="")
+        mismatch = """
+            cs.DollyNo IS NULL OR l.DollyNo IS NULL
+            OR cs.LifecycleId <> l.Id OR cs.Status <> l.Status
+        """
+        counts = db.session.execute(
+            db.text(
+                f"""
+                SELECT
+                    SUM(CASE WHEN cs.DollyNo IS NULL THEN 1 ELSE 0 END) AS missing,
+                    SUM(CASE WHEN l.DollyNo IS NULL THEN 1 ELSE 0 END) AS orphaned,
+                    SUM(CASE WHEN cs.DollyNo IS NOT NULL AND l.DollyNo IS NOT NULL
+                              AND (cs.LifecycleId <> l.Id OR cs.Status <> l.Status)
+                             THEN 1 ELSE 0 END) AS stale
+                FROM ({latest}) AS l
+                FULL OUTER JOIN DollyCurrentStatus AS cs WITH (NOLOCK) ON cs.DollyNo = l.DollyNo
+                """
+            )
+        ).first()
+        samples = db.session.execute(
+            db.text(
+                f"""
+                SELECT TOP (:limit)
+                    COALESCE(l.DollyNo, cs.DollyNo) AS DollyNo,
+                    l.Status AS HistoryStatus,
+                    cs.Status AS ProjectedStatus
+                FROM ({latest}) AS l
+                FULL OUTER JOIN DollyCurrentStatus AS cs WITH (NOLOCK) ON cs.DollyNo = l.DollyNo
+                WHERE {mismatch}
+                ORDER BY COALESCE(l.DollyNo, cs.DollyNo)
+                """
+            ),
+            {"limit": sample_limit},
+        )
+        missing = int(counts.missing or 0)
+        orphaned = int(counts.orphaned or 0)
+        stale = int(counts.stale or 0)
+        return {
+            "consistent": not (missing or orphaned or stale),
+            "missing": missing,
+            "stale": stale,
+            "orphaned": orphaned,
+            "samples": [dict(row._mapping) for row in samples],
+        }
+
+
+def _chunks(values, size: int = 1000):
+    """MSSQL 2100 parametre sınırına takılmamak için listeyi parçala"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
@@ -0,0 +1,100 @@
+"""
+Part Number Allocator
+PartNumberCounter tablosu (migration 027) üzerinden seri + gün bazlı,
+çakışmasız sayaç dağıtımı.
+
+Her worker sayaçtan `block_size` adet numarayı tek bir atomik
+UPDATE ... OUTPUT ile ayırır ve bellekten O(1) dağıtır. Ayrılıp
+kullanılmayan numaralar (restart vb.) boşluk bırakır; tekrar kullanılmaz.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from ..extensions import db
+
+
+class PartNumberAllocator:
+    """Blok rezervasyonlu, process içi part number sayacı"""
+
+    def __init__(self, block_size: int = 20):
+        self._lock = threading.Lock()
+        self._blocks: Dict[Tuple[str, date], List[int]] = {}  # (seri, gün) -> [sıradaki, son]
+        self.block_size = block_size
+        self.stats = {"allocations": 0, "reservations": 0}
+
+    def allocate(
+        self,
+        series: str,
+        day: date,
+        seed_sql: Optional[str] = None,
+        seed_params: Optional[dict] = None,
+    ) -> int:
+        """
+        (seri, gün) için sıradaki numarayı döndür.
+
+        `seed_sql`, günün sayaç satırı ilk kez oluşturulurken çalışır ve
+        eski yöntemle o gün zaten verilmiş en büyük numarayı döndürmelidir.
+        """
+        key = (series, day)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                last = self._reserve(series, day, seed_sql, seed_params or {})
+                # Önceki günlerin bloklarını bırak
+                self._blocks = {k: v for k, v in self._blocks.items() if k[1] >= day}
+                block = self._blocks[key] = [last - self.block_size + 1, last]
+            value = block[0]
+            block[0] += 1
+            self.stats["allocations"] += 1
+            return value
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "block_size": self.block_size,
+                "open_blocks": {f"{series}:{day.isoformat()}": block[1] - block[0] + 1 for (series, day), block in self._blocks.items()},
+            }
+
+    def _reserve(self, series: str, day: date, seed_sql: Optional[str], seed_params: dict) -> int:
+        """Ayrı bir transaction'da blok ayır (çağıranın session'ı commit edilmez / kilit tutulmaz)"""
+        params = {"series": series, "day": day, "block": self.block_size}
+        with db.engine.begin() as conn:
+            last = conn.execute(
+                db.text(
+                    """
+                    UPDATE PartNumberCounter WITH (ROWLOCK)
+                    SET LastValue = LastValue + :block, UpdatedAt = GETUTCDATE()
+                    OUTPUT inserted.LastValue
+                    WHERE Series = :series AND CounterDate = :day
+                    """
+                ),
+                params,
+            ).scalar()
+            if last is None:
+                base = conn.execute(db.text(seed_sql), seed_params).scalar() if seed_sql else 0
+                last = conn.execute(
+                    db.text(
+                        """
+                        MERGE PartNumberCounter WITH (HOLDLOCK) AS t
+                        USING (SELECT :series AS Series, :day AS CounterDate) AS s
+                        ON t.Series = s.Series AND t.CounterDate = s.CounterDate
+                        WHEN MATCHED THEN
+                            UPDATE SET LastValue = t.LastValue + :block, UpdatedAt = GETUTCDATE()
+                        WHEN NOT MATCHED THEN
+                            INSERT (Series, CounterDate, LastValue, UpdatedAt)
+                            VALUES (:series, :day, :base + :block, GETUTCDATE())
+                        OUTPUT inserted.LastValue;
+                        """
+                    ),
+                    {**params, "base": base or 0},
+                ).scalar()
+        self.stats["reservations"] += 1
+        return int(last)
+
+
+# Global instance
+part_number_allocator = PartNumberAllocator()
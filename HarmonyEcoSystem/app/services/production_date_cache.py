@@ -0,0 +1,103 @@
+"""
+Production Date Cache
+DollyEOLInfoBackup üretim tarihleri (EOLDATE) için sınırlı LRU önbellek.
+
+Bir dolly'nin üretim tarihi backup tablosuna yazıldıktan sonra değişmez;
+bu yüzden bulunan tarihler süresiz tutulur, yalnızca kapasite dolunca en
+eski kullanılan kayıt atılır. Bulunamayan DollyNo'lar önbelleğe alınmaz
+(backup satırı sonradan gelebilir). Eksikler tek chunk'lı IN sorgusuyla
+toplu getirilir.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import func
+
+from ..extensions import db
+from ..models import DollyEOLInfoBackup
+from .lifecycle_service import _chunks
+
+
+class ProductionDateCache:
+    """DollyNo -> üretim tarihi, LRU + toplu ön yükleme"""
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._dates: "OrderedDict[str, datetime]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "queries": 0}
+
+    def get_production_date(self, dolly_no: Optional[str]) -> Optional[datetime]:
+        if not dolly_no:
+            return None
+        return self.get_production_dates([dolly_no]).get(dolly_no)
+
+    def get_production_dates(self, dolly_nos: Iterable[Optional[str]]) -> Dict[str, datetime]:
+        """Verilen DollyNo'ların üretim tarihleri (bulunamayanlar sonuçta yer almaz)"""
+        wanted = {dolly_no for dolly_no in dolly_nos if dolly_no}
+        found: Dict[str, datetime] = {}
+        with self._lock:
+            for dolly_no in wanted:
+                value = self._dates.get(dolly_no)
+                if value is not None:
+                    self._dates.move_to_end(dolly_no)
+                    found[dolly_no] = value
+            missing = sorted(wanted - found.keys())
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += len(missing)
+
+        if missing:
+            fetched = self._fetch(missing)
+            found.update(fetched)
+            self._store(fetched)
+        return found
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._dates),
+                "max_size": self.max_size,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dates.clear()
+
+    def _fetch(self, dolly_nos: list) -> Dict[str, datetime]:
+        dates: Dict[str, datetime] = {}
+        try:
+            for chunk in _chunks(dolly_nos):
+                rows = db.session.query(
+                    DollyEOLInfoBackup.DollyNo,
+                    func.min(DollyEOLInfoBackup.EOLDATE),
+                ).filter(
+                    DollyEOLInfoBackup.DollyNo.in_(chunk),
+                    DollyEOLInfoBackup.EOLDATE.isnot(None),
+                ).group_by(DollyEOLInfoBackup.DollyNo).all()
+                with self._lock:
+                    self.stats["queries"] += 1
+                dates.update({dolly_no: eol_date for dolly_no, eol_date in rows})
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Backup tablosundan üretim tarihleri alınamadı ({len(dolly_nos)} dolly): {e}")
+        return dates
+
+    def _store(self, dates: Dict[str, datetime]) -> None:
+        with self._lock:
+            for dolly_no, value in dates.items():
+                self._dates[dolly_no] = value
+                self._dates.move_to_end(dolly_no)
+            while len(self._dates) > self.max_size:
+                self._dates.popitem(last=False)
+                self.stats["evictions"] += 1
+
+
+# Global instance
+production_date_cache = ProductionDateCache()
@@ -0,0 +1,156 @@
+"""
+Queue Grouping
+Kuyruk dolly'lerini aktif EOL gruplarına / projelere dağıtan derlenmiş eşleyici.
+
+Eşleyici grup tanımı versiyonu (GroupResolver.version) başına bir kez
+kurulur: istasyon Id -> grup haritası, grup adları için Aho–Corasick
+otomatı ve proje kuralları (V710 / MR / LLS / J74 / C5) için ikinci bir
+otomat. Aynı (EOLID, EOLName, CustomerReferans) üçlüsü tekrar hesaplanmaz,
+böylece list_queue_dollys_grouped tek doğrusal geçişe iner.
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .group_resolver import group_resolver
+
+OTHER_GROUP = "Diğer"
+_MEMO_LIMIT = 10000
+
+
+class MultiPatternMatcher:
+    """Aho–Corasick: metindeki tüm desenleri tek geçişte bulur (desen indekslerini döndürür)"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._goto: list = [{}]
+        self._fail: list = [0]
+        self._out: list = [set()]
+        for index, pattern in enumerate(self.patterns):
+            if pattern:
+                self._add(pattern, index)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, index: int) -> None:
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[node][char] = child
+            node = child
+        self._out[node].add(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        node = 0
+        found: Set[int] = set()
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._out[node]:
+                found |= self._out[node]
+        return found
+
+
+_PROJECT_TOKENS = ("V710", "MR", "LLS", "J74", "C5")
+_project_matcher = MultiPatternMatcher(_PROJECT_TOKENS)
+
+
+def extract_project_name(eol_name: Optional[str], customer_ref: Optional[str]) -> str:
+    """EOL adından (V710MR-EOL -> V710MR), yoksa müşteri referansından proje adı"""
+    if eol_name:
+        tokens = {_PROJECT_TOKENS[index] for index in _project_matcher.find(eol_name.upper())}
+        if "V710" in tokens:
+            if "MR" in tokens:
+                return "V710MR"
+            if "LLS" in tokens:
+                return "V710LLS"
+            return "V710"
+        if "J74" in tokens:
+            return "J74"
+        if "C5" in tokens:
+            return "C5"
+
+    if customer_ref:
+        tokens = {_PROJECT_TOKENS[index] for index in _project_matcher.find(customer_ref.upper())}
+        if "V710" in tokens:
+            return "V710MR" if "MR" in tokens else "V710"
+        if "J74" in tokens:
+            return "J74"
+        if "C5" in tokens:
+            return "C5"
+
+    return "OTHER"
+
+
+class QueueGroupMatcher:
+    """Tek grup tanımı versiyonu için derlenmiş dolly -> grup eşleyici"""
+
+    def __init__(self, version: int, group_names: Tuple[str, ...], station_groups: Dict[int, str]):
+        self.version = version
+        self.group_names = group_names
+        self.station_groups = station_groups
+        self._name_matcher = MultiPatternMatcher(group_names)
+        self._memo: Dict[Tuple, str] = {}
+
+    def group_for(self, eol_id, eol_name: Optional[str], customer_ref: Optional[str]) -> str:
+        key = (eol_id, eol_name, customer_ref)
+        group_name = self._memo.get(key)
+        if group_name is None:
+            group_name = self._resolve(eol_id, eol_name, customer_ref)
+            if len(self._memo) >= _MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[key] = group_name
+        return group_name
+
+    def _resolve(self, eol_id, eol_name: Optional[str], customer_ref: Optional[str]) -> str:
+        # 1) EOLID birebir bir grup istasyonu ise
+        try:
+            station_group = self.station_groups.get(int(eol_id))
+        except (TypeError, ValueError):
+            station_group = None
+        if station_group:
+            return station_group
+
+        # 2) Grup adı EOL adında geçiyorsa (ya da tersi) - ada göre ilk grup
+        if eol_name:
+            hits = self._name_matcher.find(eol_name)
+            hits.update(index for index, name in enumerate(self.group_names) if name and eol_name in name)
+            if hits:
+                return self.group_names[min(hits)]
+
+        # 3) Proje kuralları
+        return extract_project_name(eol_name, customer_ref)
+
+
+_lock = threading.Lock()
+_compiled: Optional[QueueGroupMatcher] = None
+
+
+def compiled_group_matcher() -> QueueGroupMatcher:
+    """Geçerli grup tanımı versiyonu için eşleyici (versiyon değişince yeniden derlenir)"""
+    global _compiled
+    version = group_resolver.current_version()
+    with _lock:
+        if _compiled is None or _compiled.version != version:
+            group_names, station_groups = group_resolver.active_station_groups()
+            _compiled = QueueGroupMatcher(version, group_names, station_groups)
+        return _compiled
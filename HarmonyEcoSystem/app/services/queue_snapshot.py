@@ -0,0 +1,365 @@
+"""
+Queue Snapshot
+DollyEOLInfo kuyruğunun process içi, indeksli kopyası.
+
+İlk kullanımda tablo bir kez okunur; sonraki çağrılarda yalnızca
+InsertedAt / RECEIPTID watermark'ından sonra gelen satırlar çekilir.
+Kuyruktan silme yapan yollar (submit / remove) commit sonrası `discard`
+çağırarak snapshot'ı güncel tutar. Diğer worker'ların yaptığı silmeler
+periyodik tam yenileme ile yakalanır; bu yenileme istek yolunda değil,
+monitor thread'inde (`reload_if_due`) çalışır.
+
+İlk kez görülen satırlar `register_callback` ile kaydedilen işleyicilere
+verilir (ör. EOL_READY lifecycle kaydı). Hangi yol yenilerse yenilesin
+yeni satırlar işleyiciye ulaşır; işleyici hata alırsa satırlar bir sonraki
+yenilemede tekrar verilir.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from ..extensions import db
+from ..utils.barcode import normalize_barcode
+
+
+@dataclass(frozen=True)
+class SnapshotRow:
+    """DollyEOLInfo satırının hafif kopyası (model ile aynı alan adları)."""
+
+    DollyNo: str
+    VinNo: str
+    DollyOrderNo: Optional[str]
+    CustomerReferans: Optional[str]
+    Adet: Optional[int]
+    EOLName: Optional[str]
+    EOLID: Optional[str]
+    EOLDATE: Optional[date]
+    EOLDollyBarcode: Optional[str]
+    RECEIPTID: Optional[int]
+    InsertedAt: Optional[datetime]
+
+
+_COLUMNS = """
+    DollyNo, VinNo, DollyOrderNo, CustomerReferans, Adet, EOLName, EOLID,
+    EOLDATE, EOLDollyBarcode, RECEIPTID, InsertedAt
+"""
+
+_TRAILING_DIGITS = re.compile(r"(\d+)$")
+
+
+def _sort_key(row: SnapshotRow) -> Tuple[int, str, str]:
+    """DollyService._dolly_sort_key ile aynı sıralama (sondaki rakam, DollyNo); VinNo sayfalama için sabit sıra sağlar"""
+    match = _TRAILING_DIGITS.search(str(row.DollyNo))
+    return (int(match.group(1)) if match else 0, row.DollyNo, row.VinNo or "")
+
+
+class QueueSnapshot:
+    """DollyNo / VinNo / EOLDollyBarcode / EOLName indeksli kuyruk görüntüsü"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rows: Dict[Tuple[str, str], SnapshotRow] = {}
+        self._by_dolly: Dict[str, Set[Tuple[str, str]]] = {}
+        self._by_vin: Dict[str, Tuple[str, str]] = {}
+        self._by_barcode: Dict[str, Set[Tuple[str, str]]] = {}
+        self._by_eol: Dict[str, Set[Tuple[str, str]]] = {}
+        self._sorted: Optional[List[SnapshotRow]] = None
+        self._sorted_keys: List[Tuple[int, str, str]] = []
+        self._loaded = False
+        self._watermark_inserted_at: Optional[datetime] = None
+        self._watermark_receipt_id: Optional[int] = None
+        self._last_refresh = 0.0
+        self._last_full_load = 0.0
+        self._callbacks: List[Callable[[List[SnapshotRow]], None]] = []
+        self._pending_new: List[SnapshotRow] = []  # İşleyicilere henüz ulaşmamış yeni satırlar
+        self._reload_discards: Optional[Set[Tuple[str, Optional[str]]]] = None  # Arka plan yenilemesi sürerken silinenler
+        self.refresh_interval = 1.0  # Artımlı sorgular arası minimum süre (saniye)
+        self.full_reload_interval = 300  # Diğer worker silmelerini yakalamak için tam yenileme (saniye)
+        self.stats = {"full_loads": 0, "incremental_refreshes": 0, "rows_ingested": 0, "rows_discarded": 0}
+
+    # ------------------------------------------------------------------ refresh
+    def register_callback(self, callback: Callable[[List[SnapshotRow]], None]) -> None:
+        """İlk kez görülen satırlar için işleyici kaydet"""
+        with self._lock:
+            if callback not in self._callbacks:
+                self._callbacks.append(callback)
+
+    def refresh(self, force: bool = False, allow_full_load: bool = True) -> List[SnapshotRow]:
+        """
+        Snapshot'ı artımlı güncelle; bu çağrıda ilk kez görülen satırları döndür.
+        Periyodik tam yenileme burada yapılmaz (bkz. `reload_if_due`); snapshot hiç
+        yüklenmemişse ve `allow_full_load` False ise hiçbir şey yapılmaz.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._loaded:
+                if not allow_full_load:
+                    return []
+                new_rows = self._full_load(now)
+            elif not force and now - self._last_refresh < self.refresh_interval:
+                new_rows = []
+            else:
+                new_rows = self._incremental_load(now)
+        return self._notify(new_rows)
+
+    def reload_if_due(self) -> List[SnapshotRow]:
+        """
+        Yüklü snapshot'ı tam yenileme zamanı geldiyse yeniden oku (monitor thread'i çağırır).
+        Tablo kilit dışında okunur; bu sırada yapılan `discard`'lar yeni görüntüye taşınmaz.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not self._loaded
+                or self._reload_discards is not None
+                or now - self._last_full_load < self.full_reload_interval
+            ):
+                return self._notify([])
+            self._reload_discards = set()
+
+        try:
+            fresh = self._fetch_all()
+        except Exception:
+            with self._lock:
+                self._reload_discards = None
+            raise
+
+        with self._lock:
+            discards, self._reload_discards = self._reload_discards, None
+            fresh = [
+                row for row in fresh
+                if (row.DollyNo, row.VinNo) not in discards and (row.DollyNo, None) not in discards
+            ]
+            new_rows = self._apply_full_load(fresh, now)
+            # Okuma sürerken gelen satırlar
+            new_rows += self._incremental_load(now)
+        return self._notify(new_rows)
+
+    def _notify(self, new_rows: List[SnapshotRow]) -> List[SnapshotRow]:
+        """Yeni satırları (ve önceki hatalı çağrıdan kalanları) işleyicilere ver; kilit dışında çağrılır"""
+        with self._lock:
+            rows = self._pending_new + new_rows
+            self._pending_new = []
+            callbacks = list(self._callbacks)
+        if rows:
+            try:
+                for callback in callbacks:
+                    callback(rows)
+            except Exception:
+                with self._lock:
+                    self._pending_new = rows + self._pending_new
+                raise
+        return new_rows
+
+    def _full_load(self, now: float) -> List[SnapshotRow]:
+        return self._apply_full_load(self._fetch_all(), now)
+
+    @staticmethod
+    def _fetch_all() -> List[SnapshotRow]:
+        result = db.session.execute(text(f"SELECT {_COLUMNS} FROM DollyEOLInfo WITH (NOLOCK)"))
+        return [SnapshotRow(**row._mapping) for row in result]
+
+    def _apply_full_load(self, fresh: List[SnapshotRow], now: float) -> List[SnapshotRow]:
+        previous = set(self._rows)
+        self._clear()
+        for row in fresh:
+            self._index(row)
+        self._loaded = True
+        self._last_full_load = now
+        self._last_refresh = now
+        self.stats["full_loads"] += 1
+        return [row for row in fresh if (row.DollyNo, row.VinNo) not in previous]
+
+    def _incremental_load(self, now: float) -> List[SnapshotRow]:
+        conditions = []
+        params = {}
+        if self._watermark_inserted_at is not None:
+            # >= : aynı zaman damgasıyla sonradan yazılan satırları kaçırmamak için
+            conditions.append("InsertedAt >= :since_ts")
+            params["since_ts"] = self._watermark_inserted_at
+        if self._watermark_receipt_id is not None:
+            conditions.append("RECEIPTID > :since_rid")
+            params["since_rid"] = self._watermark_receipt_id
+        if not conditions:
+            return self._full_load(now)
+
+        query = text(f"SELECT {_COLUMNS} FROM DollyEOLInfo WITH (NOLOCK) WHERE {' OR '.join(conditions)}")
+        new_rows = []
+        for mapping in db.session.execute(query, params):
+            row = SnapshotRow(**mapping._mapping)
+            if (row.DollyNo, row.VinNo) not in self._rows:
+                new_rows.append(row)
+            self._index(row)
+        self._last_refresh = now
+        self.stats["incremental_refreshes"] += 1
+        return new_rows
+
+    # ------------------------------------------------------------------ mutations
+    @staticmethod
+    def to_row(record) -> SnapshotRow:
+        """Model nesnesini (commit öncesi, ek sorgu olmadan) snapshot satırına çevir"""
+        if isinstance(record, SnapshotRow):
+            return record
+        return SnapshotRow(
+            DollyNo=record.DollyNo,
+            VinNo=record.VinNo,
+            DollyOrderNo=getattr(record, "DollyOrderNo", None),
+            CustomerReferans=getattr(record, "CustomerReferans", None),
+            Adet=getattr(record, "Adet", None),
+            EOLName=getattr(record, "EOLName", None),
+            EOLID=getattr(record, "EOLID", None),
+            EOLDATE=getattr(record, "EOLDATE", None),
+            EOLDollyBarcode=getattr(record, "EOLDollyBarcode", None),
+            RECEIPTID=getattr(record, "RECEIPTID", None),
+            InsertedAt=getattr(record, "InsertedAt", None),
+        )
+
+    def upsert(self, record) -> None:
+        """Bu process'in eklediği / geri yüklediği kaydı snapshot'a yaz"""
+        row = self.to_row(record)
+        with self._lock:
+            if self._loaded:
+                self._index(row)
+
+    def discard(self, dolly_no, vin_no: Optional[str] = None) -> None:
+        """Kuyruktan çıkan dolly'yi (ya da tek VIN'i) snapshot'tan sil"""
+        dolly_key = str(dolly_no)
+        with self._lock:
+            if self._reload_discards is not None:
+                self._reload_discards.add((dolly_key, vin_no))
+            if vin_no is not None:
+                keys: Iterable[Tuple[str, str]] = [(dolly_key, vin_no)]
+            else:
+                keys = list(self._by_dolly.get(dolly_key, ()))
+            for key in keys:
+                self._unindex(key)
+
+    def discard_many(self, pairs: Iterable[Tuple[str, Optional[str]]]) -> None:
+        with self._lock:
+            for dolly_no, vin_no in pairs:
+                self.discard(dolly_no, vin_no)
+
+    def invalidate(self) -> None:
+        """Bir sonraki erişimde tam yenilemeye zorla"""
+        with self._lock:
+            self._loaded = False
+
+    # ------------------------------------------------------------------ lookups
+    def all_sorted(self) -> List[SnapshotRow]:
+        with self._lock:
+            return list(self._ensure_sorted())
+
+    def page(self, after: Optional[Tuple[int, str, str]], limit: int) -> Tuple[List[SnapshotRow], bool]:
+        """Keyset sayfa: `after` anahtarından sonraki en fazla `limit` satır ve devamı olup olmadığı"""
+        with self._lock:
+            rows = self._ensure_sorted()
+            start = bisect.bisect_right(self._sorted_keys, tuple(after)) if after else 0
+            return rows[start:start + limit], start + limit < len(rows)
+
+    @staticmethod
+    def sort_key(row: SnapshotRow) -> Tuple[int, str, str]:
+        return _sort_key(row)
+
+    def by_vin(self, vin_no: str) -> Optional[SnapshotRow]:
+        with self._lock:
+            key = self._by_vin.get(vin_no)
+            return self._rows.get(key) if key else None
+
+    def by_dolly(self, dolly_no: str) -> List[SnapshotRow]:
+        with self._lock:
+            return self._rows_for(self._by_dolly.get(str(dolly_no), ()))
+
+    def by_barcode(self, barcode: str) -> List[SnapshotRow]:
+        with self._lock:
+            return self._rows_for(self._by_barcode.get(normalize_barcode(barcode), ()))
+
+    def by_eol(self, eol_name: str) -> List[SnapshotRow]:
+        with self._lock:
+            return self._rows_for(self._by_eol.get(eol_name, ()))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "row_count": len(self._rows),
+                "loaded": self._loaded,
+                "watermark_inserted_at": self._watermark_inserted_at.isoformat() if self._watermark_inserted_at else None,
+                "watermark_receipt_id": self._watermark_receipt_id,
+            }
+
+    # ------------------------------------------------------------------ internals
+    def _ensure_sorted(self) -> List[SnapshotRow]:
+        if self._sorted is None:
+            self._sorted = sorted(self._rows.values(), key=_sort_key)
+            self._sorted_keys = [_sort_key(row) for row in self._sorted]
+        return self._sorted
+
+    def _rows_for(self, keys: Iterable[Tuple[str, str]]) -> List[SnapshotRow]:
+        rows = [self._rows[key] for key in keys if key in self._rows]
+        rows.sort(key=lambda row: row.VinNo or "")
+        return rows
+
+    def _clear(self) -> None:
+        # Watermark yeni görüntüden yeniden hesaplanır
+        self._watermark_inserted_at = None
+        self._watermark_receipt_id = None
+        self._rows.clear()
+        self._by_dolly.clear()
+        self._by_vin.clear()
+        self._by_barcode.clear()
+        self._by_eol.clear()
+        self._sorted = None
+
+    def _index(self, row: SnapshotRow) -> None:
+        key = (row.DollyNo, row.VinNo)
+        if key in self._rows:
+            self._unindex(key, count=False)
+        self._rows[key] = row
+        self._by_dolly.setdefault(row.DollyNo, set()).add(key)
+        self._by_vin[row.VinNo] = key
+        if row.EOLDollyBarcode:
+            self._by_barcode.setdefault(normalize_barcode(row.EOLDollyBarcode), set()).add(key)
+        if row.EOLName:
+            self._by_eol.setdefault(row.EOLName, set()).add(key)
+        if row.InsertedAt and (self._watermark_inserted_at is None or row.InsertedAt > self._watermark_inserted_at):
+            self._watermark_inserted_at = row.InsertedAt
+        if row.RECEIPTID is not None and (self._watermark_receipt_id is None or row.RECEIPTID > self._watermark_receipt_id):
+            self._watermark_receipt_id = row.RECEIPTID
+        self._sorted = None
+        self.stats["rows_ingested"] += 1
+
+    def _unindex(self, key: Tuple[str, str], count: bool = True) -> None:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._discard_key(self._by_dolly, row.DollyNo, key)
+        if self._by_vin.get(row.VinNo) == key:
+            del self._by_vin[row.VinNo]
+        if row.EOLDollyBarcode:
+            self._discard_key(self._by_barcode, normalize_barcode(row.EOLDollyBarcode), key)
+        if row.EOLName:
+            self._discard_key(self._by_eol, row.EOLName, key)
+        self._sorted = None
+        if count:
+            self.stats["rows_discarded"] += 1
+
+    @staticmethod
+    def _discard_key(index: Dict[str, Set[Tuple[str, str]]], value: str, key: Tuple[str, str]) -> None:
+        keys = index.get(value)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del index[value]
+
+
+# Global instance
+queue_snapshot = QueueSnapshot()
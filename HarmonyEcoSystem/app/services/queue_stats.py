@@ -0,0 +1,105 @@
+"""
+Queue Stats
+Dashboard kuyruk istatistiklerini (get_queue_stats) tek bir gruplu SQL
+sorgusuyla hesaplar ve kısa süre önbellekte tutar.
+
+DollyEOLInfo, güncel lifecycle durumuyla birleştirilip (EOLID, EOLName,
+CustomerReferans) bazında toplanır; az sayıdaki toplam satırı derlenmiş
+grup eşleyicisi (queue_grouping) ile gruplara / projelere dağıtılır.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..extensions import db
+from .lifecycle_service import LifecycleService, _LATEST_LIFECYCLE_SQL
+from .queue_grouping import OTHER_GROUP, compiled_group_matcher
+from .schema_registry import schema_registry
+
+_STATS_SQL = """
+    SELECT e.EOLID, e.EOLName, e.CustomerReferans,
+           GROUPING(e.EOLID) AS IsTotal,
+           COUNT(DISTINCT e.DollyNo) AS DollyCount,
+           MIN(e.EOLDATE) AS FirstDate,
+           MAX(e.EOLDATE) AS LastDate,
+           SUM(CASE WHEN COALESCE(s.Status, :ready_status) = :ready_status THEN 1 ELSE 0 END) AS ReadyCount,
+           SUM(CASE WHEN s.Status IN (:scan_status, :waiting_status) THEN 1 ELSE 0 END) AS InProgressCount
+    FROM DollyEOLInfo e WITH (NOLOCK)
+    LEFT JOIN {status_source} s ON s.DollyNo = e.DollyNo
+    GROUP BY GROUPING SETS ((e.EOLID, e.EOLName, e.CustomerReferans), ())
+"""
+
+
+class QueueStatsEngine:
+    """Kısa TTL'li, SQL tarafında toplanan kuyruk istatistikleri"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self.ttl = 5  # saniye
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, force: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._cached is not None and now - self._computed_at < self.ttl:
+                self.stats["hits"] += 1
+                return self._copy(self._cached)
+            self.stats["misses"] += 1
+            self._cached = self._compute()
+            self._computed_at = now
+            return self._copy(self._cached)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cached = None
+
+    def _status_source(self) -> str:
+        if schema_registry.has_feature("current_status_projection"):
+            return "DollyCurrentStatus WITH (NOLOCK)"
+        return f"({_LATEST_LIFECYCLE_SQL.format(where='')})"
+
+    def _compute(self) -> Dict[str, Any]:
+        rows = db.session.execute(
+            db.text(_STATS_SQL.format(status_source=self._status_source())),
+            {
+                # Henüz lifecycle kaydı olmayan satırlar listelendiğinde EOL_READY alır
+                "ready_status": LifecycleService.Status.EOL_READY,
+                "scan_status": LifecycleService.Status.SCAN_CAPTURED,
+                "waiting_status": LifecycleService.Status.WAITING_SUBMIT,
+            },
+        ).fetchall()
+
+        matcher = compiled_group_matcher()
+        projects: Dict[str, Dict[str, Any]] = {}
+        for group_name in (*matcher.group_names, OTHER_GROUP):
+            projects.setdefault(group_name, {"name": group_name, "count": 0, "first_date": None, "last_date": None})
+
+        stats = {"total_dollys": 0, "projects": [], "ready_for_submit": 0, "in_progress": 0}
+        for row in rows:
+            if row.IsTotal:
+                stats["total_dollys"] = row.DollyCount or 0
+                continue
+            name = matcher.group_for(row.EOLID, row.EOLName, row.CustomerReferans)
+            project = projects.setdefault(name, {"name": name, "count": 0, "first_date": None, "last_date": None})
+            project["count"] += row.DollyCount or 0
+            if row.FirstDate and (project["first_date"] is None or row.FirstDate < project["first_date"]):
+                project["first_date"] = row.FirstDate
+            if row.LastDate and (project["last_date"] is None or row.LastDate > project["last_date"]):
+                project["last_date"] = row.LastDate
+            stats["ready_for_submit"] += row.ReadyCount or 0
+            stats["in_progress"] += row.InProgressCount or 0
+
+        stats["projects"] = list(projects.values())
+        return stats
+
+    @staticmethod
+    def _copy(stats: Dict[str, Any]) -> Dict[str, Any]:
+        return {**stats, "projects": [dict(project) for project in stats["projects"]]}
+
+
+# Global instance
+queue_stats = QueueStatsEngine()
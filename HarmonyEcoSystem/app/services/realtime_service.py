@@ -1,47 +1,127 @@
 """
 Real-time event broadcasting service using Flask-SocketIO
+
+Events go to rooms instead of every connected client:
+- ``user:<Username>`` and ``role:<operator|admin>`` are joined on connect (server side)
+- ``group:<id>``, ``eol:<EOLName>`` and ``part:<PartNumber>`` are joined with the
+  ``subscribe`` event, based on what the client's screen shows. Subscribing to
+  an EOL also joins the rooms of the groups that EOL belongs to.
+
+The admin room receives every scoped event. Events without a known scope are
+still broadcast to everyone.
 """
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Set
 from datetime import datetime
+
+from flask import current_app, request
+from flask_login import current_user
+from flask_socketio import join_room, leave_room
+
 from ..extensions import socketio
 
+ROLE_ADMIN = "admin"
+ROLE_OPERATOR = "operator"
+MAX_SUBSCRIPTIONS = 200  # Bir istemcinin katılabileceği kapsam odası sayısı
+
+# sid -> client'ın subscribe ile katıldığı kapsam odaları
+_subscriptions: Dict[str, Set[str]] = {}
+
+
+def user_room(username: str) -> str:
+    return f"user:{username}"
+
+
+def role_room(role: str) -> str:
+    return f"role:{role}"
+
+
+def group_room(group_id: Any) -> str:
+    return f"group:{group_id}"
+
+
+def eol_room(eol_name: str) -> str:
+    return f"eol:{eol_name}"
+
+
+def part_room(part_number: str) -> str:
+    return f"part:{part_number}"
+
+
+def _scope_rooms(data: Dict[str, Any]) -> Set[str]:
+    """Payload'daki grup / EOL / PartNumber alanlarından hedef odaları çıkar"""
+    rooms: Set[str] = set()
+    if data.get("group_id") is not None:
+        rooms.add(group_room(data["group_id"]))
+    eol_names = set(data.get("eol_names") or ()) | set((data.get("eol_distribution") or {}).keys())
+    if data.get("eol_name"):
+        eol_names.add(data["eol_name"])
+    rooms.update(eol_room(name) for name in eol_names if name and name != "UNKNOWN")
+    if data.get("part_number"):
+        rooms.add(part_room(data["part_number"]))
+    return rooms
+
+
+def _emit(event: str, payload: Dict[str, Any], rooms: Optional[Iterable[str]] = None) -> None:
+    """`rooms` None ise herkese, değilse yalnızca verilen odalara gönder"""
+    if rooms is None:
+        socketio.emit(event, payload, namespace='/')
+        return
+    targets = sorted(set(rooms))
+    if targets:
+        socketio.emit(event, payload, to=targets, namespace='/')
+
 
 class RealtimeService:
     """Service for broadcasting real-time updates to connected clients"""
-    
+
     @staticmethod
-    def emit_dolly_update(event_type: str, data: Optional[Dict[str, Any]] = None, room: Optional[str] = None):
+    def emit_dolly_update(
+        event_type: str,
+        data: Optional[Dict[str, Any]] = None,
+        room: Optional[str] = None,
+        roles: Iterable[str] = (),
+    ):
         """
         Broadcast dolly-related updates to clients
-        
+
         Args:
             event_type: Type of update (e.g., 'manual_collection', 'group_created', 'task_updated')
             data: Additional data to send with the event
-            room: Specific room to broadcast to (None = broadcast to all)
+            room: Specific room to broadcast to (None = rooms derived from data)
+            roles: Roles that should also receive the event (e.g. operator task list)
         """
         payload = {
             'type': event_type,
             'data': data or {},
             'timestamp': datetime.now().isoformat()
         }
-        
-        # Emit to all connected clients (no room or broadcast parameter needed)
-        socketio.emit('dolly_update', payload, namespace='/')
-    
+
+        rooms = {room} if room else _scope_rooms(payload['data'])
+        if not rooms and not roles:
+            # Kapsamı bilinmeyen olay: herkese
+            _emit('dolly_update', payload)
+            return
+        rooms.update(role_room(role) for role in roles)
+        rooms.add(role_room(ROLE_ADMIN))
+        _emit('dolly_update', payload, rooms)
+
     @staticmethod
-    def emit_task_update(task_id: int, status: str, data: Optional[Dict[str, Any]] = None):
-        """Broadcast task status updates"""
+    def emit_task_update(task_id: int, status: str, data: Optional[Dict[str, Any]] = None, part_number: Optional[str] = None):
+        """Broadcast task status updates (operator task list + the task's PartNumber room)"""
         payload = {
             'type': 'task_updated',
             'task_id': task_id,
             'status': status,
             'data': data or {}
         }
-        socketio.emit('task_update', payload, namespace='/')
-    
+        rooms = {role_room(ROLE_OPERATOR), role_room(ROLE_ADMIN)}
+        if part_number:
+            rooms.add(part_room(part_number))
+        _emit('task_update', payload, rooms)
+
     @staticmethod
     def emit_manual_collection(group_id: int, group_name: str, dolly_count: int, actor: str):
-        """Broadcast manual collection event"""
+        """Broadcast manual collection event (creates a task: operator task list must refresh)"""
         payload = {
             'type': 'manual_collection',
             'group_id': group_id,
@@ -49,18 +129,18 @@ class RealtimeService:
             'dolly_count': dolly_count,
             'actor': actor
         }
-        socketio.emit('dolly_update', payload, namespace='/')
-    
+        _emit('dolly_update', payload, {group_room(group_id), role_room(ROLE_OPERATOR), role_room(ROLE_ADMIN)})
+
     @staticmethod
     def emit_group_created(group_id: int, group_name: str):
-        """Broadcast group creation event"""
+        """Broadcast group creation event (group management is admin only)"""
         payload = {
             'type': 'group_created',
             'group_id': group_id,
             'group_name': group_name
         }
-        socketio.emit('dolly_update', payload, namespace='/')
-    
+        _emit('dolly_update', payload, {role_room(ROLE_ADMIN)})
+
     @staticmethod
     def emit_shipment_update(shipment_tag: str, status: str):
         """Broadcast shipment status updates"""
@@ -69,22 +149,82 @@ class RealtimeService:
             'shipment_tag': shipment_tag,
             'status': status
         }
-        socketio.emit('dolly_update', payload, namespace='/')
-    
+        _emit('dolly_update', payload, {role_room(ROLE_OPERATOR), role_room(ROLE_ADMIN)})
+
     @staticmethod
-    def emit_notification(message: str, notification_type: str = 'info', target_user: Optional[str] = None):
+    def emit_notification(
+        message: str,
+        notification_type: str = 'info',
+        target_user: Optional[str] = None,
+        roles: Iterable[str] = (),
+    ):
         """
         Send notification to users
-        
+
         Args:
             message: Notification message
             notification_type: 'info', 'success', 'warning', 'error'
             target_user: Specific user to notify (None = all users)
+            roles: Limit the notification to these roles (ignored when target_user is set)
         """
         payload = {
             'type': 'notification',
             'message': message,
             'notification_type': notification_type
         }
-        
-        socketio.emit('notification', payload, namespace='/')
+
+        if target_user:
+            _emit('notification', payload, {user_room(target_user)})
+        elif roles:
+            _emit('notification', payload, {role_room(role) for role in roles})
+        else:
+            _emit('notification', payload)
+
+
+# ============================================
+# Socket.IO room handlers
+# ============================================
+
+@socketio.on('connect')
+def _on_connect(auth=None):
+    """Giriş yapmış kullanıcıyı kendi ve rolünün odasına al"""
+    if not current_user.is_authenticated:
+        return
+    join_room(user_room(current_user.Username))
+    role = current_user.role.Name.lower() if current_user.role and current_user.role.Name else None
+    if role:
+        join_room(role_room(role))
+
+
+@socketio.on('subscribe')
+def _on_subscribe(data=None):
+    """
+    Ekranın gösterdiği kapsamlara abone ol; önceki kapsam abonelikleri bırakılır.
+    Payload: {"groups": [...], "eols": [...], "parts": [...]}
+    """
+    data = data or {}
+    eols = {str(name) for name in data.get('eols') or () if name}
+    rooms = {group_room(group_id) for group_id in data.get('groups') or () if group_id is not None}
+    rooms.update(eol_room(name) for name in eols)
+    rooms.update(part_room(str(part)) for part in data.get('parts') or () if part)
+    if eols:
+        try:
+            from .group_resolver import group_resolver
+
+            rooms.update(group_room(group_id) for group_id in group_resolver.group_ids_for_eols(eols))
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Group rooms could not be resolved for subscription: {e}")
+    rooms = set(sorted(rooms)[:MAX_SUBSCRIPTIONS])
+
+    previous = _subscriptions.get(request.sid, set())
+    for room in previous - rooms:
+        leave_room(room)
+    for room in rooms - previous:
+        join_room(room)
+    _subscriptions[request.sid] = rooms
+    return {'rooms': len(rooms)}
+
+
+@socketio.on('disconnect')
+def _on_disconnect():
+    _subscriptions.pop(request.sid, None)
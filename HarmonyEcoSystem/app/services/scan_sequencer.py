@@ -0,0 +1,123 @@
+"""
+Scan Sequencer
+Loading session başına ScanOrder üretimi (forklift ve manuel toplama).
+
+Session ilk kullanıldığında sayaç veritabanından (MAX ScanOrder) bir kez
+tohumlanır, sonraki taramalar bellekteki sayacı kilit altında ilerletir;
+her taramada ayrı MAX sorgusu yapılmaz. Aktif (scanned) taramalarda
+(LoadingSessionId, ScanOrder) tekilliği migration 028'deki indexed view
+ile veritabanında da korunur: başka bir worker aynı sırayı aldıysa insert
+savepoint içinde geri alınır, sayaç yeniden tohumlanır ve tekrar denenir.
+Boşta kalan session sayaçları kısa sürede düşer; böylece diğer worker'ların
+ilerlettiği session'lar bir sonraki taramada yeniden tohumlanır.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+
+_SEED_SQL = """
+    SELECT ISNULL(MAX(ScanOrder), 0)
+    FROM DollySubmissionHold
+    WHERE LoadingSessionId = :session_id {status_filter}
+"""
+
+
+class ScanOrderSequencer:
+    """Session bazlı, bellekte ilerleyen ScanOrder sayacı"""
+
+    def __init__(self, idle_ttl: float = 30, max_sessions: int = 2000, retries: int = 3):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()  # session -> [son sıra, son kullanım]
+        self.stats = {"issued": 0, "seeds": 0, "conflicts": 0}
+
+    def next_order(self, session_id: str, scanned_only: bool = False) -> int:
+        """Session'ın sıradaki ScanOrder değeri (gerekirse DB'den tohumlanır)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and now - entry[1] < self.idle_ttl:
+                entry[0] += 1
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+                self.stats["issued"] += 1
+                return entry[0]
+
+        seed = self._seed(session_id, scanned_only)
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            # Tohumlama sırasında başka thread ilerlettiyse büyük olanı kullan
+            last = max(seed, entry[0] if entry is not None and now - entry[1] < self.idle_ttl else 0)
+            self._sessions[session_id] = [last + 1, now]
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            self.stats["issued"] += 1
+            return last + 1
+
+    def claim(
+        self,
+        session_id: str,
+        insert_rows: Callable[[int], Any],
+        scanned_only: bool = False,
+    ) -> Tuple[int, Any]:
+        """
+        Sıra al ve `insert_rows(scan_order)` ile satırları savepoint içinde yaz.
+        Tekillik ihlalinde sayaç yeniden tohumlanır ve tekrar denenir.
+        """
+        for attempt in range(self.retries + 1):
+            scan_order = self.next_order(session_id, scanned_only)
+            try:
+                with db.session.begin_nested():
+                    result = insert_rows(scan_order)
+                return scan_order, result
+            except IntegrityError:
+                with self._lock:
+                    self._sessions.pop(session_id, None)
+                    self.stats["conflicts"] += 1
+                current_app.logger.warning(
+                    f"⚠️ ScanOrder çakışması: session={session_id} order={scan_order} (deneme {attempt + 1})"
+                )
+        raise RuntimeError(f"ScanOrder ayrılamadı (session={session_id})")
+
+    def release(self, session_id: Optional[str], scan_order: Optional[int]) -> None:
+        """Son tarama geri alındıysa sayacı bir geri sar"""
+        if not session_id or scan_order is None:
+            return
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[0] == scan_order:
+                entry[0] -= 1
+
+    def forget(self, session_id: Optional[str]) -> None:
+        """Session'ın aktif taramaları kapandı (submit vb.); sonraki tarama yeniden tohumlanır"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "sessions": len(self._sessions)}
+
+    def _seed(self, session_id: str, scanned_only: bool) -> int:
+        status_filter = "AND Status = 'scanned'" if scanned_only else ""
+        value = db.session.execute(
+            db.text(_SEED_SQL.format(status_filter=status_filter)),
+            {"session_id": session_id},
+        ).scalar()
+        with self._lock:
+            self.stats["seeds"] += 1
+        return int(value or 0)
+
+
+# Global instance
+scan_sequencer = ScanOrderSequencer()
@@ -0,0 +1,135 @@
+"""
+Schema Capability Registry
+Opsiyonel tablo / kolonların (migration 008-030) varlığını uygulama
+başlangıcında bir kez tespit eder ve bellekte tutar.
+
+Servisler her istekte SQLAlchemy inspector ile katalog sorgusu yapmak
+yerine bu kayda bakar. Migration çalıştırıldıktan sonra yeniden tespit
+için admin endpoint'i (/api/admin/schema-capabilities/refresh) kullanılır.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import inspect as sa_inspect
+
+from ..extensions import db
+
+# Kolonları ayrıca kontrol edilen tablolar
+OPTIONAL_COLUMNS: Dict[str, List[str]] = {
+    "DollyEOLInfo": ["EOLDollyBarcode", "RECEIPTID", "InsertedAt"],
+    "DollySubmissionHold": [
+        "PartNumber", "ScanOrder", "SeferNumarasi", "PlakaNo", "LoadingSessionId",
+        "LoadingCompletedAt", "ASNSent", "IrsaliyeSent", "InsertedAt",
+    ],
+    "SeferDollyEOL": ["PartNumber", "Lokasyon", "DollyOrderNo"],
+    "DollyGroupEOL": ["ShippingTag"],
+    "ForkliftLoginSession": ["IsAdmin", "Role"],
+    "UserAccount": ["Barcode"],
+}
+
+# Özellik adı -> gereken tablolar / (tablo, kolon) çiftleri
+FEATURES: Dict[str, Dict[str, list]] = {
+    "dolly_groups": {"tables": ["DollyGroup", "DollyGroupEOL"]},
+    "group_shipping_tag": {"columns": [("DollyGroupEOL", "ShippingTag")]},
+    "eol_barcode": {"columns": [("DollyEOLInfo", "EOLDollyBarcode")]},
+    "lifecycle": {"tables": ["DollyLifecycle"]},
+    "part_number_system": {"tables": ["WebOperatorTask"], "columns": [("DollySubmissionHold", "PartNumber")]},
+    "sefer_lokasyon": {"columns": [("SeferDollyEOL", "Lokasyon")]},
+    "shipment_fields": {"columns": [("DollySubmissionHold", "ScanOrder"), ("DollySubmissionHold", "LoadingSessionId")]},
+    "forklift_sessions": {"tables": ["ForkliftLoginSession"]},
+    "forklift_admin_role": {"columns": [("ForkliftLoginSession", "IsAdmin"), ("ForkliftLoginSession", "Role")]},
+    "user_barcode": {"columns": [("UserAccount", "Barcode")]},
+    "queue_removed_archive": {"tables": ["DollyQueueRemoved"]},
+    "shipping_sent_flags": {"columns": [("DollySubmissionHold", "ASNSent"), ("DollySubmissionHold", "IrsaliyeSent")]},
+    "sefer_part_number": {"columns": [("SeferDollyEOL", "PartNumber")]},
+    "sefer_dolly_order_no": {"columns": [("SeferDollyEOL", "DollyOrderNo")]},
+    "hold_inserted_at": {"columns": [("DollySubmissionHold", "InsertedAt")]},
+    "production_date_backup": {"tables": ["DollyEOLInfoBackup"]},
+    "current_status_projection": {"tables": ["DollyCurrentStatus"]},
+    "cache_version": {"tables": ["CacheVersion"]},
+    "part_number_counter": {"tables": ["PartNumberCounter"]},
+    "eol_inserted_at": {"columns": [("DollyEOLInfo", "InsertedAt")]},
+    "change_feed_checkpoint": {"tables": ["ChangeFeedCheckpoint"]},
+}
+
+
+class SchemaRegistry:
+    """Veritabanı şema yeteneklerinin process içi kaydı"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Set[str] = set()
+        self._columns: Dict[str, Set[str]] = {}
+        self.probed_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def probe(self) -> Dict:
+        """Katalogu tara (app context içinde çağrılmalı)"""
+        try:
+            inspector = sa_inspect(db.engine)
+            tables = set(inspector.get_table_names())
+            columns = {
+                table: {column["name"] for column in inspector.get_columns(table)}
+                for table in OPTIONAL_COLUMNS
+                if table in tables
+            }
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        with self._lock:
+            self._tables = tables
+            self._columns = columns
+            self.probed_at = datetime.utcnow()
+            self.last_error = None
+        return self.snapshot()
+
+    def _ensure_probed(self) -> bool:
+        if self.probed_at is not None:
+            return True
+        try:
+            self.probe()
+            return True
+        except Exception:
+            return False
+
+    def has_table(self, table_name: str) -> bool:
+        if not self._ensure_probed():
+            return False
+        return table_name in self._tables
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        if not self._ensure_probed():
+            return False
+        return column_name in self._columns.get(table_name, ())
+
+    def has_feature(self, feature: str) -> bool:
+        spec = FEATURES.get(feature)
+        if spec is None:
+            return False
+        return all(self.has_table(table) for table in spec.get("tables", [])) and all(
+            self.has_column(table, column) for table, column in spec.get("columns", [])
+        )
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            probed = self.probed_at is not None
+            tables = sorted(
+                {table for spec in FEATURES.values() for table in spec.get("tables", [])} | set(OPTIONAL_COLUMNS)
+            )
+            return {
+                "probed_at": self.probed_at.isoformat() if self.probed_at else None,
+                "last_error": self.last_error,
+                "tables": {table: table in self._tables for table in tables},
+                "columns": {
+                    table: {column: column in self._columns.get(table, ()) for column in columns}
+                    for table, columns in OPTIONAL_COLUMNS.items()
+                },
+                "features": {feature: self.has_feature(feature) for feature in FEATURES} if probed else {},
+            }
+
+
+# Global instance
+schema_registry = SchemaRegistry()
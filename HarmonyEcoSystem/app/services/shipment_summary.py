@@ -0,0 +1,158 @@
+"""
+Shipment Summary
+Operatörün bekleyen sevkiyat (loading_completed) ekranı ve sevkiyat detayı.
+
+Her iki görünüm de tek sorguyla kurulur: DollySubmissionHold satırları,
+dolly başına ilk DollyEOLInfo kaydıyla (OUTER APPLY) birleştirilip
+session + ScanOrder sırasıyla okunur ve tek Python geçişinde gruplanır.
+Bekleyen sevkiyat listesi önbellekte tutulur; session hold'larını
+değiştiren yollar (forklift tamamlama, operatör sevkiyatı, görev submit'i,
+ASN / manuel tamamlama, görevden dolly çıkarma) commit sonrası `invalidate`
+çağırır. Diğer worker'ların değişiklikleri kısa TTL ile yakalanır.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..extensions import db
+
+_SESSION_ROWS_SQL = """
+    SELECT h.Id, h.LoadingSessionId, h.Status, h.TerminalUser, h.DollyNo, h.VinNo, h.ScanOrder,
+           h.CreatedAt, h.LoadingCompletedAt, e.CustomerReferans, e.EOLName, e.Adet
+    FROM DollySubmissionHold h
+    OUTER APPLY (
+        SELECT TOP 1 i.CustomerReferans, i.EOLName, i.Adet
+        FROM DollyEOLInfo i WITH (NOLOCK)
+        WHERE i.DollyNo = h.DollyNo
+        ORDER BY i.VinNo
+    ) e
+    WHERE {where}
+    ORDER BY h.LoadingSessionId, h.ScanOrder, h.Id
+"""
+
+_PENDING_WHERE = """
+    h.LoadingSessionId IN (
+        SELECT LoadingSessionId FROM DollySubmissionHold
+        WHERE Status = 'loading_completed' AND LoadingSessionId IS NOT NULL
+    )
+"""
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class ShipmentSummaryEngine:
+    """Bekleyen sevkiyat özetleri (önbellekli) ve sevkiyat detayı"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        self._computed_at = 0.0
+        self.ttl = 30  # saniye
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def pending(self, force: bool = False) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._pending is not None and now - self._computed_at < self.ttl:
+                self.stats["hits"] += 1
+                return self._copy(self._pending)
+            self.stats["misses"] += 1
+            self._pending = self._compute_pending()
+            self._computed_at = now
+            return self._copy(self._pending)
+
+    def details(self, loading_session_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows("h.LoadingSessionId = :session_id", {"session_id": loading_session_id})
+        if not rows:
+            return None
+        first = rows[0]
+        return {
+            "loadingSessionId": loading_session_id,
+            "status": first.Status,
+            "forkliftUser": first.TerminalUser,
+            "dollyCount": len(rows),
+            "firstScanAt": _iso(first.CreatedAt),
+            "completedAt": _iso(first.LoadingCompletedAt),
+            "dollys": [
+                {
+                    "dollyNo": row.DollyNo,
+                    "vinNo": row.VinNo,
+                    "scanOrder": row.ScanOrder,
+                    "scannedAt": _iso(row.CreatedAt),
+                    "customerReferans": row.CustomerReferans,
+                    "eolName": row.EOLName,
+                    "adet": row.Adet,
+                }
+                for row in rows
+            ],
+        }
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._pending = None
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "cached_sessions": len(self._pending) if self._pending is not None else None}
+
+    def _rows(self, where: str, params: Optional[dict] = None) -> list:
+        return db.session.execute(db.text(_SESSION_ROWS_SQL.format(where=where)), params or {}).fetchall()
+
+    def _compute_pending(self) -> List[Dict[str, Any]]:
+        sessions: Dict[str, Dict[str, Any]] = {}
+        first_scans: Dict[str, Any] = {}
+        for row in self._rows(_PENDING_WHERE):
+            session = sessions.get(row.LoadingSessionId)
+            if session is None:
+                session = sessions[row.LoadingSessionId] = {
+                    "loadingSessionId": row.LoadingSessionId,
+                    "status": "loading_completed",
+                    "forkliftUser": None,
+                    "dollyCount": 0,
+                    "firstScanAt": None,
+                    "completedAt": None,
+                    "dollys": [],
+                }
+            # Özet alanları yalnızca loading_completed hold'lardan (list_loading_sessions ile aynı)
+            if row.Status == "loading_completed":
+                session["dollyCount"] += 1
+                if session["forkliftUser"] is None:
+                    session["forkliftUser"] = row.TerminalUser
+                first_scan = first_scans.get(row.LoadingSessionId)
+                if row.CreatedAt and (first_scan is None or row.CreatedAt < first_scan):
+                    first_scans[row.LoadingSessionId] = row.CreatedAt
+                if row.LoadingCompletedAt and (session["completedAt"] is None or row.LoadingCompletedAt > session["completedAt"]):
+                    session["completedAt"] = row.LoadingCompletedAt
+            session["dollys"].append({
+                "id": row.Id,
+                "dollyNo": row.DollyNo,
+                "vinNo": row.VinNo,
+                "scanOrder": row.ScanOrder,
+                "scannedAt": _iso(row.CreatedAt),
+                "customerReferans": row.CustomerReferans,
+                "eolName": row.EOLName,
+            })
+
+        for session_id, session in sessions.items():
+            session["firstScanAt"] = _iso(first_scans.get(session_id))
+            session["completedAt"] = _iso(session["completedAt"])
+
+        # En yeni ilk tarama en üstte (tarihi olmayanlar en altta)
+        return sorted(
+            sessions.values(),
+            key=lambda session: (session["firstScanAt"] is not None, session["firstScanAt"] or ""),
+            reverse=True,
+        )
+
+    @staticmethod
+    def _copy(sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**session, "dollys": [dict(dolly) for dolly in session["dollys"]]} for session in sessions]
+
+
+# Global instance
+shipment_summaries = ShipmentSummaryEngine()
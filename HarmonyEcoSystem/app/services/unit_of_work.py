@@ -0,0 +1,65 @@
+"""
+Unit of Work
+Bir iş operasyonu boyunca LifecycleService.log_status ve AuditService.log
+yazımlarını commit etmeden biriktirir; blok sonunda hepsi tek bulk insert
+ile yazılır ve operasyon tek commit ile tamamlanır. Hata olursa her şey
+birlikte geri alınır.
+
+    with unit_of_work():
+        ...  # log_status / audit.log yalnızca satır ekler
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import g, has_app_context
+
+from ..extensions import db
+
+
+class UnitOfWork:
+    """Operasyon boyunca biriken lifecycle / audit satırları"""
+
+    def __init__(self):
+        self.lifecycle_rows: List[Dict[str, Any]] = []
+        self.audit_rows: List[Dict[str, Any]] = []
+
+    def flush(self) -> None:
+        """Biriken satırları session'a bulk insert et (commit etmez)"""
+        from .audit_service import AuditService
+        from .lifecycle_service import LifecycleService
+
+        lifecycle_rows, self.lifecycle_rows = self.lifecycle_rows, []
+        audit_rows, self.audit_rows = self.audit_rows, []
+        if lifecycle_rows:
+            LifecycleService().write_staged(lifecycle_rows)
+        if audit_rows:
+            AuditService().write_staged(audit_rows)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    if not has_app_context():
+        return None
+    return g.get("_unit_of_work")
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    outer = current_unit_of_work()
+    if outer is not None:
+        # İç içe kullanım dıştaki birime katılır; commit dış blokta yapılır
+        yield outer
+        return
+
+    uow = UnitOfWork()
+    g._unit_of_work = uow
+    try:
+        yield uow
+        uow.flush()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        g.pop("_unit_of_work", None)
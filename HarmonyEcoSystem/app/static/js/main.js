@@ -82,6 +82,7 @@ document.addEventListener("DOMContentLoaded", () => {
   socket.on('connect', () => {
     console.log('✅ Real-time updates connected');
     isConnected = true;
+    subscribeToScreen();
     
     // Sadece yeniden bağlanma sonrası bildirim göster
     if (connectionLostShown) {
@@ -200,6 +201,21 @@ document.addEventListener("DOMContentLoaded", () => {
   // Helper Functions
   // ============================================
   
+  /**
+   * Ekranda görünen EOL / PartNumber kapsamlarına abone ol
+   * (sunucu kapsamlı olayları yalnızca bu odalara gönderir; EOL'lerin
+   * grup odalarına sunucu tarafında katılınır)
+   */
+  function subscribeToScreen() {
+    const collect = (selector, key) => [...new Set(
+      Array.from(document.querySelectorAll(selector), el => el.dataset[key]).filter(Boolean)
+    )];
+    socket.emit('subscribe', {
+      eols: collect('[data-eol]', 'eol'),
+      parts: collect('[data-part]', 'part')
+    });
+  }
+
   /**
    * Show toast notification
    */
@@ -354,6 +370,7 @@ document.addEventListener("DOMContentLoaded", () => {
         
         // Update the grid
         dollysGrid.innerHTML = newGrid.innerHTML;
+        subscribeToScreen();  // Yeni gelen EOL'ler için
         
         // Re-initialize the page after update
         if (typeof initManualCollection === 'function') {
@@ -441,6 +458,7 @@ document.addEventListener("DOMContentLoaded", () => {
             taskLists[index].innerHTML = newList.innerHTML;
           }
         });
+        subscribeToScreen();  // Yeni görev kartlarının PartNumber'ları için
       })
       .catch(err => console.error('Failed to reload operator data:', err));
   }
@@ -0,0 +1,17 @@
+"""
+Barkod yardımcıları - el terminali okumalarını tek biçime getirir
+"""
+from typing import Optional
+
+
+def normalize_barcode(value: Optional[str]) -> str:
+    """
+    Barkodu karşılaştırma anahtarına çevirir.
+
+    Okuyucuların eklediği boşluk / CR / GS gibi kontrol karakterleri atılır ve
+    büyük harfe çevrilir (SQL Server'ın varsayılan büyük-küçük harf duyarsız,
+    sondaki boşluğu yok sayan karşılaştırmasıyla aynı sonuç).
+    """
+    if value is None:
+        return ""
+    return "".join(char for char in str(value) if char.isprintable()).strip().upper()
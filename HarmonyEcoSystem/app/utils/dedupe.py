@@ -0,0 +1,73 @@
+"""
+Sınırlı, ekleme sıralı tekrar filtresi - monitor'ün "bu kaydı gördüm mü?" takibi
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class BoundedDedupe:
+    """
+    Anahtar -> ilk görülme zamanı. Kapasite aşılınca ya da zaman penceresi
+    dolunca en eski anahtar düşer (FIFO). Ekleme, sorgu ve çıkarma O(1);
+    temizlik için kümenin kopyası alınmaz.
+    """
+
+    def __init__(self, max_entries: int = 1000, window_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.stats = {"lookups": 0, "hits": 0, "evicted_capacity": 0, "evicted_expired": 0}
+
+    def seen(self, key: Hashable) -> bool:
+        """Anahtar pencerede var mı (eklemez; işlem başarılı olunca `add` çağrılır)"""
+        with self._lock:
+            self._expire(time.monotonic())
+            self.stats["lookups"] += 1
+            if key in self._entries:
+                self.stats["hits"] += 1
+                return True
+            return False
+
+    def add(self, key: Hashable) -> None:
+        """Anahtarı kaydet; kapasite aşılırsa en eski anahtar düşer"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                return
+            self._entries[key] = now
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evicted_capacity"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["lookups"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "window_seconds": self.window_seconds,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def _expire(self, now: float) -> None:
+        if self.window_seconds is None:
+            return
+        cutoff = now - self.window_seconds
+        while self._entries:
+            oldest_key, seen_at = next(iter(self._entries.items()))
+            if seen_at > cutoff:
+                break
+            del self._entries[oldest_key]
+            self.stats["evicted_expired"] += 1
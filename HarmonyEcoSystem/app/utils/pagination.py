@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination ve alan seçimi yardımcıları
+
+Cursor, son döndürülen kaydın sıralama anahtarını taşıyan opak bir
+base64 JSON metnidir; istemci `nextCursor` değerini aynen geri gönderir.
+`fields=a,b,c` parametresi ile yanıt yalnızca istenen alanlara indirgenir.
+"""
+import base64
+import json
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Sıralama anahtarını opak cursor metnine çevir"""
+    normalized = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in values.items()}
+    raw = json.dumps(normalized, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Cursor metnini çöz; bozuk cursor için ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def cursor_datetime(values: Dict[str, Any], key: str) -> datetime:
+    try:
+        return datetime.fromisoformat(values[key])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: '{key}' missing or malformed")
+
+
+def parse_page_args(args) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """
+    `limit` / `cursor` query parametrelerini oku.
+
+    İkisi de verilmemişse (None, None) döner; endpoint eski davranışı
+    (tam liste) korur.
+    """
+    raw_limit = args.get("limit")
+    raw_cursor = args.get("cursor")
+    if raw_limit is None and not raw_cursor:
+        return None, None
+    try:
+        limit = int(raw_limit) if raw_limit is not None else DEFAULT_PAGE_LIMIT
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    return limit, decode_cursor(raw_cursor) if raw_cursor else None
+
+
+def parse_fields(args) -> Optional[Set[str]]:
+    """`fields=dolly_no,vin_no` -> {"dolly_no", "vin_no"}; parametre yoksa None"""
+    raw = args.get("fields")
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(",") if name.strip()}
+    return fields or None
+
+
+def project(entry, fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Dataclass'ı dict'e çevir, `fields` verilmişse yalnızca o alanları bırak"""
+    if fields is None:
+        return asdict(entry)
+    return {name: _plain(getattr(entry, name)) for name in entry.__dataclass_fields__ if name in fields}
+
+
+def page_response(items: List[Any], fields: Optional[Set[str]], limit: Optional[int], next_cursor: Optional[str]):
+    """Sayfalı istekte {items, nextCursor, limit}, aksi halde düz liste"""
+    projected = [project(item, fields) for item in items]
+    if limit is None:
+        return projected
+    return {"items": projected, "nextCursor": next_cursor, "limit": limit}
+
+
+def _plain(value: Any) -> Any:
+    # İç içe dataclass / liste alanları (ör. hold_entries) asdict ile aynı biçimde
+    if hasattr(value, "__dataclass_fields__"):
+        return asdict(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
@@ -0,0 +1,148 @@
+/*
+  Migration 025: DollyCurrentStatus projection
+
+  Purpose: DollyLifecycle append-only bir geçmiş tablosu; "dolly şu an hangi
+           durumda" sorusu her seferinde tüm geçmişi sıralıyordu.
+  Fix:     Her DollyNo için son lifecycle kaydını tutan projeksiyon tablosu.
+           LifecycleService.log_status aynı transaction içinde günceller.
+           Yeniden kurmak / kontrol etmek için:
+               flask lifecycle rebuild-status
+               flask lifecycle check-status
+*/
+
+IF OBJECT_ID('[dbo].[DollyCurrentStatus]', 'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[DollyCurrentStatus] (
+        [DollyNo]     NVARCHAR(20)  NOT NULL PRIMARY KEY,
+        [VinNo]       NVARCHAR(50)  NOT NULL,
+        [Status]      NVARCHAR(40)  NOT NULL,
+        [Source]      NVARCHAR(30)  NULL,
+        [LifecycleId] INT           NOT NULL,
+        [UpdatedAt]   DATETIME2(0)  NOT NULL CONSTRAINT DF_DollyCurrentStatus_UpdatedAt DEFAULT (SYSUTCDATETIME())
+    );
+
+    CREATE INDEX IX_DollyCurrentStatus_Status
+        ON [dbo].[DollyCurrentStatus] ([Status]);
+
+    PRINT '✅ DollyCurrentStatus tablosu oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ DollyCurrentStatus tablosu zaten mevcut';
+END;
+GO
+
+-- Backfill: her DollyNo için en son DollyLifecycle kaydı
+INSERT INTO [dbo].[DollyCurrentStatus] (DollyNo, VinNo, Status, Source, LifecycleId, UpdatedAt)
+SELECT x.DollyNo, x.VinNo, x.Status, x.Source, x.Id, x.CreatedAt
+FROM (
+    SELECT dl.Id, dl.DollyNo, dl.VinNo, dl.Status, dl.Source, dl.CreatedAt,
+           ROW_NUMBER() OVER (PARTITION BY dl.DollyNo ORDER BY dl.CreatedAt DESC, dl.Id DESC) AS rn
+    FROM [dbo].[DollyLifecycle] AS dl
+) AS x
+WHERE x.rn = 1
+  AND NOT EXISTS (SELECT 1 FROM [dbo].[DollyCurrentStatus] cs WHERE cs.DollyNo = x.DollyNo);
+GO
+
+-- Control Tower view: lifecycle durumu artık projeksiyondan (PK lookup)
+IF OBJECT_ID('dbo.vw_DollyControlTower', 'V') IS NOT NULL
+    DROP VIEW dbo.vw_DollyControlTower;
+GO
+
+CREATE VIEW dbo.vw_DollyControlTower
+AS
+WITH LatestHold AS (
+    SELECT dsh.*,
+           ROW_NUMBER() OVER (PARTITION BY dsh.DollyNo, dsh.VinNo ORDER BY dsh.CreatedAt DESC) AS rn
+    FROM dbo.DollySubmissionHold AS dsh
+),
+LatestAudit AS (
+    SELECT al.*,
+           ROW_NUMBER() OVER (PARTITION BY al.ResourceId ORDER BY al.CreatedAt DESC) AS rn
+    FROM dbo.AuditLog AS al
+    WHERE al.Resource = 'dolly'
+)
+SELECT
+    de.DollyNo,
+    de.VinNo,
+    COALESCE(sde.PartNumber, lh.PartNumber, de.CustomerReferans) AS PartNumber,
+    de.CustomerReferans,
+    de.Adet,
+    de.EOLName,
+    de.EOLID,
+    de.EOLDATE,
+    de.EOLDollyBarcode,
+    COALESCE(pw.PWorkStationName, de.EOLName) AS PWorkStationName,
+    pw.PWorkStationNo,
+    pw.GroupCode,
+    pw.SpecCode1,
+    pw.SpecCode2,
+    dg.Id AS GroupId,
+    dg.GroupName,
+    dg.Description AS GroupDescription,
+    dge.ShippingTag,
+    cs.Status AS LifecycleStatus,
+    ll.Source AS LifecycleSource,
+    ll.Metadata AS LifecycleMetadata,
+    ll.CreatedAt AS LifecycleCreatedAt,
+    lh.Status AS HoldStatus,
+    lh.Payload AS HoldPayload,
+    lh.CreatedAt AS HoldCreatedAt,
+    lh.SubmittedAt AS HoldSubmittedAt,
+    lh.PartNumber AS HoldPartNumber,
+    tu.DisplayName AS HoldTerminalUser,
+    sde.SeferNumarasi,
+    sde.PlakaNo,
+    sde.CustomerReferans AS SeferCustomerRef,
+    sde.Adet AS SeferCount,
+    sde.TerminalDate,
+    sde.ASNDate,
+    sde.IrsaliyeDate,
+    la.ActorType AS AuditActorType,
+    la.ActorId AS AuditActorId,
+    la.ActorName AS AuditActorName,
+    la.Action AS AuditAction,
+    la.Payload AS AuditPayload,
+    la.CreatedAt AS AuditCreatedAt,
+    wot.Id AS WebTaskId,
+    wot.PartNumber,
+    wot.Status AS WebTaskStatus,
+    wot.AssignedTo,
+    wot.GroupTag,
+    wot.TotalItems,
+    wot.ProcessedItems,
+    CASE
+        WHEN ISNULL(wot.TotalItems, 0) = 0 THEN NULL
+        ELSE CAST(wot.ProcessedItems AS decimal(10,2)) / NULLIF(wot.TotalItems, 0) * 100
+    END AS WebTaskProgressPct,
+    wot.CreatedAt AS WebTaskCreatedAt,
+    wot.UpdatedAt AS WebTaskUpdatedAt,
+    GETUTCDATE() AS SnapshotTakenAt
+FROM dbo.DollyEOLInfo AS de
+LEFT JOIN dbo.DollyCurrentStatus AS cs
+       ON cs.DollyNo = de.DollyNo
+LEFT JOIN dbo.DollyLifecycle AS ll
+       ON ll.Id = cs.LifecycleId
+LEFT JOIN LatestHold AS lh
+       ON lh.DollyNo = de.DollyNo AND lh.VinNo = de.VinNo AND lh.rn = 1
+LEFT JOIN dbo.UserAccount AS tu
+       ON tu.Username = lh.TerminalUser
+LEFT JOIN dbo.SeferDollyEOL AS sde
+       ON sde.DollyNo = de.DollyNo AND sde.VinNo = de.VinNo
+LEFT JOIN LatestAudit AS la
+       ON la.ResourceId = de.DollyNo AND la.rn = 1
+LEFT JOIN dbo.DollyGroupEOL AS dge
+       ON dge.PWorkStationId = de.EOLID
+LEFT JOIN dbo.DollyGroup AS dg
+       ON dg.Id = dge.GroupId
+LEFT JOIN dbo.PWorkStation AS pw
+       ON pw.Id = dge.PWorkStationId
+LEFT JOIN dbo.WebOperatorTask AS wot
+       ON wot.PartNumber = de.CustomerReferans
+      AND wot.Status NOT IN ('completed', 'cancelled');
+GO
+
+PRINT '';
+PRINT '========================================';
+PRINT '✅ Migration 025 completed successfully';
+PRINT '========================================';
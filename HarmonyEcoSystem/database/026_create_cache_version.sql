@@ -0,0 +1,34 @@
+/*
+  Migration 026: CacheVersion
+
+  Purpose: Process içi önbelleklerin (ör. GroupResolver) worker'lar arasında
+           geçersiz kılınması. Yazma yolu Version değerini artırır, diğer
+           worker'lar kısa aralıklarla okuyup değiştiyse yeniden yükler.
+*/
+
+IF OBJECT_ID('[dbo].[CacheVersion]', 'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[CacheVersion] (
+        [CacheKey]  NVARCHAR(50)  NOT NULL PRIMARY KEY,
+        [Version]   BIGINT        NOT NULL CONSTRAINT DF_CacheVersion_Version DEFAULT (0),
+        [UpdatedAt] DATETIME2(0)  NOT NULL CONSTRAINT DF_CacheVersion_UpdatedAt DEFAULT (SYSUTCDATETIME())
+    );
+
+    PRINT '✅ CacheVersion tablosu oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ CacheVersion tablosu zaten mevcut';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM [dbo].[CacheVersion] WHERE CacheKey = 'group_resolver')
+BEGIN
+    INSERT INTO [dbo].[CacheVersion] (CacheKey, Version) VALUES ('group_resolver', 1);
+END;
+GO
+
+PRINT '';
+PRINT '========================================';
+PRINT '✅ Migration 026 completed successfully';
+PRINT '========================================';
@@ -0,0 +1,32 @@
+/*
+  Migration 027: PartNumberCounter
+
+  Purpose: Part number üretimi her seferinde DollySubmissionHold üzerinde
+           MAX(CAST(RIGHT(PartNumber, 4) AS INT)) + LIKE taraması yapıyordu;
+           sargable değil ve eşzamanlı forklift'lerde aynı numara üretilebiliyordu.
+  Fix:     Seri (PT, M, MANUAL, WO) ve gün bazlı sayaç. Her worker
+           UPDATE ... OUTPUT ile blok halinde numara ayırır ve bellekten dağıtır.
+*/
+
+IF OBJECT_ID('[dbo].[PartNumberCounter]', 'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[PartNumberCounter] (
+        [Series]      NVARCHAR(20)  NOT NULL,
+        [CounterDate] DATE          NOT NULL,
+        [LastValue]   INT           NOT NULL CONSTRAINT DF_PartNumberCounter_LastValue DEFAULT (0),
+        [UpdatedAt]   DATETIME2(0)  NOT NULL CONSTRAINT DF_PartNumberCounter_UpdatedAt DEFAULT (SYSUTCDATETIME()),
+        CONSTRAINT PK_PartNumberCounter PRIMARY KEY ([Series], [CounterDate])
+    );
+
+    PRINT '✅ PartNumberCounter tablosu oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ PartNumberCounter tablosu zaten mevcut';
+END;
+GO
+
+PRINT '';
+PRINT '========================================';
+PRINT '✅ Migration 027 completed successfully';
+PRINT '========================================';
@@ -0,0 +1,130 @@
+/*
+  Migration 028: Active scan order guard
+
+  Purpose: ScanOrder her taramada MAX(ScanOrder) / COUNT sorgusuyla
+           hesaplanıyordu; hızlı art arda iki tarama aynı sırayı alabiliyordu.
+           Uygulama artık sırayı bellekte ilerletiyor (scan_sequencer).
+  Fix:     Aktif (Status = 'scanned') taramalar için indexed view üzerinde
+           (LoadingSessionId, ScanOrder) tekilliği. Bir dolly'nin tüm VIN
+           satırları aynı ScanOrder'ı paylaştığından kısıt doğrudan tabloya
+           değil, dolly bazında gruplanmış view'a konur. Çakışan insert hata
+           alır ve uygulama yeni sırayla tekrar dener.
+           Eski MAX+1 / COUNT+1 yarışının bıraktığı çakışan aktif sıralar
+           index oluşturulmadan önce raporlanır ve session içinde mevcut
+           sıra korunarak yeniden numaralandırılır.
+*/
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+SET ANSI_PADDING ON;
+SET ANSI_WARNINGS ON;
+SET ARITHABORT ON;
+SET CONCAT_NULL_YIELDS_NULL ON;
+SET NUMERIC_ROUNDABORT OFF;
+GO
+
+IF OBJECT_ID('[dbo].[vw_ActiveScanOrder]', 'V') IS NULL
+BEGIN
+    EXEC('
+    CREATE VIEW [dbo].[vw_ActiveScanOrder]
+    WITH SCHEMABINDING
+    AS
+    SELECT LoadingSessionId, ScanOrder, DollyNo, COUNT_BIG(*) AS VinCount
+    FROM [dbo].[DollySubmissionHold]
+    WHERE Status = ''scanned''
+      AND LoadingSessionId IS NOT NULL
+      AND ScanOrder IS NOT NULL
+    GROUP BY LoadingSessionId, ScanOrder, DollyNo
+    ');
+
+    PRINT '✅ vw_ActiveScanOrder view oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ vw_ActiveScanOrder view zaten mevcut';
+END;
+GO
+
+-- Çakışan aktif (LoadingSessionId, ScanOrder) çiftleri: farklı dolly'ler aynı sırada
+IF OBJECT_ID('tempdb..#ScanOrderConflicts') IS NOT NULL DROP TABLE #ScanOrderConflicts;
+
+SELECT LoadingSessionId, ScanOrder, COUNT(DISTINCT DollyNo) AS DollyCount
+INTO #ScanOrderConflicts
+FROM [dbo].[DollySubmissionHold]
+WHERE Status = 'scanned'
+  AND LoadingSessionId IS NOT NULL
+  AND ScanOrder IS NOT NULL
+GROUP BY LoadingSessionId, ScanOrder
+HAVING COUNT(DISTINCT DollyNo) > 1;
+
+IF EXISTS (SELECT 1 FROM #ScanOrderConflicts)
+BEGIN
+    PRINT '⚠️ Çakışan aktif ScanOrder kayıtları bulundu (yeniden numaralandırılacak):';
+    SELECT c.LoadingSessionId, c.ScanOrder, h.DollyNo, MIN(h.Id) AS FirstHoldId, MIN(h.CreatedAt) AS FirstScanAt
+    FROM #ScanOrderConflicts c
+    JOIN [dbo].[DollySubmissionHold] h
+      ON h.LoadingSessionId = c.LoadingSessionId AND h.ScanOrder = c.ScanOrder AND h.Status = 'scanned'
+    GROUP BY c.LoadingSessionId, c.ScanOrder, h.DollyNo
+    ORDER BY c.LoadingSessionId, c.ScanOrder, FirstHoldId;
+
+    -- Çakışma olan session'larda aktif dolly'ler mevcut sıra, ilk tarama ve DollyNo ile 1..N
+    ;WITH dolly_orders AS (
+        SELECT LoadingSessionId, DollyNo, ScanOrder, MIN(Id) AS FirstHoldId
+        FROM [dbo].[DollySubmissionHold]
+        WHERE Status = 'scanned'
+          AND ScanOrder IS NOT NULL
+          AND LoadingSessionId IN (SELECT LoadingSessionId FROM #ScanOrderConflicts)
+        GROUP BY LoadingSessionId, DollyNo, ScanOrder
+    ),
+    ranked AS (
+        SELECT LoadingSessionId, DollyNo, ScanOrder,
+               ROW_NUMBER() OVER (PARTITION BY LoadingSessionId ORDER BY ScanOrder, FirstHoldId, DollyNo) AS NewScanOrder
+        FROM dolly_orders
+    )
+    UPDATE h
+    SET ScanOrder = r.NewScanOrder
+    FROM [dbo].[DollySubmissionHold] h
+    JOIN ranked r
+      ON h.LoadingSessionId = r.LoadingSessionId AND h.DollyNo = r.DollyNo AND h.ScanOrder = r.ScanOrder
+    WHERE h.Status = 'scanned';
+
+    PRINT '✅ ' + CAST(@@ROWCOUNT AS NVARCHAR(20)) + ' hold satırının ScanOrder değeri yeniden numaralandırıldı';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ Çakışan aktif ScanOrder kaydı yok';
+END;
+
+DROP TABLE #ScanOrderConflicts;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_vw_ActiveScanOrder' AND object_id = OBJECT_ID('[dbo].[vw_ActiveScanOrder]'))
+BEGIN
+    CREATE UNIQUE CLUSTERED INDEX [UX_vw_ActiveScanOrder]
+        ON [dbo].[vw_ActiveScanOrder] ([LoadingSessionId], [ScanOrder], [DollyNo]);
+
+    PRINT '✅ UX_vw_ActiveScanOrder index oluşturuldu';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_vw_ActiveScanOrder_SessionOrder' AND object_id = OBJECT_ID('[dbo].[vw_ActiveScanOrder]'))
+BEGIN
+    -- Aynı session'da iki farklı dolly aynı aktif sırayı alamaz
+    CREATE UNIQUE NONCLUSTERED INDEX [UX_vw_ActiveScanOrder_SessionOrder]
+        ON [dbo].[vw_ActiveScanOrder] ([LoadingSessionId], [ScanOrder]);
+
+    PRINT '✅ UX_vw_ActiveScanOrder_SessionOrder index oluşturuldu';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_vw_ActiveScanOrder_SessionOrder' AND object_id = OBJECT_ID('[dbo].[vw_ActiveScanOrder]'))
+BEGIN
+    RAISERROR('❌ Migration 028 failed: UX_vw_ActiveScanOrder_SessionOrder oluşturulamadı', 16, 1);
+END
+ELSE
+BEGIN
+    PRINT '';
+    PRINT '========================================';
+    PRINT '✅ Migration 028 completed successfully';
+    PRINT '========================================';
+END;
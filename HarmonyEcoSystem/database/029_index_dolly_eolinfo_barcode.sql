@@ -0,0 +1,29 @@
+/*
+  Migration 029: DollyEOLInfo barcode index
+
+  Purpose: Tarama endpoint'leri dolly'yi `EOLDollyBarcode = :b OR DollyNo = :b`
+           ile arıyordu; OR koşulu ve EOLDollyBarcode üzerinde index olmaması
+           tablo büyüdükçe tam taramaya yol açıyordu.
+  Fix:     Barkod çözümleyicinin SQL fallback'i iki ayrı seek yapar
+           (EOLDollyBarcode ve DollyNo). DollyNo seek'i primary key'i kullanır;
+           EOLDollyBarcode için filtered nonclustered index eklenir.
+*/
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_DollyEOLInfo_EOLDollyBarcode' AND object_id = OBJECT_ID('[dbo].[DollyEOLInfo]'))
+BEGIN
+    CREATE NONCLUSTERED INDEX [IX_DollyEOLInfo_EOLDollyBarcode]
+        ON [dbo].[DollyEOLInfo] ([EOLDollyBarcode])
+        WHERE [EOLDollyBarcode] IS NOT NULL;
+
+    PRINT '✅ IX_DollyEOLInfo_EOLDollyBarcode index oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ IX_DollyEOLInfo_EOLDollyBarcode index zaten mevcut';
+END;
+GO
+
+PRINT '';
+PRINT '========================================';
+PRINT '✅ Migration 029 completed successfully';
+PRINT '========================================';
@@ -0,0 +1,52 @@
+/*
+  Migration 030: Change feed checkpoint
+
+  Purpose: DatabaseMonitor her 2 saniyede `TOP 20 ... WHERE EOLDATE >= :since
+           ORDER BY EOLDATE DESC` ile yeni dolly arıyordu. EOLDATE gün
+           hassasiyetinde olduğundan aynı satırlar tekrar tekrar okunuyor,
+           20'den fazla VIN aynı anda gelirse fazlası kaçıyordu; restart sonrası
+           son 1 dakikadan öncesi hiç görülmüyordu.
+  Fix:     Monitor DollyEOLInfo'yu (InsertedAt, DollyNo, VinNo) keyset
+           watermark'ıyla sayfa sayfa ileri okur (change_feed). Watermark bu
+           tabloda saklanır; restart sonrası kalınan yerden devam edilir.
+           Keyset sorgusu için InsertedAt index'i eklenir.
+*/
+
+IF OBJECT_ID('[dbo].[ChangeFeedCheckpoint]', 'U') IS NULL
+BEGIN
+    CREATE TABLE [dbo].[ChangeFeedCheckpoint] (
+        [FeedName]        NVARCHAR(50)  NOT NULL PRIMARY KEY,
+        [LastInsertedAt]  DATETIME2(7)  NULL,
+        [LastDollyNo]     NVARCHAR(20)  NULL,
+        [LastVinNo]       NVARCHAR(50)  NULL,
+        [RowsProcessed]   BIGINT        NOT NULL CONSTRAINT DF_ChangeFeedCheckpoint_RowsProcessed DEFAULT (0),
+        [UpdatedAt]       DATETIME2(0)  NOT NULL CONSTRAINT DF_ChangeFeedCheckpoint_UpdatedAt DEFAULT (SYSUTCDATETIME())
+    );
+
+    PRINT '✅ ChangeFeedCheckpoint tablosu oluşturuldu';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ ChangeFeedCheckpoint tablosu zaten mevcut';
+END;
+GO
+
+IF COL_LENGTH('dbo.DollyEOLInfo', 'InsertedAt') IS NOT NULL
+   AND NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_DollyEOLInfo_InsertedAt' AND object_id = OBJECT_ID('[dbo].[DollyEOLInfo]'))
+BEGIN
+    -- Anahtar sırası feed'in ORDER BY'ı ile aynı: sayfa sorgusu sıralamasız seek yapar
+    EXEC('
+    CREATE NONCLUSTERED INDEX [IX_DollyEOLInfo_InsertedAt]
+        ON [dbo].[DollyEOLInfo] ([InsertedAt], [DollyNo], [VinNo])
+        INCLUDE ([CustomerReferans], [Adet], [EOLName], [EOLID], [EOLDATE], [EOLDollyBarcode])
+        WHERE [InsertedAt] IS NOT NULL
+    ');
+
+    PRINT '✅ IX_DollyEOLInfo_InsertedAt index oluşturuldu';
+END;
+GO
+
+PRINT '';
+PRINT '========================================';
+PRINT '✅ Migration 030 completed successfully';
+PRINT '========================================';
@@ -0,0 +1,82 @@
+/*
+  Migration 031: Active scan dolly guard
+
+  Purpose: Aynı dolly'nin aynı loading session'da iki kez taranması yalnızca
+           bellekteki idempotency penceresiyle engelleniyordu; pencere dışı
+           retry'lar veya başka bir worker ikinci bir aktif hold seti
+           yazabiliyordu.
+  Fix:     forklift_scan_dolly, session'da dolly'nin aktif (scanned) hold'u
+           varsa yenisini yazmadan onu döndürür. Veritabanında da
+           vw_ActiveScanOrder (migration 028) üzerinde (LoadingSessionId,
+           DollyNo) tekilliği kurulur. Mevcut çift taramalar önce raporlanır;
+           her dolly'nin ilk (en küçük ScanOrder) taraması aktif kalır,
+           sonrakiler 'removed' yapılır.
+*/
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+SET ANSI_PADDING ON;
+SET ANSI_WARNINGS ON;
+SET ARITHABORT ON;
+SET CONCAT_NULL_YIELDS_NULL ON;
+SET NUMERIC_ROUNDABORT OFF;
+GO
+
+-- Aynı session'da birden fazla aktif sırası olan dolly'ler
+IF OBJECT_ID('tempdb..#ScanDollyConflicts') IS NOT NULL DROP TABLE #ScanDollyConflicts;
+
+SELECT LoadingSessionId, DollyNo, MIN(ScanOrder) AS KeepScanOrder, COUNT(DISTINCT ScanOrder) AS ScanCount
+INTO #ScanDollyConflicts
+FROM [dbo].[DollySubmissionHold]
+WHERE Status = 'scanned'
+  AND LoadingSessionId IS NOT NULL
+  AND ScanOrder IS NOT NULL
+GROUP BY LoadingSessionId, DollyNo
+HAVING COUNT(DISTINCT ScanOrder) > 1;
+
+IF EXISTS (SELECT 1 FROM #ScanDollyConflicts)
+BEGIN
+    PRINT '⚠️ Aynı session''da birden fazla aktif taraması olan dolly''ler (ilk tarama korunacak):';
+    SELECT LoadingSessionId, DollyNo, KeepScanOrder, ScanCount
+    FROM #ScanDollyConflicts
+    ORDER BY LoadingSessionId, DollyNo;
+
+    UPDATE h
+    SET Status = 'removed', UpdatedAt = GETUTCDATE()
+    FROM [dbo].[DollySubmissionHold] h
+    JOIN #ScanDollyConflicts c
+      ON h.LoadingSessionId = c.LoadingSessionId AND h.DollyNo = c.DollyNo
+    WHERE h.Status = 'scanned'
+      AND h.ScanOrder > c.KeepScanOrder;
+
+    PRINT '✅ ' + CAST(@@ROWCOUNT AS NVARCHAR(20)) + ' tekrar hold satırı removed yapıldı';
+END
+ELSE
+BEGIN
+    PRINT 'ℹ️ Çift aktif tarama yok';
+END;
+
+DROP TABLE #ScanDollyConflicts;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_vw_ActiveScanOrder_SessionDolly' AND object_id = OBJECT_ID('[dbo].[vw_ActiveScanOrder]'))
+BEGIN
+    -- Bir dolly aynı session'da yalnızca bir aktif sırada bulunabilir
+    CREATE UNIQUE NONCLUSTERED INDEX [UX_vw_ActiveScanOrder_SessionDolly]
+        ON [dbo].[vw_ActiveScanOrder] ([LoadingSessionId], [DollyNo]);
+
+    PRINT '✅ UX_vw_ActiveScanOrder_SessionDolly index oluşturuldu';
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_vw_ActiveScanOrder_SessionDolly' AND object_id = OBJECT_ID('[dbo].[vw_ActiveScanOrder]'))
+BEGIN
+    RAISERROR('❌ Migration 031 failed: UX_vw_ActiveScanOrder_SessionDolly oluşturulamadı', 16, 1);
+END
+ELSE
+BEGIN
+    PRINT '';
+    PRINT '========================================';
+    PRINT '✅ Migration 031 completed successfully';
+    PRINT '========================================';
+END;